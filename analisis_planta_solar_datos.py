@@ -133,6 +133,15 @@ import pandas as pd
 import matplotlib.pyplot as plt
 import seaborn as sns
 
+from planta_solar.calidad import COLUMNAS_ORIGINALES, perfilar
+from planta_solar.clima import guardar_estrella
+from planta_solar.coherencia import coherencia_diaria, verificar_coherencia
+from planta_solar.fechas import convertir_fechas
+from planta_solar.huecos import detectar_huecos, faltantes_por_dia
+from planta_solar.ingesta import FUENTES
+from planta_solar.instrumentacion import etapa
+from planta_solar.integracion import integrar
+
 # %matplotlib inline # para que los gráficos aparezcan en Jupyter Notebook
 # %config IPCompleter.greedy=True # cuando pulsamos la tecla tabuladora que autocomplete
 
@@ -145,32 +154,47 @@ import seaborn as sns
 # - Planta 2, datos de generación
 # - Planta 2, datos de sensor ambiental
 
+# Aquí los cargamos completos porque son pequeños. Cuando el histórico no cabe en memoria (meses de datos de muchas plantas)
+# hay que leerlos por lotes ya limpios y renombrados con leer_por_lotes() de planta_solar/ingesta.py
+
+# Cada paso costoso (la lectura de cada csv, la conversión de las fechas, los concat, la integración) es una etapa de planta_solar/instrumentacion.py.
+# Si ejecutamos el script con PLANTA_SOLAR_TRAZA=traza.jsonl se guarda el tiempo, las filas y el pico de memoria de cada una.
+
 # CARGA DE LOS DATOS PLANTA 1 - DATOS DE GENERACIÓN
 
-p1g = pd.read_csv('Datos/Plant_1_Generation_Data.csv')
+with etapa('lectura Plant_1_Generation_Data.csv') as e:
+    p1g = e.salida(pd.read_csv('Datos/Plant_1_Generation_Data.csv'))
 print(p1g)
 p1g.info()
 
 # CARGA DE LOS DATOS PLANTA 1 - DATOS DE SENSOR AMBIENTAL
 
-p1w = pd.read_csv('Datos/Plant_1_Weather_Sensor_Data.csv')
+with etapa('lectura Plant_1_Weather_Sensor_Data.csv') as e:
+    p1w = e.salida(pd.read_csv('Datos/Plant_1_Weather_Sensor_Data.csv'))
 print(p1w)
 p1w.info()
 
 # CARGA DE LOS DATOS PLANTA 2 - DATOS DE GENERACIÓN
 
-p2g = pd.read_csv('Datos/Plant_2_Generation_Data.csv')
+with etapa('lectura Plant_2_Generation_Data.csv') as e:
+    p2g = e.salida(pd.read_csv('Datos/Plant_2_Generation_Data.csv'))
 print(p2g)
 p2g.info()
 
 # CARGA DE LOS DATOS PLANTA 2 - DATOS DE SENSOR AMBIENTAL
 
-p2w = pd.read_csv('Datos/Plant_2_Weather_Sensor_Data.csv')
+with etapa('lectura Plant_2_Weather_Sensor_Data.csv') as e:
+    p2w = e.salida(pd.read_csv('Datos/Plant_2_Weather_Sensor_Data.csv'))
 print(p2w)
 p2w.info()
 
 # CALIDAD DE DATOS
 
+# En vez de ir llamando a describe(), nunique(), value_counts(), etc., que vuelven a recorrer el dataset cada vez,
+# usamos perfilar() de planta_solar/calidad.py, que calcula en una sola pasada los nulos, rangos, cardinalidad,
+# lecturas por día y por inverter y la distribución del ratio DC / AC.
+# Con toda la flota se puede aplicar lote a lote sobre los ficheros con perfilar_fuente().
+
 # CALIDAD DE PLANTA 1 - DATOS DE GENERACIÓN
 
 p1g.info()
@@ -179,7 +203,11 @@ p1g.info()
 # Vemos que DATE_TIME está como object.
 # Convertimos DATE_TIME a tipo datetime
 
-p1g['DATE_TIME'] = pd.to_datetime(p1g.DATE_TIME,dayfirst=True)
+# En este fichero el día va delante (15-05-2020 00:00). Si dejamos que Pandas lo infiera con dayfirst puede confundir día y mes en fechas ambiguas como el 06-05.
+# Así que usamos el formato exacto que tenemos registrado para cada fuente en FUENTES, y revisamos los registros que no lo cumplan.
+
+p1g['DATE_TIME'], no_validas = convertir_fechas(p1g.DATE_TIME, FUENTES['p1_generacion']['formato_fecha'])
+print(no_validas)
 
 print(p1g.head())
 
@@ -191,14 +219,15 @@ print(p1g.PLANT_ID.unique())
 
 p1g['PLANT_ID'] = p1g.PLANT_ID.replace(4135001, 'p1')
 
-# Revisamos los descriptivos.
+# Revisamos el perfil de calidad.
 
-print(p1g.describe().T)
+perfil = perfilar(p1g, **COLUMNAS_ORIGINALES)
+print(perfil['columnas'])
 
 # Vamos a quitar la visualización de notación científica.
 
 pd.options.display.float_format = '{:15.2f}'.format
-print(p1g.describe().T)
+print(perfil['columnas'])
 
 # Resulta extraño la diferencia de medias entre DC y AC. Vamos a visualizarlo.
 
@@ -208,14 +237,13 @@ p1g[['DC_POWER','AC_POWER']].plot(figsize = (16,12));
 # Primero vamos a comprobar si van en la misma dirección aunque sea a disinta escala (con una correlación), y después vamos a comprobar cual es el ratio medio entre ambas medidas.
 
 print(p1g.DC_POWER.corr(p1g.AC_POWER))
-print((p1g.DC_POWER / p1g.AC_POWER).describe())
+print(perfil['ratio_dc_ac'])
 
 # Parece que los Inverters están transformando solo el 10% de DC a AC, lo cual a priori es muy bajo.
 # De todas formas desde la calidad llegamos hasta aquí y seguiremos explorando esto en la parte de análisis y comparándolo con la Planta 2 a ver si pasa lo mismo.
 # Analizamos la variable categórica, que es el identificador de los inverters.
 
-print(p1g.SOURCE_KEY.nunique())
-print(p1g.SOURCE_KEY.value_counts())
+print(perfil['lecturas_clave'])
 
 # CONCLUSIONES:
 
@@ -245,7 +273,7 @@ sns.lineplot(data = temp.reset_index(), x = temp.reset_index().DATE_TIME, y = 'D
 # Definitivamente diferentes inverters tienen diferentes datos en el mismo momento temporal, por lo que concluímos que esa variable es por inverter
 # Por último vamos a analizar el período en el que tenemos datos y si el número de mediciones diarias es constante.
 
-p1g.DATE_TIME.dt.date.value_counts().sort_index().plot.bar(figsize = (12,8));
+perfil['lecturas_dia'].plot.bar(figsize = (12,8));
 
 # CONCLUSIONES
 
@@ -260,7 +288,8 @@ p1w.info()
 
 # Corregimos el tipo de DATE_TIME
 
-p1w.DATE_TIME = pd.to_datetime(p1w.DATE_TIME)
+p1w['DATE_TIME'], no_validas = convertir_fechas(p1w.DATE_TIME, FUENTES['p1_sensor']['formato_fecha'])
+print(no_validas)
 print(p1w.head())
 
 # Reemplazamos el nombre de la planta
@@ -268,18 +297,15 @@ print(p1w.head())
 p1w['PLANT_ID'] = p1w.PLANT_ID.replace(4135001,'p1')
 print(p1w)
 
-# Revisamos los estadísticos
-
-print(p1w.describe().T)
+# Revisamos el perfil de calidad: estadísticos y la variable categórica, que es el identificador del sensor (cardinalidad de SOURCE_KEY).
 
-# Revisamos la variable categórica, que es el identificador del sensor.
-
-print(p1w.SOURCE_KEY.nunique())
+perfil = perfilar(p1w, **COLUMNAS_ORIGINALES)
+print(perfil['columnas'])
 
 # Solo hay un sensor de variables ambientales en la planta.
 # Revisamos la fecha.
 
-p1w.DATE_TIME.dt.date.value_counts().sort_index().plot.bar(figsize = (12,8));
+perfil['lecturas_dia'].plot.bar(figsize = (12,8));
 
 # CONCLUSIONES
 
@@ -292,21 +318,23 @@ p1w.DATE_TIME.dt.date.value_counts().sort_index().plot.bar(figsize = (12,8));
 
 p2g.info()
 
-p2g['DATE_TIME'] = pd.to_datetime(p2g.DATE_TIME)
+p2g['DATE_TIME'], no_validas = convertir_fechas(p2g.DATE_TIME, FUENTES['p2_generacion']['formato_fecha'])
+print(no_validas)
 p2g['PLANT_ID'] = p2g.PLANT_ID.replace(4136001, 'p2')
 
 print(p2g.head())
-print(p2g.describe().T)
 
-# En este caso los valores de DC y AC están mucho más cercanos entre sí. Vamos a calcular el ratio.
+perfil = perfilar(p2g, **COLUMNAS_ORIGINALES)
+print(perfil['columnas'])
+
+# En este caso los valores de DC y AC están mucho más cercanos entre sí. Vamos a revisar el ratio.
 
-print((p2g.DC_POWER / p2g.AC_POWER).describe())
+print(perfil['ratio_dc_ac'])
 
 # Ahora los valores del ratio sí están muy próximos a uno.
 # Analizamos la variable categórica, que es el identificador de los inverters.
 
-print(p2g.SOURCE_KEY.nunique())
-print(p2g.SOURCE_KEY.value_counts())
+print(perfil['lecturas_clave'])
 
 # CONCLUSIONES
 
@@ -317,7 +345,7 @@ print(p2g.SOURCE_KEY.value_counts())
 
 # Por último vamos a analizar la fecha.
 
-p2g.DATE_TIME.dt.date.value_counts().sort_index().plot.bar(figsize = (12,8));
+perfil['lecturas_dia'].plot.bar(figsize = (12,8));
 
 # CONCLUSIONES
 
@@ -332,7 +360,8 @@ p2w.info()
 
 # Corregimos el tipo de DATE_TIME
 
-p2w.DATE_TIME = pd.to_datetime(p2w.DATE_TIME)
+p2w['DATE_TIME'], no_validas = convertir_fechas(p2w.DATE_TIME, FUENTES['p2_sensor']['formato_fecha'])
+print(no_validas)
 print(p2w.head())
 
 # Reemplazamos el nombre de la planta
@@ -340,18 +369,15 @@ print(p2w.head())
 p2w['PLANT_ID'] = p2w.PLANT_ID.replace(4136001,'p2')
 print(p2w)
 
-# Revisamos los estadísticos
+# Revisamos el perfil de calidad: estadísticos y la variable categórica, que es el identificador del sensor (cardinalidad de SOURCE_KEY).
 
-print(p2w.describe().T)
-
-# Analizamos la variable categórica, que es el identificador del sensor.
-
-print(p2w.SOURCE_KEY.nunique())
+perfil = perfilar(p2w, **COLUMNAS_ORIGINALES)
+print(perfil['columnas'])
 
 # Solo hay un sensor de variables ambientales en la planta.
 # Revisamos la fecha.
 
-p2w.DATE_TIME.dt.date.value_counts().sort_index().plot.bar(figsize = (12,8));
+perfil['lecturas_dia'].plot.bar(figsize = (12,8));
 
 # CONCLUSIONES
 
@@ -376,7 +402,8 @@ p2w.DATE_TIME.dt.date.value_counts().sort_index().plot.bar(figsize = (12,8));
 
 # UNIÓN DE LOS DASTASETS DE GENERACIÓN
 
-gener = pd.concat([p1g,p2g],axis = 'index')
+with etapa('concat gener', len(p1g) + len(p2g)) as e:
+    gener = e.salida(pd.concat([p1g,p2g],axis = 'index'))
 print(gener)
 
 # Vamos a renombrar ya las variables para hacerlas más descriptivas y usables.
@@ -387,38 +414,22 @@ print(gener)
 # Ahora que tenemos las 2 plantas unidas vamos a hacer lo que se llama un análisis de coherencia, dado que según la documentación kw_dia y kw_total están directamente relacionados con kw_dc y kw_ac.
 # Vamos a intentar replicar los datos de kw_dia y kw_total.
 
-gener2 = gener.copy()
-
-# Creamos una variable date para poder agregar por ella.
-
-gener2['date'] = gener2.fecha.dt.date
-print(gener2)
+# Lo hacemos con verificar_coherencia (planta_solar/coherencia.py), que agrega por planta, día e inverter en una sola pasada y sin copiar el dataset.
 
-# La suma por planta, date e inverter de kw_dc o de kw_ac debería coincidir con el máximo de kw_dia.
+# La suma por planta, día e inverter de kw_dc o de kw_ac debería coincidir con el máximo de kw_dia.
 
-gener2 = gener2.groupby(['planta','date','inverter_id']).agg({'kw_dc':sum,
-                                                              'kw_ac':sum,
-                                                              'kw_dia':max,
-                                                              'kw_total':max}).reset_index()
-print(gener2)
-
-# Ordenamos para poder analizar.
-
-gener2 = gener2.sort_values(['planta','inverter_id','date'])
-print(gener2)
+coherencia = coherencia_diaria(gener)
+print(coherencia)
 
 # Kw_dia no concuerda para nada ni con kw_dc ni con kw_ac.
 # Vamos a ver si concuerda con kw_total, para ello calculamos el incremento diario de kw_total que debería coincidir con el máximo de kw_dia del día anterior.
+# En vez de revisar las primeras filas de cada planta sacamos directamente los inverters y días en los que no coincide.
 
-gener2['lag1'] = gener2.groupby(['planta','inverter_id']).kw_total.shift(1)
-gener2['incremento'] = gener2.kw_total - gener2.lag1
-print(gener2)
-
-# Comprobamos en la planta 1.
-print(gener2[gener2.planta == 'p1'].head(50))
+violaciones = verificar_coherencia(gener)
+print(violaciones)
 
-# Comprobamos en la planta 2.
-print(gener2[gener2.planta == 'p2'].head(50))
+# Número de días incoherentes por planta.
+print(violaciones.groupby('planta').size())
 
 # CONCLUSIONES
 
@@ -429,7 +440,8 @@ print(gener2[gener2.planta == 'p2'].head(50))
 
 # UNIÓN DE LOS DATASETS DE MEDICIONES AMBIENTALES
 
-temper = pd.concat([p1w,p2w], axis = 'index')
+with etapa('concat temper', len(p1w) + len(p2w)) as e:
+    temper = e.salida(pd.concat([p1w,p2w], axis = 'index'))
 print(temper)
 
 # Vamos a renombrar ya las variables para hacerlas más descriptivas y usables.
@@ -437,38 +449,61 @@ print(temper)
 temper.columns = ['fecha','planta','sensor_id','t_ambiente','t_modulo','irradiacion']
 print(temper)
 
+# HUECOS EN LA MALLA DE 15 MINUTOS
+
+# En la calidad veíamos en los gráficos que algunos días tienen menos mediciones y que algunos inverters tienen menos lecturas que el resto.
+# Con detectar_huecos (planta_solar/huecos.py) sacamos exactamente qué lecturas faltan de cada inverter y sensor respecto a la malla de 15 minutos del período.
+
+huecos = detectar_huecos(gener, desde = gener.fecha.min(), hasta = gener.fecha.max())
+print(huecos)
+
+huecos_sensor = detectar_huecos(temper, clave = 'sensor_id', desde = temper.fecha.min(), hasta = temper.fecha.max())
+print(huecos_sensor)
+
+# Lecturas que faltan por inverter, de más a menos.
+
+print(huecos.groupby(['planta','inverter_id']).lecturas_faltantes.sum().sort_values(ascending = False))
+
+# Y los días con más lecturas que faltan.
+
+print(faltantes_por_dia(huecos).sort_values('lecturas_faltantes', ascending = False).head(10))
+
 # CREACIÓN DEL DATAMART ANALÍTICO
 
 # En este caso el campo clave es compuesto de fecha y planta y manda el dataset de generación, ya que el de temperatura solo nos aporta variables adicionales.
 
-df = pd.merge(left = gener, right = temper, how = 'left', on = ['fecha','planta'])
+# Un merge exacto por fecha y planta exige que el sensor tenga exactamente la misma marca de tiempo que cada inverter.
+# Además con muchos inverters por sensor la tabla intermedia del merge es muy grande.
+# Por eso integramos con un as-of join: a cada registro de generación le asignamos la medición del sensor de su planta más cercana en el tiempo, con una tolerancia de 15 minutos.
+# Está implementado en planta_solar/integracion.py
+
+df, no_emparejados = integrar(gener, temper, tolerancia = '15min')
 print(df)
 
 # Tras una integración siempre es conveniente comprobar si se han generado nulos.
 
 print(df.isna().sum())
 
-# Buscamos si los nulos cumplen algún patrón.
+# Los registros de generación sin ninguna medición ambiental a menos de 15 minutos no se eliminan, se quedan con nulos y los tenemos en el informe (registros).
+# El informe cuenta también los que han tomado la medición de otra marca de tiempo (aproximados): sus variables ambientales son de una lectura vecina.
 
-nulos = df[df.sensor_id.isna()]
-print(nulos)
+print(no_emparejados)
+print(no_emparejados[['registros','aproximados']].sum())
 
-# Se trata del día 3 de Junio a las 14:00, que por algún motivo no tiene datos de temperatura pero solo para 4 inverters de la planta 1.
-#Vamos a buscar en el dataset de temperatura si existe ese datetime.
+# En el merge exacto el caso era el día 3 de Junio a las 14:00, que por algún motivo no tenía datos de temperatura pero solo para 4 inverters de la planta 1.
+# Vamos a buscar en el dataset de temperatura si existe ese datetime.
 
 print(temper[temper.fecha.between('2020-06-03 13:30:00', '2020-06-03 14:30:00')])
 
-# Efectivamente vemos que falta ese tramo en ambas plantas. Pero sin embargo solo hay mediciones en esa hora en la planta 1, y solo en 4 inverters.
+# Efectivamente vemos que falta esa medición. Pero sin embargo solo hay mediciones de generación en esa hora en la planta 1, y solo en 4 inverters.
 
 # Por tanto habría dos soluciones:
 
-# - imputar esos datos para esos invertes
+# - imputar esos datos para esos inverters
 # - eliminar esos 4 registros
 
-# Dado que parece una franja de medición propia solo de 4 inverters de la planta 1 vamos a optar por eliminarlos.
-
-df.dropna(inplace = True)
-print(df)
+# El as-of join equivale a imputar con la medición más cercana, que con ventanas de 15 minutos es una aproximación razonable.
+# Y si no hay ninguna medición cercana preferimos conservar el registro de generación con nulos en las variables ambientales, ya que sus kw_dc y kw_ac siguen siendo válidos.
 
 # Por último vamos a pasar la fecha al index para poder usar toda la potencia de Pandas.
 
@@ -489,6 +524,19 @@ El inconveniente es que no es tan portable. No puedes abrirlo desde Excel por ej
 Puedes ponerle la extensión que quieras al archivo, aunque se suele usar la convencion .pickle
 Para guardar en pickle desde Pandas usamos df.to_pickle('ruta_en_disco')
 Y para cargar un pickle usamos pd.read_pickle('ruta_en_disco')
+
+El problema del pickle es que para usar cualquier parte del dataframe hay que cargarlo entero.
+Cuando tenemos muchas plantas y meses de datos es mejor un formato columnar como Parquet, que además conserva los tipos.
+Lo guardamos particionado por planta y mes, de forma que al cargar podemos pedir solo algunas columnas o un rango de fechas
+sin leer el resto del disco. Está implementado en planta_solar/datamart.py
+
+Además las variables ambientales (sensor_id, irradiacion, t_ambiente, t_modulo) son las mismas para todos los inverters de una planta en cada fecha,
+y en df están repetidas en los 22 inverters. Así que las guardamos aparte, una sola vez por planta y fecha (esquema en estrella):
+Datos/datamart con la generación y Datos/datamart_clima con el clima. Para volver a unirlas se usa una vista (ver planta_solar/clima.py).
 """
 
-df.to_pickle('Datos/df.pickle')
+guardar_estrella(df)
+
+# Con toda la flota no tiene sentido repetir estos pasos planta a planta.
+# planta_solar/paralelo.py ejecuta la carga, limpieza, validación e integración de cada planta en un proceso distinto y une los resultados al final.
+# Desde la línea de comandos, python -m planta_solar construir lo hace y guarda además df_dia, el cubo y el rollup que prepara analisis_planta_solar_variables.py.
@@ -133,6 +133,18 @@ import pandas as pd
 import matplotlib.pyplot as plt
 import seaborn as sns
 
+from planta_solar.agregacion import agregar_diario
+from planta_solar.alertas import detectar_dc_cero
+from planta_solar.calibracion import RATIO_NOMINAL, estimar_calibracion, guardar_calibracion
+from planta_solar.clima import cargar_vista
+from planta_solar.comparacion import clasificar
+from planta_solar.cubo import abrir_cubo
+from planta_solar.instrumentacion import etapa
+from planta_solar.modelo import ajustar_modelo, puntuar
+from planta_solar.monitor import monitorizar
+from planta_solar.rollup import cargar_rollup, perfil
+from planta_solar.sensores import intervalos, leer_sensores, marcar
+
 # %matplotlib inline # para que los gráficos aparezcan en Jupyter Notebook
 # %config IPCompleter.greedy=True # cuando pulsamos la tecla tabuladora que autocomplete
 
@@ -145,11 +157,36 @@ sns.set_style('darkgrid')
 
 # CARGA DE LOS DATOS
 
-df = pd.read_pickle('Datos/df.pickle')
+# La generación con las variables ambientales de su planta en cada fecha, y las variables ambientales solas, una vez por planta y fecha (ver planta_solar/clima.py)
+
+# Con PLANTA_SOLAR_TRAZA=traza.jsonl la carga, el dropna y cada agregación se miden como una etapa (ver planta_solar/instrumentacion.py)
+
+with etapa('carga vista') as e:
+    vista = cargar_vista()
+    df = e.salida(vista.unir())
+clima = vista.clima
+
+# El mismo datamart pivotado a medida x fecha x inverter, mapeado del disco, para los análisis por inverter
+
+with etapa('carga cubo'):
+    cubo = abrir_cubo()
+
+# Y el rollup por planta, día, hora e inverter (ver planta_solar/rollup.py), del que salen los perfiles horarios sin recorrer el datamart
+
+with etapa('carga rollup') as e:
+    rollup = e.salida(cargar_rollup())
 
 print(df)
 df.info()
 
+# planta e inverter_id vienen como categóricas, por eso al agrupar por ellas usamos observed=True.
+
+# En la integración conservamos los registros de generación sin medición ambiental cercana, que tienen nulos en irradiación y temperaturas.
+# Los gráficos de seaborn no admiten nulos cuando las fechas del index se repiten, así que para cruzar la generación con las variables ambientales usaremos solo los registros con medición.
+
+with etapa('dropna irradiacion', df) as e:
+    df_ambiente = e.salida(df.dropna(subset = ['irradiacion']))
+
 # ANÁLISIS E INSIGHTS
 
 # La primera palanca es la recepción de la energía solar.
@@ -157,14 +194,16 @@ df.info()
 # Tenemos 3 KPIs con los que medir esta palanca: irradiación que llega, temperatura ambiente y temperatura del módulo.
 # Estos KPIs se miden con un único sensor por planta, así que el dato es el mismo para todos los inverters.
 # Tenemos que entender cómo funcionan estas variables entre sí antes de pasar a ver cómo interactúan con el siguiente nivel.
-# Dado que da igual el inverter y solo necesitamos esas 3 variables vamos a crear un dataset más pequeño con solo un inverter de cada planta para trabajar sobre el.
+# Dado que da igual el inverter y solo necesitamos esas 3 variables trabajamos sobre la tabla de clima, que tiene un registro por planta y fecha.
+# A diferencia de quedarnos con un inverter de cada planta, incluye también las fechas en las que ese inverter no tiene lectura.
 
-recepcion = df.loc[(df.inverter_id == '1BY6WEcLGh8j5v7') | (df.inverter_id == 'q49J1IKaHRwDQnt'), 'planta':'t_modulo']
+recepcion = clima
 print(recepcion)
 
 # PREGUNTA: ¿Las dos plantas reciben la misma cantidad de energía?
 
-temp = recepcion.groupby('planta').agg({'irradiacion':sum,'t_ambiente':np.mean,'t_modulo':np.mean})
+with etapa('insights recepcion por planta', recepcion) as e:
+    temp = e.salida(recepcion.groupby('planta', observed=True).agg({'irradiacion':sum,'t_ambiente':np.mean,'t_modulo':np.mean}))
 print(temp)
 
 f, ax = plt.subplots(nrows=1, ncols=3, figsize = (18,5))
@@ -198,15 +237,45 @@ sns.pairplot(temp.reset_index(), hue = 'planta', height=3, plot_kws={'alpha': 0.
 # - Pero no tanto con la temperatura ambiente
 # - Por tanto una primera forma de identificar módulos defectuosos o sucios es localizar los que produzcan poco cuando la irradiación es alta
 
+# PREGUNTA: ¿Los sensores dan lecturas físicamente coherentes?
+# Irradiación de noche, temperatura del módulo que no corresponde a la irradiación, valores bloqueados y picos aislados, en todo el histórico de cada sensor.
+# Sobre las lecturas de los csv de los sensores y no sobre la tabla de clima, en la que las mediciones tomadas de otra marca de tiempo
+# aparecen como lecturas propias y tapan los huecos del sensor.
+
+sensores = leer_sensores()
+marcas = marcar(sensores)
+print(marcas.drop(columns=['planta','sensor_id','seguida']).groupby(marcas.sensor_id, observed=True).sum().T)
+
+marcados = intervalos(marcas)
+print(marcados.sort_values('lecturas', ascending=False).head(20))
+
+# Las rachas planas de la temperatura del módulo: a qué hora empiezan y terminan.
+
+planos = marcados[marcados.comprobacion == 'plano_t_modulo']
+print(planos.groupby([planos.planta, planos.inicio.dt.hour.rename('hora_inicio'), planos.fin.dt.hour.rename('hora_fin')], observed=True).size())
+
+# Y cómo se comportan las dos temperaturas en las lecturas sin irradiación.
+
+print(sensores[sensores.irradiacion == 0].groupby('planta', observed=True)[['t_ambiente','t_modulo']].agg(['min','max','std']))
+
+# CONCLUSIONES:
+
+# - Un sensor con muchas lecturas marcadas no debería usarse sin revisar para el modelo de DC esperada ni para las alertas
+# - Las marcas son rachas planas de la temperatura del módulo que empiezan al atardecer y terminan al amanecer.
+#   Sin irradiación t_modulo se queda en un único valor mientras t_ambiente sigue variando.
+#   Una posibilidad es que el sensor del módulo no mida fuera de las horas de sol y se registre un valor por defecto.
+#   Habría que confirmarlo con el mantenimiento antes de usar la temperatura del módulo nocturna
+
 # PREGUNTA: ¿Cómo se distribuye la irradiación y la temperatura a lo largo del día?
+# Es el equivalente a pd.crosstab(recepcion.hora, recepcion.planta, values = recepcion.irradiacion, aggfunc='mean') pero calculado sobre el rollup.
 
-temp = pd.crosstab(recepcion.hora,recepcion.planta,values = recepcion.irradiacion,aggfunc='mean')
+temp = perfil(rollup, 'irradiacion', por = ['hora','planta'])
 print(temp)
 
 plt.figure(figsize=(10,10))
 sns.heatmap(temp, annot=True, fmt=".2f");
 
-temp = pd.crosstab(recepcion.hora,recepcion.planta,values = recepcion.t_ambiente,aggfunc='mean')
+temp = perfil(rollup, 't_ambiente', por = ['hora','planta'])
 print(temp)
 
 plt.figure(figsize=(10,10))
@@ -222,14 +291,32 @@ sns.heatmap(temp, annot=True, fmt=".1f");
 # PREGUNTA: ¿Ambas plantas son igual de capaces de generar DC a partir de la irradiación?
 
 plt.figure(figsize = (12,8))
-sns.scatterplot(data = df, x = df.irradiacion, y = df.kw_dc);
+sns.scatterplot(data = df_ambiente, x = df_ambiente.irradiacion, y = df_ambiente.kw_dc);
 
 # Existen 2 patrones claramente diferentes. ¿Serán las plantas?
 
 plt.figure(figsize = (12,8))
-sns.scatterplot(data = df, x = df.irradiacion, y = df.kw_dc, hue = 'planta');
+sns.scatterplot(data = df_ambiente, x = df_ambiente.irradiacion, y = df_ambiente.kw_dc, hue = 'planta');
 
 # La planta número 2 produce muchos menos kw ante los mismos niveles de irradiación.
+
+# Lo cuantificamos con el modelo de DC esperada (ver planta_solar/modelo.py): kw_dc = a * irradiacion + b * irradiacion * (t_modulo - 25)
+# Primero un modelo por planta
+
+modelo_planta = ajustar_modelo(df, claves = ['planta'])
+print(modelo_planta)
+
+# Y uno por inverter, con el que puntuamos todas las lecturas: DC esperada, residuo y ratio de rendimiento (kw_dc / esperada)
+
+modelo = ajustar_modelo(df)
+puntuacion = puntuar(df, modelo)
+
+with etapa('insights rendimiento por inverter', puntuacion) as e:
+    rendimiento = e.salida(puntuacion.ratio_rendimiento.groupby([df.planta, df.inverter_id], observed = True).median().sort_values())
+print(rendimiento.head(10))
+
+# El coeficiente a de la planta 1 es unas 10 veces el de la planta 2, la misma proporción que veíamos en la relación entre dc y ac de la planta 1.
+# El ajuste solo usa las lecturas con DC, así que la diferencia no se debe a las paradas de los inverters de la planta 2.
 # Pero antes habíamos visto que la relación entre dc y ac en la planta 1 era rara.
 # Y también que los datos de dc y ac no cuadraban con los de kw_dia.
 
@@ -238,7 +325,7 @@ sns.scatterplot(data = df, x = df.irradiacion, y = df.kw_dc, hue = 'planta');
 # Vamos a ver la relación entre la irradiación y kw_dia a ver si nos da luz.
 
 plt.figure(figsize = (12,10))
-sns.scatterplot(data = df, x = df.irradiacion, y = df.kw_dia, hue = 'planta');
+sns.scatterplot(data = df_ambiente, x = df_ambiente.irradiacion, y = df_ambiente.kw_dia, hue = 'planta');
 
 # Es muy extraño. Parece que la relación es que a más irradiación menos kw generados. Lo cual no tiene sentido.
 # Incluso parece que los máximos de kw se producen en horas de irradiación cero.
@@ -250,7 +337,7 @@ sns.scatterplot(data = df, x = df.irradiacion, y = df.kw_dia, hue = 'planta');
 
 # Vamos a comprobarlo.
 
-df.groupby('hora')[['kw_dia']].mean().plot.bar();
+perfil(rollup, 'kw_dia', por = ['hora']).to_frame().plot.bar();
 
 # De nuevo algo no cuadra. Hay generación entre las 00 y las 06.
 # Y además a partir de las 18 comienza a decaer, lo cual no debería pasar si es un acumulado.
@@ -269,29 +356,15 @@ df.groupby('hora')[['kw_dia']].mean().plot.bar();
 
 # Podemos usar el df_dia para graficar la visión global de generación de DC durante el período de análisis.
 
-df_dia = df.groupby(['planta', 'inverter_id']).resample('D') \
-    .agg({'irradiacion': [min,np.mean,max],
-          't_ambiente': [min,np.mean,max],
-          't_modulo': [min,np.mean,max],
-          'kw_dc': [min,np.mean,max,sum],
-          'kw_ac': [min,np.mean,max,sum],
-          'eficiencia': [min,np.mean,max],
-          'kw_dia': max,
-          'kw_total': max})
+# Lo calculamos con agregar_diario (planta_solar/agregacion.py), que devuelve directamente las columnas aplanadas (kw_dc_sum, ...).
+
+df_dia = agregar_diario(df)
 
 print(df_dia)
 print(df.info())
 
 plt.figure(figsize = (10,8))
 
-# Esto devuelve los niveles en tuplas, que luego podemos unir con un list comprehension.
-# Vamos a revisar como devuelve los nombres de columnas to_flat_index()
-
-tuplas = df_dia.columns.to_flat_index()
-# Y unimos ambas partes del par con un guión bajo usando .join
-
-df_dia.columns = ["_".join(par) for par in tuplas]
-
 print(df_dia.info())
 
 sns.lineplot(data = df_dia.reset_index(), x = df_dia.reset_index().fecha, y = 'kw_dc_sum', hue = 'planta');
@@ -306,8 +379,11 @@ df['date'] = df.index.date
 print(df)
 
 # Creamos un dataframe temporal para analizar la generación de DC horaria en cada día en la planta 1.
+# Del cubo sacamos la DC de los inverters de la planta 1 ya en columnas y la sumamos en cada fecha, así solo agrupamos una serie por fecha y no todos los registros.
 
-dc_constante_p1 = df[df.planta == 'p1'].groupby(['planta','date','hora']).kw_dc.sum()
+with etapa('insights dc horaria p1') as e:
+    dc_p1 = cubo.seleccionar('p1').tabla('kw_dc').sum(axis = 1, min_count = 1).dropna()
+    dc_constante_p1 = e.salida(dc_p1.groupby([dc_p1.index.hour.rename('hora'), dc_p1.index.date]).sum())
 print(dc_constante_p1)
 
 # Vamos a pasar date a columnas, para poder respresentar cada columna (que son los dates) como una variable y por tanto como un gráfico independiente.
@@ -323,7 +399,9 @@ dc_constante_p1.unstack(level = 1).plot(subplots = True, layout = (17,2), sharex
 
 # Repetimos el análisis en la planta 2
 
-dc_constante_p2 = df[df.planta == 'p2'].groupby(['planta','date','hora']).kw_dc.sum()
+with etapa('insights dc horaria p2') as e:
+    dc_p2 = cubo.seleccionar('p2').tabla('kw_dc').sum(axis = 1, min_count = 1).dropna()
+    dc_constante_p2 = e.salida(dc_p2.groupby([dc_p2.index.hour.rename('hora'), dc_p2.index.date]).sum())
 print(dc_constante_p2)
 
 # Vamos a pasar date a columnas, para poder respresentar cada columna (que son los dates) como una variable y por tanto como un gráfico independiente.
@@ -344,7 +422,7 @@ sns.scatterplot(data = df, x = df.kw_dc, y = df.kw_ac, hue = df.planta);
 # De nuevo los patrones son clarísimos: la planta 2 transforma la corriente de forma mucho más eficiente.
 # Vamos a ampliar analizando la variable eficiencia que habíamos creado.
 
-temp = df.groupby(['planta','hora'],as_index = False).eficiencia.mean()
+temp = perfil(rollup, 'eficiencia', por = ['planta','hora']).stack().rename('eficiencia').reset_index()
 print(temp)
 
 sns.lineplot(data = temp, x = 'hora', y = 'eficiencia', hue = 'planta');
@@ -395,36 +473,56 @@ print(temp)
 
 # Empezamos por las variables numéricas.
 
-temp.groupby('kw_dc_cero')[['irradiacion','t_ambiente','t_modulo']].mean()
+with etapa('insights ambiente con dc cero', temp) as e:
+    ambiente_dc_cero = e.salida(temp.groupby('kw_dc_cero')[['irradiacion','t_ambiente','t_modulo']].mean())
+print(ambiente_dc_cero)
 
 # En la temperatura ambiente no hay mucha diferencia, pero en la del módulo y en la irradiación sí.
 # ¿Podría ser que si se calienta demasiado el módulo deje de generar DC?
 
 # Vamos a verlo comparando la temperatura del módulo con la generación de DC.
 
-sns.scatterplot(data = temp, x = 't_modulo', y = 'kw_dc',hue = 'kw_dc_cero');
+sns.scatterplot(data = temp.dropna(subset = ['t_modulo']), x = 't_modulo', y = 'kw_dc',hue = 'kw_dc_cero');
 
 # La hipótesis anterior no se confirma, ya que hay muchos casos de temperaturas altas donde se genera DC, y también de kw_dc igual a cero en casi todos los rangos de temperaturas.
 
 # Vamos a analizar ahora las categóricas, empezando por el inverter.
 
-temp.groupby('inverter_id').kw_dc_cero.mean().sort_values(ascending = False).plot.bar();
+temp.groupby('inverter_id', observed=True).kw_dc_cero.mean().sort_values(ascending = False).plot.bar();
 
 # Existe gran diferencia en el porcentaje de producción cero de DC por inverter.
 # Desde algunos que tienen menos del 5% hasta algunos que superan el 30%.
 
+# Este análisis lo hacemos a posteriori sobre todo el histórico. Para detectar el fallo según ocurre tenemos DetectorDCCero (planta_solar/alertas.py),
+# que procesa las lecturas una a una y alerta cuando un inverter lleva varias lecturas seguidas con DC cero mientras su planta tiene irradiación.
+# Si le pasamos el histórico como si llegara en tiempo real, los inverters con más alertas deberían ser los mismos del gráfico anterior.
+
+alertas = detectar_dc_cero(df)
+print(alertas.groupby(['planta','inverter_id'], observed = True).size().sort_values(ascending = False).head(10))
+
+# Otra forma de localizarlos sin rejillas de gráficos por inverter es comparar en cada momento cada inverter con la mediana de los de su planta
+# (ver planta_solar/comparacion.py). Los inverters con más momentos por debajo de su planta quedan los primeros del ranking.
+
+ranking_dc = clasificar(df, 'kw_dc')
+print(ranking_dc.head(10))
+print(ranking_dc[ranking_dc.bajo_rendimiento])
+
 # INSIGHT #4:: En la planta 2 existen varios inverters a los que no está llegando suficiente producción de DC, y por tanto cuyos módulos necesitan revisión.
 
 # Vamos a analizar los inverters desde el punto de vista de la eficiencia media para ver si hay "buenos y malos".
 
-temp[temp.kw_dc > 0].groupby(['inverter_id','date'],as_index = False).eficiencia.mean().boxplot(column = 'eficiencia', by = 'inverter_id', figsize = (14,10))
+temp[temp.kw_dc > 0].groupby(['inverter_id','date'],as_index = False, observed=True).eficiencia.mean().boxplot(column = 'eficiencia', by = 'inverter_id', figsize = (14,10))
 plt.xticks(rotation = 90);
 
 # INSIGHT #5:: Una vez descontando el problema de la no generación de DC, los inverters de la planta 2 sí funcionan bien y hacen bien el trabajo de transformación a AC.
 
 # Para terminar de analizar la eficiencia de los inverters podemos ver su rendimiento en cada uno de los días para ver si han posido existir problemas puntuales
 
-temp[temp.kw_dc > 0].groupby(['inverter_id','date']).eficiencia.mean().unstack(level = 0).plot(subplots = True, sharex=True, figsize=(20,40))
+# Con el cubo cada inverter ya es una columna: nos quedamos con la eficiencia de las lecturas con DC y hacemos la media de cada día.
+
+p2 = cubo.seleccionar('p2')
+eficiencia_p2 = p2.tabla('eficiencia').where(p2.tabla('kw_dc') > 0).between_time('08:00:00','15:00:00').droplevel('planta', axis = 1)
+eficiencia_p2.groupby(eficiencia_p2.index.date).mean().plot(subplots = True, sharex=True, figsize=(20,40))
 plt.xticks(rotation = 90);
 
 # Para tener un término de comparación vamos a repetir los análisis con la planta 1.
@@ -438,31 +536,65 @@ temp.eficiencia.plot.density();
 
 # Vemos que no, aquí todos los inverters tienen una eficiencia constante (aunque muy baja)
 
-temp.groupby(['inverter_id','date'],as_index = False).eficiencia.mean().boxplot(column = 'eficiencia', by = 'inverter_id', figsize = (14,10))
+temp.groupby(['inverter_id','date'],as_index = False, observed=True).eficiencia.mean().boxplot(column = 'eficiencia', by = 'inverter_id', figsize = (14,10))
 plt.xticks(rotation = 90);
 
 # Vemos que salvo días puntuales en algunos inverters en el resto la eficiencia es constante.
 # Vamos a revisar la eficiencia media diaria por cada inverter.
 
-temp.groupby(['inverter_id','date']).eficiencia.mean().unstack(level = 0).plot(subplots = True, sharex=True, figsize=(20,40))
+eficiencia_p1 = cubo.seleccionar('p1').tabla('eficiencia').between_time('08:00:00','15:00:00').droplevel('planta', axis = 1)
+eficiencia_p1.groupby(eficiencia_p1.index.date).mean().plot(subplots = True, sharex=True, figsize=(20,40))
 plt.xticks(rotation = 90);
 
 # En el análisis por inverter vemos de nuevo que todos los datos son constantes.
 # Vamos a comprobar que entonces no hay fallos en la generación de DC.
 
-temp.groupby('inverter_id').kw_dc_cero.mean().sort_values(ascending = False).plot.bar();
+temp.groupby('inverter_id', observed=True).kw_dc_cero.mean().sort_values(ascending = False).plot.bar();
 
 # Vemos que aunque hay algunos inverters que han tenido fallos su magnitud es inferior al 2% de las mediciones.
 # Por tanto la generación de DC en la planta 1 sí es correcta, y el fallo está en la transformación de DC a AC.
 
+# Para vigilar la eficiencia de forma continua tenemos MonitorEficiencia (planta_solar/monitor.py), que actualiza con cada lectura
+# la media, desviación y percentiles de una ventana móvil por inverter, y marca los inverters lejos de la eficiencia nominal o que derivan respecto a su referencia.
+# Pasándole el histórico, todos los inverters de la planta 1 deberían quedar fuera de rango por su ~10% de eficiencia.
+
+monitor, eventos = monitorizar(df)
+print(monitor.groupby('planta')[['fuera_de_rango','deriva']].sum())
+print(eventos)
+
+# PREGUNTA: ¿La baja eficiencia de la planta 1 se explica por una escala en kw_dc?
+# estimar_calibracion (planta_solar/calibracion.py) calcula la mediana del ratio DC / AC de cada inverter con irradiación alta
+# y la redondea a la potencia de 10 más cercana respecto al ratio de un inverter que funciona bien.
+# El redondeo es por diseño, así que el factor no demuestra nada: lo que hay que mirar es el ratio sin redondear.
+
+calibracion = estimar_calibracion(df)
+print(calibracion.groupby('planta')[['lecturas','factor_dc']].agg(['min','max']))
+
+# Ratio DC / AC de cada inverter sin redondear, y su escala respecto al de un inverter que funciona bien.
+
+print(calibracion.assign(escala = calibracion.ratio_dc_ac / RATIO_NOMINAL).groupby('planta')[['ratio_dc_ac','escala']].agg(['min','median','max']))
+
+guardar_calibracion(calibracion)
+
+# Cargando el datamart con la tabla de calibración kw_dc y eficiencia se corrigen al leerlas, sin modificar los datos guardados.
+
+calibrado = cargar_vista(columnas = ['planta','kw_dc','eficiencia'], calibracion = calibracion).unir()
+print(calibrado[calibrado.kw_dc > 0].groupby('planta', observed = True).eficiencia.describe())
+
 # CONCLUSIONES:
 
+# - Todos los inverters de la planta 1 tienen un ratio DC / AC sin redondear de unos 10,3 y los de la planta 2 de unos 1,03:
+#   la planta 1 está casi exactamente 10 veces por encima de la 2, con la misma dispersión entre inverters. Esa es la evidencia
+#   de una escala en kw_dc, no el factor 10, que sale del redondeo
+# - Suponiendo que es una escala, dividir kw_dc de la planta 1 por 10 deja su eficiencia al nivel de la de la planta 2
+# - Los comandos puntuar, ranking e informe de python -m planta_solar usan la tabla de calibración guardada
+
 """
 Tras un ananálisis de los datos podemos concluir que:
 
 - Existen graves problemas de calidad de datos. Se debería revisar en qué parte de la cadena se generan estos problemas, incluyendo los medidores de las plantas.
 - El hecho de que la generación en DC sea unas 10 veces superior en la planta 1 que en la 2, sumado al hecho de que la eficiencia en la planta 1 esté sobre el 10% nos lleva a pensar que el dato de generación de DC en la planta 1 puede estar artificialmente escalado por algún motivo.
-- Pero de momento a falta de comprobación vamos a asumir que los datos son correctos.
+- Lo que apoya esta hipótesis es que el ratio DC / AC sin redondear de todos los inverters de la planta 1 es casi exactamente 10 veces el de la planta 2 (unos 10,3 frente a 1,03). Bajo esa hipótesis la calibración de la escala de DC divide kw_dc de la planta 1 por 10, y su eficiencia queda similar a la de la planta 2. Los procesos de python -m planta_solar aplican esa corrección al leer los datos, pero solo se puede confirmar revisando los medidores de la planta 1.
 - La dos plantas han recibido altas cantidades de irradiación, no hemos localizado ningún problema en esta fase
 - Aunque la temperatura ambiente es superior en la planta 2 y sus módulos se calientan más que los de la planta 1 esto no parece tener un impacto significativo
 - La generación de DC de la planta 1 funciona bien, los módulos parecen llevar DC a los inverters.
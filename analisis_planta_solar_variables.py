@@ -128,11 +128,19 @@ Sobre los medidores y sensores:
 - ¿Son similares los datos entre ambas plantas?
 """
 
-import numpy as np
 import pandas as pd
 import matplotlib.pyplot as plt
 import seaborn as sns
 
+from planta_solar.agregacion import agregar_diario
+from planta_solar.cubo import guardar_cubo
+from planta_solar.clima import cargar_vista, guardar_estrella
+from planta_solar.datamart import RUTA_DATAMART_DIA, guardar_datamart
+from planta_solar.derivadas import ORDEN
+from planta_solar.instrumentacion import etapa
+from planta_solar.rollup import construir_rollup, guardar_rollup
+from planta_solar.tipos import compactar_tipos
+
 # %matplotlib inline # para que los gráficos aparezcan en Jupyter Notebook
 # %config IPCompleter.greedy=True # cuando pulsamos la tecla tabuladora que autocomplete
 
@@ -142,38 +150,36 @@ pd.options.display.float_format = '{:15.2f}'.format
 
 # CARGA DE LOS DATOS
 
-df = pd.read_pickle('Datos/df.pickle')
+# La generación y el clima están guardados por separado (ver planta_solar/clima.py). Aquí necesitamos las dos, así que las unimos.
+
+# Con PLANTA_SOLAR_TRAZA=traza.jsonl cada paso costoso se mide como una etapa (ver planta_solar/instrumentacion.py)
+
+with etapa('carga vista') as e:
+    df = e.salida(cargar_vista().unir())
 
 print(df)
 df.info()
 
 # CREACIÓN DE VARIABLES
 
-# Comenzamos por extraer los componentes de la fecha e incorporarlos como nuevas variables.
-
-def componentes_fecha(dataframe):
+# Las funciones de creación de variables están en planta_solar/derivadas.py, ya que también las usa la actualización incremental.
 
-    mes = dataframe.index.month
-    dia = dataframe.index.day
-    hora = dataframe.index.hour
-    minuto = dataframe.index.minute
-    
-    return(pd.DataFrame({'mes':mes, 'dia':dia, 'hora':hora, 'minuto':minuto}))
+# Comenzamos por extraer los componentes de la fecha e incorporarlos como nuevas variables.
+# La capa df.derivadas los calcula a partir del index y los añade como columnas sin copiar el resto del dataframe (componentes_fecha() obligaba a un concat con reset_index).
+# Además los memoriza, así que si volvemos a ejecutar sobre los mismos datos no se recalculan.
 
-df = pd.concat([df.reset_index(),componentes_fecha(df)], axis = 1).set_index('fecha')
+with etapa('variables fecha', df):
+    df.derivadas.anadir('mes', 'dia', 'hora', 'minuto')
 print(df)
 
 # Vamos a crear la variable eficiencia del inverter, que consiste en el porcentaje de DC que transforma a AC satisfactoriamente.
 # Pero se nos presenta una dificultad muy habitual en los ratios, que el denominador puede ser cero.
 # Si fuera el caso, al hacer el ratio nos devolvería un nulo.
 # En nuestro caso el denominador es DC, por tanto si la generación de DC fuera cero la de AC debería ser cero también.
-# Podemos corregir eso simplemente imputando los nulos que salgan por ceros.
+# Podemos corregir eso simplemente imputando los nulos que salgan por ceros, que es lo que hace eficiencia_inverter().
 
-def eficiencia_inverter(AC,DC):
-    temp = AC / DC * 100
-    return(temp.fillna(0))
-
-df['eficiencia'] = eficiencia_inverter(df.kw_ac, df.kw_dc)
+with etapa('variable eficiencia', df):
+    df.derivadas.anadir('eficiencia')
 
 # Comprobamos que no haya generado nulos.
 
@@ -193,54 +199,44 @@ df.eficiencia.plot.kde();
 # En este caso es muy importante no empezar a analizar por analizar, si no seguir el plan definido en el diseño del proyecto, ya que existe un orden muy claro en el proceso: factores ambientales --> kw_dc --> kw ac.
 # Así que vamos a reorganizar las columnas del df para que nos ayude a interpretar en este orden.
 
-orden = ['planta','mes','dia','hora','minuto','sensor_id','irradiacion','t_ambiente','t_modulo','inverter_id','kw_dc','kw_ac','eficiencia','kw_dia','kw_total']
-
-df = df[orden]
+df = df[ORDEN]
 print(df)
 
+# TIPOS COMPACTOS
+
+# Antes de seguir vamos a reducir la memoria que ocupa el dataframe.
+# Los identificadores pasan a categóricas, las medidas a float32 cuando no perdemos precisión y los componentes de la fecha a int8.
+
+df, ahorro = compactar_tipos(df)
+print(ahorro)
+
+# Desde aquí, al agrupar por planta o inverter_id usamos observed=True para que no aparezcan combinaciones que no existen.
+
 # DATAFRAME DIARIO
 
 # En nivel de análisis al que tenemos los datos es cada 15 minutos, lo cual puede ser demasiado desagregado para ciertos análisis.
-# Vamos a dejar construída una versión del dataframe agregada a nivel dia. Para ello usamos resample para hacer downgrading.
+# Vamos a dejar construída una versión del dataframe agregada a nivel dia.
 # Deberemos agregar por planta e inverter que son los campos clave de nuestro dataset.
-# Como tenemos variables a las que aplican diferentes funciones de agregación podemos usar el formato de diccionario de agg()
+# Como tenemos variables a las que aplican diferentes funciones de agregación las definimos en un diccionario (AGREGACIONES)
+# y las columnas se nombran uniendo el nombre de la variable y el de la función con un guión bajo (kw_dc_sum).
+# Está implementado en agregar_diario() de planta_solar/agregacion.py, que lo calcula en una sola pasada sobre los datos ordenados.
 
 print(df.head())
 
-df_dia = df.groupby(['planta', 'inverter_id']).resample('D') \
-    .agg({'irradiacion': [min,np.mean,max],
-          't_ambiente': [min,np.mean,max],
-          't_modulo': [min,np.mean,max],
-          'kw_dc': [min,np.mean,max,sum],
-          'kw_ac': [min,np.mean,max,sum],
-          'eficiencia': [min,np.mean,max],
-          'kw_dia': max,
-          'kw_total': max})
-
+df_dia = agregar_diario(df)
 print(df_dia)
 
-# Nos lo ha generado con multi índice, tanto en filas como en columnas.
-# Para quitar el de las columnas podemos aplanar los nombres con .to_flat_index(), que es un método relativamente reciente de Pandas.
-
-# https://pandas.pydata.org/docs/reference/api/pandas.MultiIndex.to_flat_index.html
-
-# Esto devuelve los niveles en tuplas, que luego podemos unir con un list comprehension.
-# Vamos a revisar como devuelve los nombres de columnas to_flat_index()
-
-tuplas = df_dia.columns.to_flat_index()
-print(tuplas)
+# Ya tenemos preparados nuestros datasets por hora y por día. Los guardamos.
 
-# Y unimos ambas partes del par con un guión bajo usando .join
+guardar_estrella(df)
+guardar_datamart(df_dia, RUTA_DATAMART_DIA)
 
-df_dia.columns = ["_".join(par) for par in tuplas]
-print(df_dia)
+# Y guardamos también el datamart ya pivotado como cubo medida x fecha x inverter (ver planta_solar/cubo.py),
+# para los análisis por inverter que en formato largo necesitan groupby().unstack().
 
-# Ahora tenemos que pasar planta e inverter_id a columnas, y dejar la fecha como el índice.
+guardar_cubo(df)
 
-df_dia = df_dia.reset_index().set_index('fecha')
-print(df_dia)
-
-# Ya tenemos preparados nuestros datasets por hora y por día. Los guardamos.
+# Por último el rollup por planta, día, hora e inverter con suma, número de valores, mínimo y máximo de cada medida (ver planta_solar/rollup.py),
+# del que salen los perfiles horarios de los insights.
 
-df.to_pickle('Datos/df.pickle')
-df_dia.to_pickle('Datos/df_dia.pickle')
+guardar_rollup(construir_rollup(df))
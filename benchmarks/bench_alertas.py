@@ -0,0 +1,38 @@
+"""BENCHMARK: DETECTOR DE DC CERO EN TIEMPO REAL
+
+Mide cuántas lecturas por segundo procesa DetectorDCCero en un único núcleo, pasándole una a una las lecturas de un datamart sintético
+en el que un 10% de las lecturas con irradiación tienen DC cero.
+
+python -m benchmarks.bench_alertas --plantas 2 --inversores 22 --dias 34
+"""
+
+import argparse
+
+import numpy as np
+
+from benchmarks.comun import datamart_sintetico, imprimir_tabla, medir
+from planta_solar.alertas import detectar_dc_cero
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--plantas', type=int, default=2)
+    parser.add_argument('--inversores', type=int, default=22)
+    parser.add_argument('--dias', type=int, default=34)
+    args = parser.parse_args()
+
+    df = datamart_sintetico(args.plantas, args.inversores, args.dias, categoricas=True)
+
+    fallos = np.random.default_rng(0).random(len(df)) < 0.1
+    df.loc[fallos & (df.irradiacion > 0).to_numpy(), 'kw_dc'] = 0
+
+    alertas, medida = medir(detectar_dc_cero, df)
+
+    imprimir_tabla([{'lecturas': len(df),
+                     'alertas': len(alertas),
+                     'segundos': medida['segundos'],
+                     'lecturas_s': len(df) / medida['segundos']}])
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,80 @@
+"""BENCHMARK: CALIBRACIÓN DE LA ESCALA DE DC AL LEER FRENTE A REESCRIBIR EL DATAMART
+
+Sobre un datamart sintético con tipos compactos (por defecto 5 plantas de 100 inverters durante un año, 17,5 millones de registros)
+en el que kw_dc de la planta p1 está multiplicado por 10, como en los datos reales de la planta 1:
+
+- Estima la tabla de calibración y comprueba que p1 sale con factor 10 y el resto con factor 1
+- Cargar las columnas del modelo de DC esperada sin calibrar, calibradas al leer (cargar_vista(calibracion=...)),
+  y calibradas corrigiendo el dataframe cargado con assign (que copia todas las columnas, como haría corregir el datamart antes de guardarlo)
+
+python -m benchmarks.bench_calibracion --plantas 5 --inversores 100 --dias 365
+"""
+
+import argparse
+import os
+import tempfile
+
+import numpy as np
+
+from benchmarks.comun import datamart_sintetico, imprimir_tabla, medir, medir_aislado
+from planta_solar.calibracion import cargar_calibracion, estimar_calibracion, factores_registro, guardar_calibracion
+from planta_solar.clima import cargar_vista, guardar_estrella
+from planta_solar.tipos import compactar_tipos
+
+COLUMNAS_MODELO = ['planta', 'inverter_id', 'irradiacion', 't_modulo', 'kw_dc']
+
+
+def sin_calibrar(ruta, ruta_clima, ruta_calibracion):
+    cargar_vista(ruta, ruta_clima, columnas=COLUMNAS_MODELO).unir()
+
+
+def calibrada_al_leer(ruta, ruta_clima, ruta_calibracion):
+    cargar_vista(ruta, ruta_clima, columnas=COLUMNAS_MODELO, calibracion=cargar_calibracion(ruta_calibracion)).unir()
+
+
+def calibrada_con_copia(ruta, ruta_clima, ruta_calibracion):
+    df = cargar_vista(ruta, ruta_clima, columnas=COLUMNAS_MODELO).unir()
+    df.assign(kw_dc=df.kw_dc.to_numpy() / factores_registro(df, cargar_calibracion(ruta_calibracion)).astype('float32'))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--plantas', type=int, default=5)
+    parser.add_argument('--inversores', type=int, default=100)
+    parser.add_argument('--dias', type=int, default=365)
+    args = parser.parse_args()
+
+    df = datamart_sintetico(args.plantas, args.inversores, args.dias, categoricas=True)
+    escalada = (df.planta == 'p1').to_numpy()
+    df['kw_dc'] = np.where(escalada, df.kw_dc.to_numpy() * 10, df.kw_dc.to_numpy())
+    df['eficiencia'] = df.kw_ac / df.kw_dc * 100
+    df, _ = compactar_tipos(df)
+    print(f'Datamart sintético: {len(df):,} registros')
+
+    calibracion, estimacion = medir(estimar_calibracion, df)
+    print(calibracion.groupby('planta').factor_dc.agg(['min', 'max']))
+
+    with tempfile.TemporaryDirectory() as carpeta:
+        ruta, ruta_clima = os.path.join(carpeta, 'datamart'), os.path.join(carpeta, 'datamart_clima')
+        ruta_calibracion = os.path.join(carpeta, 'calibracion.csv')
+
+        guardar_estrella(df, ruta, ruta_clima)
+        guardar_calibracion(calibracion, ruta_calibracion)
+        del df
+
+        casos = [('sin calibrar', sin_calibrar),
+                 ('calibrada al leer', calibrada_al_leer),
+                 ('calibrada con copia', calibrada_con_copia)]
+
+        resultados = [{'caso': 'estimar_calibracion', 'segundos': estimacion['segundos'], 'incremento_rss_mb': estimacion['incremento_rss_mb']}]
+        for nombre, funcion in casos:
+            medida = medir_aislado(funcion, ruta, ruta_clima, ruta_calibracion)
+            resultados.append({'caso': nombre,
+                               'segundos': medida['segundos'],
+                               'incremento_rss_mb': medida['incremento_rss_mb']})
+
+    imprimir_tabla(resultados)
+
+
+if __name__ == '__main__':
+    main()
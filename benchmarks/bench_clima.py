@@ -0,0 +1,105 @@
+"""BENCHMARK: DATAMART CON EL CLIMA REPETIDO FRENTE AL ESQUEMA EN ESTRELLA
+
+Compara, sobre un datamart sintético con tipos compactos (por defecto 5 plantas de 100 inverters durante un año, 17,5 millones de registros):
+
+- La memoria de las columnas del clima repetidas en cada inverter frente a la tabla de clima (un registro por planta y fecha)
+- Cargar la generación con la irradiación y la temperatura del módulo (lo que necesita el modelo de DC esperada):
+  desde el datamart con el clima repetido o desde las dos tablas unidas con cargar_vista().unir()
+- Cargar solo el clima: filtrando un inverter de cada planta en el datamart (como hacía analisis_planta_solar_insights.py) o leyendo la tabla de clima
+
+python -m benchmarks.bench_clima --plantas 5 --inversores 100 --dias 365
+"""
+
+import argparse
+import os
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.comun import datamart_sintetico, imprimir_tabla, medir, medir_aislado
+from planta_solar.clima import COLUMNAS_CLIMA, Vista, cargar_clima, cargar_vista, guardar_estrella, separar_clima
+from planta_solar.datamart import cargar_datamart, guardar_datamart
+from planta_solar.tipos import compactar_tipos
+
+COLUMNAS_MODELO = ['planta', 'inverter_id', 'irradiacion', 't_modulo', 'kw_dc']
+
+
+def clima_por_planta(df, inversores):
+    """En el datamart sintético cada inverter tiene su propia irradiación: le asignamos a todos la del primer inverter de su planta.
+
+    Los registros vienen ordenados por fecha y, dentro de cada fecha, por inverter, así que cada fecha es una fila de una matriz fecha x inverter.
+    """
+
+    for columna in ['irradiacion', 't_ambiente', 't_modulo']:
+        valores = df[columna].to_numpy().reshape(-1, df.inverter_id.nunique())
+        df[columna] = np.repeat(valores[:, ::inversores], inversores, axis=1).ravel()
+
+    return df
+
+
+def repetido_modelo(ruta):
+    cargar_datamart(ruta, columnas=COLUMNAS_MODELO)
+
+
+def estrella_modelo(ruta, ruta_clima):
+    cargar_vista(ruta, ruta_clima, columnas=COLUMNAS_MODELO).unir()
+
+
+def repetido_clima(ruta):
+    df = cargar_datamart(ruta, columnas=['planta', 'inverter_id'] + COLUMNAS_CLIMA)
+    primeros = df.groupby('planta', observed=True).inverter_id.first()
+    df[df.inverter_id.isin(primeros)]
+
+
+def estrella_clima(ruta_clima):
+    cargar_clima(ruta_clima)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--plantas', type=int, default=5)
+    parser.add_argument('--inversores', type=int, default=100)
+    parser.add_argument('--dias', type=int, default=365)
+    args = parser.parse_args()
+
+    df = clima_por_planta(datamart_sintetico(args.plantas, args.inversores, args.dias, categoricas=True), args.inversores)
+    df, _ = compactar_tipos(df)
+    print(f'Datamart sintético: {len(df):,} registros')
+
+    (hechos, clima), separacion = medir(separar_clima, df)
+    repetido_mb = df[COLUMNAS_CLIMA].memory_usage(deep=True).sum() / 1024 ** 2
+    clima_mb = clima.memory_usage(deep=True).sum() / 1024 ** 2
+    print(f'Clima repetido en cada registro: {repetido_mb:,.1f} MB. Tabla de clima: {len(clima):,} registros, {clima_mb:,.1f} MB')
+
+    unido, union = medir(Vista(hechos, clima).unir, list(df.columns))
+    pd.testing.assert_frame_equal(unido, df)
+    print('Vista unida igual al datamart')
+    del unido, hechos, clima
+
+    with tempfile.TemporaryDirectory() as carpeta:
+        ruta_repetido = os.path.join(carpeta, 'repetido')
+        ruta_hechos, ruta_clima = os.path.join(carpeta, 'datamart'), os.path.join(carpeta, 'datamart_clima')
+
+        guardar_datamart(df, ruta_repetido)
+        guardar_estrella(df, ruta_hechos, ruta_clima)
+        del df
+
+        casos = [('generación + clima: datamart repetido', repetido_modelo, (ruta_repetido,)),
+                 ('generación + clima: cargar_vista().unir()', estrella_modelo, (ruta_hechos, ruta_clima)),
+                 ('solo clima: un inverter por planta', repetido_clima, (ruta_repetido,)),
+                 ('solo clima: tabla de clima', estrella_clima, (ruta_clima,))]
+
+        resultados = [{'caso': 'separar_clima', 'segundos': separacion['segundos'], 'incremento_rss_mb': separacion['incremento_rss_mb']},
+                      {'caso': 'Vista.unir (todas las columnas)', 'segundos': union['segundos'], 'incremento_rss_mb': union['incremento_rss_mb']}]
+        for nombre, funcion, rutas in casos:
+            medida = medir_aislado(funcion, *rutas)
+            resultados.append({'caso': nombre,
+                               'segundos': medida['segundos'],
+                               'incremento_rss_mb': medida['incremento_rss_mb']})
+
+    imprimir_tabla(resultados)
+
+
+if __name__ == '__main__':
+    main()
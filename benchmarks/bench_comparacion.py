@@ -0,0 +1,63 @@
+"""BENCHMARK: MEDIANA DE LA PLANTA EN CADA FECHA
+
+Compara el tiempo y el incremento de memoria de:
+
+- groupby([fecha, planta]).kw_dc.transform('median') y la desviación de cada lectura, agrupando por fecha
+- comparar, con la mediana de cada planta calculada para todas las fechas a la vez sobre la matriz fecha x inverter
+
+sobre un datamart sintético con tipos compactos (por defecto 5 plantas de 100 inverters durante un año, 17,5 millones de registros).
+Además comprueba que ambos dan la misma mediana y desviación.
+
+python -m benchmarks.bench_comparacion --plantas 5 --inversores 100 --dias 365
+"""
+
+import argparse
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.comun import datamart_sintetico, imprimir_tabla, medir
+from planta_solar.comparacion import FRACCION_MINIMA, clasificar, comparar
+from planta_solar.tipos import compactar_tipos
+
+
+def groupby_mediana(df, fraccion_minima=FRACCION_MINIMA):
+    mediana = df.groupby([df.index, df.planta], observed=True).kw_dc.transform('median')
+    maxima = mediana.groupby(df.planta, observed=True).transform('max')
+    mediana = mediana.where(mediana >= fraccion_minima * maxima)
+
+    return pd.DataFrame({'mediana_planta': mediana, 'desviacion': df.kw_dc / mediana - 1})
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--plantas', type=int, default=5)
+    parser.add_argument('--inversores', type=int, default=100)
+    parser.add_argument('--dias', type=int, default=365)
+    args = parser.parse_args()
+
+    df, _ = compactar_tipos(datamart_sintetico(args.plantas, args.inversores, args.dias, categoricas=True))
+    print(f'Datamart sintético: {len(df):,} registros')
+
+    referencia, groupby = medir(groupby_mediana, df)
+    comparacion, matriz = medir(comparar, df)
+    ranking, clasificacion = medir(clasificar, df)
+
+    for columna in comparacion.columns:
+        assert np.allclose(comparacion[columna].to_numpy(), referencia[columna].to_numpy(dtype='float64'), rtol=1e-5, atol=1e-5, equal_nan=True)
+    print(f'Resultados iguales: {comparacion.desviacion.notna().sum():,} lecturas comparadas')
+
+    resultados = []
+    for nombre, medida in [('groupby + transform(median)', groupby), ('comparar (matriz)', matriz),
+                           (f'clasificar ({len(ranking)} inverters)', clasificacion)]:
+        resultados.append({'caso': nombre,
+                           'segundos': medida['segundos'],
+                           'incremento_rss_mb': medida['incremento_rss_mb'],
+                           'registros_s': len(df) / medida['segundos']})
+
+    imprimir_tabla(resultados)
+    print(f'Aceleración: {resultados[0]["segundos"] / resultados[1]["segundos"]:.1f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,87 @@
+"""BENCHMARK: PIVOTAR EL DATAMART FRENTE AL CUBO EN DISCO
+
+Compara el tiempo y el incremento de memoria de obtener la DC de cada inverter en formato ancho (fecha x inverter), como hacen los análisis por inverter:
+
+- Desde el datamart Parquet: cargar_datamart con proyección y filtros y pivotar con set_index().unstack()
+- Desde el cubo: abrir_cubo, seleccionar la planta y el período (vistas) y tabla('kw_dc')
+
+para toda la flota y para una planta durante una semana,
+sobre un datamart sintético (por defecto 5 plantas de 100 inverters durante un año, 17,5 millones de registros).
+
+python -m benchmarks.bench_cubo --plantas 5 --inversores 100 --dias 365
+"""
+
+import argparse
+import os
+import tempfile
+
+import numpy as np
+
+from benchmarks.comun import datamart_sintetico, imprimir_tabla, medir, medir_aislado
+from planta_solar.cubo import abrir_cubo, guardar_cubo
+from planta_solar.datamart import cargar_datamart, guardar_datamart
+from planta_solar.tipos import compactar_tipos
+
+SEMANA = ('2020-06-01', '2020-06-07')
+
+
+def pivotar(df):
+    return df.set_index(['planta', 'inverter_id'], append=True).kw_dc.unstack(['planta', 'inverter_id'])
+
+
+def datamart_flota(ruta):
+    tabla = pivotar(cargar_datamart(ruta, columnas=['planta', 'inverter_id', 'kw_dc']))
+    np.nansum(tabla.to_numpy())
+
+
+def cubo_flota(ruta):
+    tabla = abrir_cubo(ruta).tabla('kw_dc')
+    np.nansum(tabla.to_numpy())
+
+
+def datamart_semana(ruta):
+    tabla = pivotar(cargar_datamart(ruta, columnas=['planta', 'inverter_id', 'kw_dc'], desde=SEMANA[0], hasta=SEMANA[1], plantas=['p1']))
+    np.nansum(tabla.to_numpy())
+
+
+def cubo_semana(ruta):
+    tabla = abrir_cubo(ruta).seleccionar('p1').periodo(*SEMANA).tabla('kw_dc')
+    np.nansum(tabla.to_numpy())
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--plantas', type=int, default=5)
+    parser.add_argument('--inversores', type=int, default=100)
+    parser.add_argument('--dias', type=int, default=365)
+    args = parser.parse_args()
+
+    df, _ = compactar_tipos(datamart_sintetico(args.plantas, args.inversores, args.dias, categoricas=True))
+    print(f'Datamart sintético: {len(df):,} registros')
+
+    with tempfile.TemporaryDirectory() as carpeta:
+        ruta_datamart = os.path.join(carpeta, 'datamart')
+        ruta_cubo = os.path.join(carpeta, 'cubo')
+
+        guardar_datamart(df.sort_values('planta', kind='stable'), ruta_datamart)
+        cubo, construccion = medir(guardar_cubo, df, ruta_cubo)
+        print(f'{cubo}: construido en {construccion["segundos"]:.1f} s, {cubo.valores.nbytes / 1024 ** 2:,.0f} MB en disco')
+        del df, cubo
+
+        casos = [('datamart + unstack (flota)', datamart_flota, ruta_datamart),
+                 ('cubo (flota)', cubo_flota, ruta_cubo),
+                 ('datamart + unstack (p1, 1 semana)', datamart_semana, ruta_datamart),
+                 ('cubo (p1, 1 semana)', cubo_semana, ruta_cubo)]
+
+        resultados = []
+        for nombre, funcion, ruta in casos:
+            medida = medir_aislado(funcion, ruta)
+            resultados.append({'caso': nombre,
+                               'segundos': medida['segundos'],
+                               'incremento_rss_mb': medida['incremento_rss_mb']})
+
+    imprimir_tabla(resultados)
+
+
+if __name__ == '__main__':
+    main()
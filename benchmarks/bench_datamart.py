@@ -0,0 +1,82 @@
+"""BENCHMARK: PICKLE FRENTE AL DATAMART PARQUET
+
+Compara el tiempo de carga y el pico de memoria de:
+
+- pd.read_pickle del datamart completo (lo que hacían los scripts)
+- cargar_datamart completo
+- cargar_datamart con proyección de las columnas de recepción (irradiacion, t_ambiente, t_modulo)
+- cargar_datamart con proyección y el rango loc['2020-06-01':'2020-06-05']
+
+python -m benchmarks.bench_datamart --plantas 10 --inversores 22 --dias 34
+"""
+
+import argparse
+import os
+import tempfile
+
+import pandas as pd
+
+from benchmarks.comun import datamart_sintetico, imprimir_tabla, medir_aislado
+from planta_solar.datamart import cargar_datamart, guardar_datamart
+
+RECEPCION = ['irradiacion', 't_ambiente', 't_modulo']
+
+
+def pickle_completo(ruta):
+    pd.read_pickle(ruta)
+
+
+def pickle_recepcion_rango(ruta):
+    # Con pickle hay que cargarlo todo y después seleccionar
+    df = pd.read_pickle(ruta)
+    df.loc['2020-06-01':'2020-06-05', RECEPCION]
+
+
+def parquet_completo(ruta):
+    cargar_datamart(ruta)
+
+
+def parquet_recepcion(ruta):
+    cargar_datamart(ruta, columnas=RECEPCION)
+
+
+def parquet_recepcion_rango(ruta):
+    cargar_datamart(ruta, columnas=RECEPCION, desde='2020-06-01', hasta='2020-06-05')
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--plantas', type=int, default=10)
+    parser.add_argument('--inversores', type=int, default=22)
+    parser.add_argument('--dias', type=int, default=34)
+    args = parser.parse_args()
+
+    df = datamart_sintetico(args.plantas, args.inversores, args.dias)
+    print(f'Datamart sintético: {len(df):,} registros')
+
+    with tempfile.TemporaryDirectory() as carpeta:
+        ruta_pickle = os.path.join(carpeta, 'df.pickle')
+        ruta_parquet = os.path.join(carpeta, 'datamart')
+
+        df.to_pickle(ruta_pickle)
+        guardar_datamart(df, ruta_parquet)
+        del df
+
+        casos = [('pickle completo', pickle_completo, ruta_pickle),
+                 ('pickle + recepción + rango', pickle_recepcion_rango, ruta_pickle),
+                 ('parquet completo', parquet_completo, ruta_parquet),
+                 ('parquet recepción', parquet_recepcion, ruta_parquet),
+                 ('parquet recepción + rango', parquet_recepcion_rango, ruta_parquet)]
+
+        resultados = []
+        for nombre, funcion, ruta in casos:
+            medida = medir_aislado(funcion, ruta)
+            resultados.append({'caso': nombre,
+                               'segundos': medida['segundos'],
+                               'incremento_rss_mb': medida['incremento_rss_mb']})
+
+    imprimir_tabla(resultados)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,128 @@
+"""BENCHMARK: ESCALADO DEL PROCESO CON EL TAMAÑO DE LA FLOTA
+
+Genera flotas sintéticas de distintos tamaños (benchmarks/flota.py) y mide cada etapa del proceso sobre cada una,
+con el reloj, la CPU, el pico de memoria y el rendimiento en registros de generación por segundo:
+
+- carga: lectura por lotes ya limpia de la generación y los sensores de todas las plantas (leer_fuentes)
+- integracion: as-of join de la generación con los sensores (integrar)
+- componentes_fecha y eficiencia_inverter: las variables derivadas de analisis_planta_solar_variables.py
+- df_dia: agregación diaria por planta e inverter (agregar_diario)
+- insights: las agregaciones de analisis_planta_solar_insights.py (energía por planta, DC diaria de cada inverter,
+  irradiación media por hora y planta, eficiencia media diaria de cada inverter)
+
+Cada tamaño se mide en un proceso nuevo, para que el pico de memoria de uno no contamine el siguiente.
+
+python -m benchmarks.bench_escalado --plantas 2 8 32 --inversores 22 --dias 34
+"""
+
+import argparse
+import multiprocessing
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from benchmarks.comun import imprimir_tabla, medir
+from benchmarks.flota import generar_flota, usar_flota
+from planta_solar.agregacion import agregar_diario
+from planta_solar.derivadas import componentes_fecha, eficiencia_inverter
+from planta_solar.incremental import fuentes_de_tipo
+from planta_solar.ingesta import leer_fuentes
+from planta_solar.integracion import integrar
+
+
+def cargar():
+    gener = pd.concat(leer_fuentes(fuentes_de_tipo('generacion')), ignore_index=True)
+    temper = pd.concat(leer_fuentes(fuentes_de_tipo('sensor')), ignore_index=True)
+
+    return gener, temper
+
+
+def integrar_indexado(gener, temper):
+    df, _ = integrar(gener, temper)
+
+    return df.set_index('fecha')
+
+
+def agregaciones_insights(df):
+    df.groupby('planta', observed=True).agg({'irradiacion': 'sum', 't_ambiente': 'mean', 't_modulo': 'mean'})
+    df.groupby(['planta', 'inverter_id', df.index.date], observed=True).kw_dc.sum().unstack(['planta', 'inverter_id'])
+    pd.crosstab(df.index.hour, df.planta, values=df.irradiacion, aggfunc='mean')
+
+    temp = df[df.kw_dc > 0]
+    temp.groupby(['inverter_id', temp.index.date], observed=True).eficiencia.mean()
+
+
+def etapas(carpeta, plantas):
+    """Ejecuta el proceso sobre la flota de carpeta y devuelve un registro por etapa."""
+
+    usar_flota(carpeta, plantas)
+    resultados = []
+
+    def etapa(nombre, funcion, *args):
+        resultado, medida = medir(funcion, *args)
+        resultados.append({'etapa': nombre, **medida})
+        return resultado
+
+    gener, temper = etapa('carga', cargar)
+    df = etapa('integracion', integrar_indexado, gener, temper)
+    del gener, temper
+
+    fecha = etapa('componentes_fecha', componentes_fecha, df)
+    df['hora'] = fecha.hora.to_numpy()
+    df['eficiencia'] = etapa('eficiencia_inverter', eficiencia_inverter, df.kw_ac, df.kw_dc)
+
+    etapa('df_dia', agregar_diario, df)
+    etapa('insights', agregaciones_insights, df)
+
+    for resultado in resultados:
+        resultado['registros'] = len(df)
+
+    return resultados
+
+
+def medir_escala(carpeta, plantas):
+    """etapas() en un proceso nuevo."""
+
+    contexto = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=1, mp_context=contexto) as pool:
+        return pool.submit(etapas, carpeta, plantas).result()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--plantas', type=int, nargs='+', default=[2, 8, 32], help='número de plantas de cada punto de la escala')
+    parser.add_argument('--inversores', type=int, default=22)
+    parser.add_argument('--dias', type=int, default=34)
+    args = parser.parse_args()
+
+    resultados = []
+    for plantas in args.plantas:
+        with tempfile.TemporaryDirectory() as carpeta:
+            inicio = time.perf_counter()
+            generar_flota(carpeta, plantas, args.inversores, args.dias)
+            print(f'{plantas} plantas generadas en {time.perf_counter() - inicio:.1f} s')
+
+            for resultado in medir_escala(carpeta, plantas):
+                resultados.append({'plantas': plantas,
+                                   'registros': resultado['registros'],
+                                   'etapa': resultado['etapa'],
+                                   'segundos': resultado['segundos'],
+                                   'cpu_segundos': resultado['cpu_segundos'],
+                                   'registros_s': resultado['registros'] / resultado['segundos'],
+                                   'pico_rss_mb': resultado['pico_rss_mb'],
+                                   'incremento_rss_mb': resultado['incremento_rss_mb']})
+
+    imprimir_tabla(resultados)
+
+    # Tiempo por registro de cada etapa en cada punto de la escala: si es constante la etapa escala linealmente
+
+    tabla = pd.DataFrame(resultados)
+    print()
+    print((tabla.segundos / tabla.registros * 1e6).groupby([tabla.etapa, tabla.plantas], sort=False).first()
+          .unstack('plantas').round(3).rename_axis(columns='microsegundos por registro, plantas'))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,54 @@
+"""BENCHMARK: CONVERSIÓN DE DATE_TIME
+
+Compara el rendimiento (registros por segundo) de:
+
+- pd.to_datetime como en la calidad de datos (dayfirst=True en la generación de la planta 1, inferencia en el resto)
+- convertir_fechas con el formato exacto registrado en FUENTES
+
+Los textos se repiten una vez por inverter en cada ventana de 15 minutos, igual que en los ficheros de generación.
+
+python -m benchmarks.bench_fechas --inversores 22 --dias 365
+"""
+
+import argparse
+
+import pandas as pd
+
+from benchmarks.comun import imprimir_tabla, medir
+from planta_solar.fechas import convertir_fechas
+from planta_solar.ingesta import FUENTES
+
+
+def textos_fecha(formato, inversores, dias):
+    fechas = pd.date_range('2020-05-15', periods=dias * 96, freq='15min')
+    return pd.Series(fechas.strftime(formato)).repeat(inversores).reset_index(drop=True)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--inversores', type=int, default=22)
+    parser.add_argument('--dias', type=int, default=365)
+    args = parser.parse_args()
+
+    resultados = []
+    for fuente, config in FUENTES.items():
+        inversores = args.inversores if config['tipo'] == 'generacion' else 1
+        textos = textos_fecha(config['formato_fecha'], inversores, args.dias)
+
+        dayfirst = config['formato_fecha'].startswith('%d')
+        casos = [('pd.to_datetime', lambda: pd.to_datetime(textos, dayfirst=dayfirst)),
+                 ('convertir_fechas', lambda: convertir_fechas(textos, config['formato_fecha']))]
+
+        for nombre, funcion in casos:
+            _, medida = medir(funcion)
+            resultados.append({'fuente': fuente,
+                               'metodo': nombre,
+                               'registros': len(textos),
+                               'segundos': medida['segundos'],
+                               'registros_s': len(textos) / medida['segundos']})
+
+    imprimir_tabla(resultados)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,75 @@
+"""BENCHMARK: INFORME DE LA FLOTA EN FICHEROS
+
+Mide el tiempo de generar_informe sobre una flota sintética (por defecto 40 plantas de 22 inverters durante 34 días, como las plantas reales),
+con el cubo y el rollup guardados en una carpeta temporal, y el de dibujar las lecturas de una planta como scatter frente a hexbin.
+
+python -m benchmarks.bench_informe --plantas 40 --inversores 22 --dias 34 --procesos 4
+"""
+
+import argparse
+import os
+import tempfile
+
+from benchmarks.comun import datamart_sintetico, imprimir_tabla, medir
+from planta_solar.cubo import abrir_cubo, guardar_cubo
+from planta_solar.informe import generar_informe, hexbin, nueva_figura
+from planta_solar.rollup import construir_rollup, guardar_rollup
+from planta_solar.tipos import compactar_tipos
+
+
+def dibujar(cubo, carpeta, tipo):
+    """Irradiación frente a DC de todas las lecturas de la planta, como scatter o como hexbin."""
+
+    kw_dc = cubo.medida('kw_dc').astype('float64').ravel()
+    irradiacion = cubo.medida('irradiacion').astype('float64').ravel()
+
+    figura, ejes = nueva_figura()
+    if tipo == 'scatter':
+        ejes[0].scatter(irradiacion, kw_dc, s=4, alpha=0.3)
+    else:
+        hexbin(ejes[0], irradiacion, kw_dc, 'Irradiación frente a DC', 'irradiacion', 'kw_dc')
+    figura.savefig(os.path.join(carpeta, f'{tipo}.png'))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--plantas', type=int, default=40)
+    parser.add_argument('--inversores', type=int, default=22)
+    parser.add_argument('--dias', type=int, default=34)
+    parser.add_argument('--procesos', type=int, default=None)
+    args = parser.parse_args()
+
+    df = datamart_sintetico(args.plantas, args.inversores, args.dias, categoricas=True)
+    df['eficiencia'] = df.kw_ac / df.kw_dc * 100
+    df, _ = compactar_tipos(df)
+    print(f'Datamart sintético: {len(df):,} registros')
+
+    with tempfile.TemporaryDirectory() as carpeta:
+        ruta_cubo, ruta_rollup = os.path.join(carpeta, 'cubo'), os.path.join(carpeta, 'rollup')
+        guardar_cubo(df, ruta_cubo)
+        guardar_rollup(construir_rollup(df), ruta_rollup)
+        del df
+
+        planta = abrir_cubo(ruta_cubo).inverters.get_level_values(0)[0]
+        cubo = abrir_cubo(ruta_cubo).seleccionar(planta)
+        _, scatter = medir(dibujar, cubo, carpeta, 'scatter')
+        _, hexagonos = medir(dibujar, cubo, carpeta, 'hexbin')
+
+        registros, informe = medir(generar_informe, carpeta=os.path.join(carpeta, 'informe'), procesos=args.procesos,
+                                   ruta_cubo=ruta_cubo, ruta_rollup=ruta_rollup)
+
+    print(registros.groupby('figura', sort=False).segundos.agg(['count', 'mean', 'max']))
+
+    resultados = []
+    for nombre, medida in [(f'scatter de una planta ({cubo.medida("kw_dc").size:,} puntos)', scatter),
+                           ('hexbin de una planta', hexagonos),
+                           (f'generar_informe ({len(registros)} gráficos)', informe)]:
+        resultados.append({'caso': nombre,
+                           'segundos': medida['segundos'],
+                           'incremento_rss_mb': medida['incremento_rss_mb']})
+
+    imprimir_tabla(resultados)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,40 @@
+"""BENCHMARK: AJUSTE Y PUNTUACIÓN DEL MODELO DE DC ESPERADA
+
+Mide el tiempo y el incremento de memoria de ajustar_modelo (un modelo por inverter) y de puntuar todas las lecturas
+sobre un datamart sintético con tipos compactos (por defecto 5 plantas de 100 inverters durante un año, 17,5 millones de registros).
+
+python -m benchmarks.bench_modelo --plantas 5 --inversores 100 --dias 365
+"""
+
+import argparse
+
+from benchmarks.comun import datamart_sintetico, imprimir_tabla, medir
+from planta_solar.modelo import ajustar_modelo, puntuar
+from planta_solar.tipos import compactar_tipos
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--plantas', type=int, default=5)
+    parser.add_argument('--inversores', type=int, default=100)
+    parser.add_argument('--dias', type=int, default=365)
+    args = parser.parse_args()
+
+    df, _ = compactar_tipos(datamart_sintetico(args.plantas, args.inversores, args.dias, categoricas=True))
+    print(f'Datamart sintético: {len(df):,} registros')
+
+    modelo, ajuste = medir(ajustar_modelo, df)
+    _, puntuacion = medir(puntuar, df, modelo)
+
+    resultados = []
+    for nombre, medida in [(f'ajustar_modelo ({len(modelo)} inverters)', ajuste), ('puntuar', puntuacion)]:
+        resultados.append({'caso': nombre,
+                           'segundos': medida['segundos'],
+                           'incremento_rss_mb': medida['incremento_rss_mb'],
+                           'registros_s': len(df) / medida['segundos']})
+
+    imprimir_tabla(resultados)
+
+
+if __name__ == '__main__':
+    main()
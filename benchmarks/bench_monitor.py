@@ -0,0 +1,49 @@
+"""BENCHMARK: MONITOR DE EFICIENCIA FRENTE A RECALCULAR LA VENTANA MÓVIL
+
+En cada refresco llegan las lecturas de una ventana de 15 minutos de todos los inverters. Compara el coste de incorporarlas con:
+
+- groupby('inverter_id').rolling() de media y desviación sobre todo el histórico, recalculado en cada refresco
+- MonitorEficiencia, que actualiza solo los inverters con lecturas nuevas
+
+python -m benchmarks.bench_monitor --plantas 2 --inversores 22 --dias 34
+"""
+
+import argparse
+
+from benchmarks.comun import datamart_sintetico, imprimir_tabla, medir
+from planta_solar.monitor import VENTANA, MonitorEficiencia, monitorizar
+
+
+def recalcular_ventanas(df):
+    generando = df[df.kw_dc > 0]
+    eficiencia = generando.kw_ac / generando.kw_dc * 100
+    return eficiencia.groupby(generando.inverter_id, observed=True).rolling(VENTANA).agg(['mean', 'std'])
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--plantas', type=int, default=2)
+    parser.add_argument('--inversores', type=int, default=22)
+    parser.add_argument('--dias', type=int, default=34)
+    args = parser.parse_args()
+
+    df = datamart_sintetico(args.plantas, args.inversores, args.dias, categoricas=True)
+
+    # Histórico hasta el último mediodía y refresco con las lecturas de ese mediodía
+
+    refresco = df.index[df.index.hour == 12].max()
+    historico = df[df.index < refresco]
+    nuevas = df[df.index == refresco]
+
+    monitor = MonitorEficiencia()
+    monitorizar(historico, monitor)
+
+    _, recalculo = medir(recalcular_ventanas, df)
+    _, incremental = medir(monitorizar, nuevas, monitor)
+
+    imprimir_tabla([{'caso': 'rolling sobre todo el histórico', 'registros': len(df), 'segundos': recalculo['segundos']},
+                    {'caso': 'MonitorEficiencia (lecturas nuevas)', 'registros': len(nuevas), 'segundos': incremental['segundos']}])
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,81 @@
+"""BENCHMARK: PERFILES HORARIOS DESDE EL DATAMART FRENTE AL ROLLUP
+
+Compara el tiempo de los perfiles horarios de los insights calculados:
+
+- Sobre todos los registros del datamart, como en los scripts (pd.crosstab, groupby('hora'), groupby(['planta','hora']))
+- Sobre el rollup por planta, día, hora e inverter con perfil()
+
+Además mide lo que cuesta construir el rollup completo y actualizarlo con un día nuevo de lecturas,
+sobre un datamart sintético con tipos compactos (por defecto 5 plantas de 100 inverters durante un año, 17,5 millones de registros).
+
+python -m benchmarks.bench_rollup --plantas 5 --inversores 100 --dias 365
+"""
+
+import argparse
+import os
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.comun import datamart_sintetico, imprimir_tabla, medir
+from planta_solar.rollup import actualizar_rollup, construir_rollup, guardar_rollup, perfil
+from planta_solar.tipos import compactar_tipos
+
+
+def datamart_perfiles(df):
+    hora = df.index.hour
+    return [pd.crosstab(hora, df.planta, values=df.irradiacion, aggfunc='mean'),
+            df.groupby(hora).kw_dia.mean(),
+            df.groupby([df.planta, hora], observed=True).eficiencia.mean().unstack('planta')]
+
+
+def rollup_perfiles(rollup):
+    return [perfil(rollup, 'irradiacion'),
+            perfil(rollup, 'kw_dia', por=['hora']),
+            perfil(rollup, 'eficiencia')]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--plantas', type=int, default=5)
+    parser.add_argument('--inversores', type=int, default=100)
+    parser.add_argument('--dias', type=int, default=365)
+    args = parser.parse_args()
+
+    df = datamart_sintetico(args.plantas, args.inversores, args.dias, categoricas=True)
+    df['eficiencia'] = df.kw_ac / df.kw_dc * 100
+    df, _ = compactar_tipos(df)
+    print(f'Datamart sintético: {len(df):,} registros')
+
+    ultimo_dia = df.index >= df.index.max().normalize()
+    previo, nuevo = df[~ultimo_dia], df[ultimo_dia]
+
+    rollup, construccion = medir(construir_rollup, df)
+    print(f'Rollup: {len(rollup):,} registros')
+
+    referencia, datamart = medir(datamart_perfiles, df)
+    perfiles, consulta = medir(rollup_perfiles, rollup)
+    for esperado, obtenido in zip(referencia, perfiles):
+        assert np.allclose(np.asarray(esperado, dtype='float64'), np.asarray(obtenido, dtype='float64'), rtol=1e-5, equal_nan=True)
+    print('Perfiles iguales')
+
+    with tempfile.TemporaryDirectory() as carpeta:
+        ruta = os.path.join(carpeta, 'rollup')
+        guardar_rollup(construir_rollup(previo), ruta)
+        _, actualizacion = medir(actualizar_rollup, nuevo, ruta)
+
+    resultados = []
+    for nombre, medida in [('construir_rollup', construccion),
+                           ('3 perfiles sobre el datamart', datamart),
+                           ('3 perfiles sobre el rollup', consulta),
+                           (f'actualizar_rollup (1 día, {len(nuevo):,} registros)', actualizacion)]:
+        resultados.append({'caso': nombre,
+                           'segundos': medida['segundos'],
+                           'incremento_rss_mb': medida['incremento_rss_mb']})
+
+    imprimir_tabla(resultados)
+
+
+if __name__ == '__main__':
+    main()
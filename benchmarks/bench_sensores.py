@@ -0,0 +1,127 @@
+"""BENCHMARK: SALUD DE LOS SENSORES AMBIENTALES DE TODA LA FLOTA
+
+Genera una tabla de clima sintética como Datos/datamart_clima (un registro por planta y fecha, por defecto 40 plantas durante un año,
+1,4 millones de lecturas) con ruido en las tres medidas y le inyecta fallos conocidos en una parte de los sensores:
+irradiación de noche, temperatura del módulo fría con sol, temperatura ambiente bloqueada y picos aislados de la temperatura del módulo.
+
+Mide validar_sensores sobre toda la tabla de una vez frente a aplicarla sensor a sensor (groupby), y comprueba que
+cada fallo inyectado aparece en un intervalo de su comprobación y cuántos intervalos se marcan sin fallo inyectado.
+
+python -m benchmarks.bench_sensores --plantas 40 --dias 365
+"""
+
+import argparse
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.comun import imprimir_tabla, medir
+from planta_solar.sensores import validar_sensores
+
+# Fallos inyectados: comprobación que debe marcarlos, medida, hora del día en la que empiezan y número de lecturas
+
+FALLOS = {'irradiacion_nocturna': ('irradiacion', 22, 4),
+          'temperatura_incoherente': ('t_modulo', 12, 8),
+          'plano_t_ambiente': ('t_ambiente', 9, 16),
+          'pico_t_modulo': ('t_modulo', 13, 1)}
+
+
+def clima_sintetico(plantas=40, dias=365, semilla=0):
+    """Tabla de clima con una lectura cada 15 minutos por planta, ordenada por planta y fecha como la de planta_solar/clima.py."""
+
+    rng = np.random.default_rng(semilla)
+
+    fechas = pd.date_range('2020-05-15', periods=dias * 96, freq='15min')
+    hora = np.tile(fechas.hour + fechas.minute / 60, plantas)
+    sol = np.clip(np.sin((hora - 6) / 12 * np.pi), 0, None)
+    n = len(hora)
+
+    irradiacion = sol * rng.uniform(0.8, 1.1, n)
+    t_ambiente = 20 + 8 * np.sin((hora - 9) / 24 * 2 * np.pi) + rng.normal(0, 0.5, n)
+    t_modulo = t_ambiente + 30 * irradiacion + rng.normal(0, 1, n)
+
+    nombres = [f'p{p + 1:03d}' for p in range(plantas)]
+    codigos = np.repeat(np.arange(plantas), len(fechas))
+
+    return pd.DataFrame({'planta': pd.Categorical.from_codes(codigos, nombres),
+                         'sensor_id': pd.Categorical.from_codes(codigos, [f'SENSOR{p + 1:03d}' for p in range(plantas)]),
+                         'irradiacion': irradiacion,
+                         't_ambiente': t_ambiente,
+                         't_modulo': t_modulo}, index=pd.Index(np.tile(fechas.values, plantas), name='fecha'))
+
+
+def inyectar_fallos(clima, proporcion=0.25, semilla=0):
+    """Inyecta cada fallo de FALLOS una vez en un día al azar de una proporción de los sensores. Devuelve los fallos inyectados."""
+
+    rng = np.random.default_rng(semilla)
+
+    lecturas = clima.groupby('sensor_id', observed=True).size()
+    dias = lecturas.iloc[0] // 96
+    sensores = rng.choice(len(lecturas), max(int(len(lecturas) * proporcion), 1), replace=False)
+
+    inyectados = []
+    for sensor in sensores:
+        for comprobacion, (medida, hora, n) in FALLOS.items():
+            inicio = sensor * dias * 96 + rng.integers(1, dias - 1) * 96 + hora * 4
+            filas = np.arange(inicio, inicio + n)
+            columna = clima.columns.get_loc(medida)
+
+            if comprobacion == 'irradiacion_nocturna':
+                clima.iloc[filas, columna] = 0.1
+            elif comprobacion == 'temperatura_incoherente':
+                clima.iloc[filas, columna] = clima.t_ambiente.iloc[filas].to_numpy()
+            elif comprobacion.startswith('plano'):
+                clima.iloc[filas, columna] = clima.iloc[inicio, columna]
+            else:
+                clima.iloc[filas, columna] += 30
+
+            inyectados.append({'sensor_id': lecturas.index[sensor], 'comprobacion': comprobacion,
+                               'inicio': clima.index[inicio], 'fin': clima.index[inicio + n - 1]})
+
+    return pd.DataFrame(inyectados)
+
+
+def por_sensor(clima):
+    return pd.concat([validar_sensores(grupo) for _, grupo in clima.groupby('sensor_id', observed=True)], ignore_index=True)
+
+
+def aciertos(marcados, inyectados):
+    """Fallos inyectados detectados por su comprobación e intervalos marcados que no se solapan con ningún fallo inyectado en su sensor.
+
+    Un fallo puede marcarse además por otra comprobación (un pico de la temperatura del módulo tampoco corresponde a la irradiación): no es un falso positivo.
+    """
+
+    cruce = marcados.reset_index().merge(inyectados, on='sensor_id', how='left', suffixes=('', '_fallo'))
+    solapa = (cruce.inicio <= cruce.fin_fallo) & (cruce.inicio_fallo <= cruce.fin)
+    propia = solapa & (cruce.comprobacion == cruce.comprobacion_fallo)
+
+    detectados = cruce[propia].drop_duplicates(['sensor_id', 'comprobacion', 'inicio_fallo']).comprobacion.value_counts()
+    falsos = len(marcados) - cruce[solapa]['index'].nunique()
+
+    return detectados.reindex(list(FALLOS), fill_value=0), falsos
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--plantas', type=int, default=40)
+    parser.add_argument('--dias', type=int, default=365)
+    parser.add_argument('--proporcion', type=float, default=0.25, help='proporción de sensores con fallos inyectados')
+    args = parser.parse_args()
+
+    clima = clima_sintetico(args.plantas, args.dias)
+    inyectados = inyectar_fallos(clima, args.proporcion)
+    print(f'{len(clima)} lecturas de {args.plantas} sensores, {len(inyectados)} fallos inyectados')
+
+    marcados, flota = medir(validar_sensores, clima)
+    _, sensor_a_sensor = medir(por_sensor, clima)
+
+    imprimir_tabla([{'caso': 'toda la flota', **flota}, {'caso': 'sensor a sensor', **sensor_a_sensor}])
+
+    detectados, falsos = aciertos(marcados, inyectados)
+    print()
+    print(pd.DataFrame({'inyectados': inyectados.comprobacion.value_counts().reindex(list(FALLOS)), 'detectados': detectados}))
+    print(f'intervalos marcados sin fallo inyectado: {falsos} de {len(marcados)}')
+
+
+if __name__ == '__main__':
+    main()
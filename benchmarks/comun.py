@@ -0,0 +1,118 @@
+"""UTILIDADES COMUNES DE LOS BENCHMARKS
+
+Los benchmarks se ejecutan desde la raíz del repositorio como módulos, por ejemplo:
+
+python -m benchmarks.bench_datamart
+
+Para medir la memoria de forma honesta cada caso se ejecuta en un proceso nuevo,
+ya que el pico de RSS de un proceso solo puede crecer y un caso contaminaría la medida del siguiente.
+"""
+
+import multiprocessing
+import resource
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from planta_solar.instrumentacion import pico_rss_mb, reiniciar_pico_rss
+
+
+def rss_actual_mb():
+    """Memoria residente actual del proceso en MB (en sistemas sin /proc devuelve el pico)."""
+
+    try:
+        with open('/proc/self/statm') as f:
+            paginas = int(f.read().split()[1])
+    except OSError:
+        return pico_rss_mb()
+
+    return paginas * resource.getpagesize() / 1024 ** 2
+
+
+def medir(funcion, *args, **kwargs):
+    """Ejecuta la función y devuelve su resultado junto con el tiempo de reloj, el de CPU y el pico de RSS.
+
+    incremento_rss_mb es lo que sube el pico respecto a la memoria que ocupaba el proceso antes de la llamada.
+    """
+
+    reiniciar_pico_rss()
+    rss_inicial = rss_actual_mb()
+    inicio_reloj = time.perf_counter()
+    inicio_cpu = time.process_time()
+
+    resultado = funcion(*args, **kwargs)
+
+    medida = {'segundos': time.perf_counter() - inicio_reloj,
+              'cpu_segundos': time.process_time() - inicio_cpu,
+              'pico_rss_mb': pico_rss_mb(),
+              'incremento_rss_mb': max(pico_rss_mb() - rss_inicial, 0.0)}
+
+    return resultado, medida
+
+
+def _medir_sin_resultado(funcion, args, kwargs):
+    return medir(funcion, *args, **kwargs)[1]
+
+
+def medir_aislado(funcion, *args, **kwargs):
+    """Igual que medir() pero en un proceso nuevo. La función tiene que ser importable (definida a nivel de módulo)."""
+
+    contexto = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=1, mp_context=contexto) as pool:
+        return pool.submit(_medir_sin_resultado, funcion, args, kwargs).result()
+
+
+def datamart_sintetico(plantas=2, inversores=22, dias=34, semilla=0, categoricas=False):
+    """Datamart con la misma forma que Datos/df.pickle: fecha en el index y una fila por inverter y ventana de 15 minutos.
+
+    categoricas: genera planta, inverter_id y sensor_id directamente como categóricas, sin crear un texto por registro
+    (para datamarts de millones de registros)
+    """
+
+    rng = np.random.default_rng(semilla)
+
+    fechas = pd.date_range('2020-05-15', periods=dias * 96, freq='15min')
+    hora = fechas.hour + fechas.minute / 60
+    sol = np.clip(np.sin((hora - 6) / 12 * np.pi), 0, None)
+
+    n_fechas = len(fechas)
+    n_series = plantas * inversores
+    n = n_fechas * n_series
+
+    planta = np.repeat([f'p{p + 1}' for p in range(plantas)], inversores)
+    inverter = np.array([f'inv{p + 1:03d}_{i:03d}' for p in range(plantas) for i in range(inversores)])
+
+    irradiacion = np.tile(sol, n_series) * rng.uniform(0.8, 1.1, n)
+    kw_dc = irradiacion * 1200 * rng.uniform(0.9, 1.0, n)
+    kw_ac = kw_dc * 0.97
+
+    if categoricas:
+        codigos = np.repeat(np.arange(n_series), n_fechas)
+        planta = pd.Categorical.from_codes(codigos // inversores, planta[::inversores])
+        inverter = pd.Categorical.from_codes(codigos, inverter)
+    else:
+        planta = np.repeat(planta, n_fechas)
+        inverter = np.repeat(inverter, n_fechas)
+
+    df = pd.DataFrame({'fecha': np.tile(fechas.values, n_series),
+                       'planta': planta,
+                       'inverter_id': inverter,
+                       'kw_dc': kw_dc,
+                       'kw_ac': kw_ac,
+                       'kw_dia': np.tile(np.cumsum(sol) % 8000, n_series),
+                       'kw_total': 6e6 + np.arange(n, dtype='float64'),
+                       'sensor_id': planta,
+                       't_ambiente': 25 + 5 * irradiacion,
+                       't_modulo': 25 + 30 * irradiacion,
+                       'irradiacion': irradiacion})
+
+    return df.sort_values('fecha', kind='stable').set_index('fecha')
+
+
+def imprimir_tabla(filas):
+    """Imprime los resultados (lista de diccionarios) como tabla."""
+
+    with pd.option_context('display.width', 200, 'display.max_columns', None):
+        print(pd.DataFrame(filas).round(3).to_string(index=False))
@@ -0,0 +1,243 @@
+"""FLOTA SINTÉTICA CON EL FORMATO DE LOS FICHEROS DE LAS PLANTAS
+
+En Datos/ solo hay 2 plantas durante 34 días, así que no se puede medir cómo escala el proceso con el tamaño de la flota.
+
+Aquí generamos ficheros Plant_N_Generation_Data.csv y Plant_N_Weather_Sensor_Data.csv con las mismas columnas y formatos que los originales
+(la generación de la planta 1 con el día delante y sin segundos, el resto en ISO; PLANT_ID 4135001, 4136001, ...):
+
+- Irradiación con la forma del día, un factor de nubes por día y ruido por lectura; temperatura ambiente con su ciclo diario
+  y temperatura del módulo que sube con la irradiación
+- Un sensor por planta y una lectura cada 15 minutos por inverter, con DC proporcional a la irradiación y AC en torno al 97,5% de DC.
+  DAILY_YIELD acumula la energía AC del día y TOTAL_YIELD la de los días anteriores: como en los datos reales (y en
+  verificar_coherencia, planta_solar/coherencia.py), el incremento diario de TOTAL_YIELD es el DAILY_YIELD del día anterior
+- Fallos inyectados (FALLOS): periodos de DC cero con sol, inverters con baja eficiencia durante unos días y huecos de lecturas
+  en la generación y en los sensores. Además el DC de las plantas de escala_dc va multiplicado por 10, como el de la planta 1 real
+
+Los fallos inyectados se guardan en fallos_inyectados.csv para comprobar qué detecta el análisis.
+usar_flota() sustituye las fuentes registradas en planta_solar/ingesta.py por las de la flota, para ejecutar el proceso sobre ella.
+
+python -m benchmarks.flota --carpeta Flota --plantas 40 --inversores 22 --dias 365
+"""
+
+import argparse
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from planta_solar.ingesta import FORMATO_ISO, FUENTES, PLANTAS
+
+INICIO = '2020-05-15'
+
+LECTURAS_DIA = 96
+
+# PLANT_ID de la primera planta. Las siguientes van de 1000 en 1000, como las dos reales
+
+ID_PRIMERA_PLANTA = 4135001
+
+# Formato de DATE_TIME de la generación de la planta 1 (el resto de ficheros van en FORMATO_ISO)
+
+FORMATO_GENERACION_P1 = '%d-%m-%Y %H:%M'
+
+# Fallos inyectados por defecto:
+# dc_cero: proporción de días de cada inverter con un periodo de 2 a 6 horas de DC y AC cero con sol
+# baja_eficiencia: proporción de inverters con la eficiencia entre el 80% y el 90% durante un rango de días
+# huecos: proporción de lecturas que faltan, en bloques de 1 a 8 lecturas seguidas
+
+FALLOS = {'dc_cero': 0.02, 'baja_eficiencia': 0.05, 'huecos': 0.005}
+
+LARGO_MAXIMO_HUECO = 8
+
+CARACTERES = np.array(list('ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789'))
+
+
+def claves_aleatorias(rng, n, largo=15):
+    """Identificadores como los SOURCE_KEY originales (15 letras y números)."""
+
+    return np.array([''.join(clave) for clave in rng.choice(CARACTERES, (n, largo))])
+
+
+def huecos(rng, filas, columnas, proporcion):
+    """Matriz filas x columnas con False en las lecturas que faltan, en bloques de 1 a LARGO_MAXIMO_HUECO lecturas seguidas de la misma columna."""
+
+    presente = np.ones((filas, columnas), dtype=bool)
+    n = rng.binomial(filas * columnas, proporcion / ((1 + LARGO_MAXIMO_HUECO) / 2))
+
+    inicios = rng.integers(0, filas, n)
+    largos = rng.integers(1, LARGO_MAXIMO_HUECO + 1, n)
+    desplazamiento = np.arange(largos.sum()) - np.repeat(np.cumsum(largos) - largos, largos)
+
+    columna = rng.integers(0, columnas, n)
+    presente[np.minimum(np.repeat(inicios, largos) + desplazamiento, filas - 1), np.repeat(columna, largos)] = False
+
+    return presente, pd.DataFrame({'columna': columna, 'desde': inicios, 'hasta': np.minimum(inicios + largos, filas) - 1})
+
+
+def formato_generacion(numero):
+    return FORMATO_GENERACION_P1 if numero == 1 else FORMATO_ISO
+
+
+def generar_planta(numero, inversores=22, dias=34, fallos=None, escalada=False, inicio=INICIO, rng=None):
+    """Generación, sensor y fallos inyectados de la planta numero, como dataframes con las columnas de los ficheros originales."""
+
+    fallos = {**FALLOS, **(fallos or {})}
+    rng = rng or np.random.default_rng(numero)
+    planta, planta_id = f'p{numero}', ID_PRIMERA_PLANTA + (numero - 1) * 1000
+
+    fechas = pd.date_range(inicio, periods=dias * LECTURAS_DIA, freq='15min')
+    n_fechas = len(fechas)
+    hora = (fechas.hour + fechas.minute / 60).to_numpy()
+
+    # Clima de la planta
+
+    sol = np.clip(np.sin((hora - 6) / 12 * np.pi), 0, None)
+    nubes = np.repeat(rng.uniform(0.5, 1.0, dias), LECTURAS_DIA) * rng.uniform(0.85, 1.05, n_fechas)
+    irradiacion = 1.1 * sol * nubes
+    t_ambiente = 24 + 6 * np.sin((hora - 9) / 24 * 2 * np.pi) + np.repeat(rng.normal(0, 2, dias), LECTURAS_DIA) + rng.normal(0, 0.3, n_fechas)
+    t_modulo = t_ambiente + 28 * irradiacion + rng.normal(0, 0.8, n_fechas)
+
+    # Generación de cada inverter (matrices fecha x inverter)
+
+    inverters = claves_aleatorias(rng, inversores)
+    dc = irradiacion[:, np.newaxis] * rng.uniform(1250, 1350, inversores) * rng.uniform(0.97, 1.0, (n_fechas, inversores))
+    eficiencia = np.tile(rng.uniform(0.975, 0.98, inversores), (n_fechas, 1))
+
+    inyectados = []
+
+    for inverter in rng.choice(inversores, int(round(fallos['baja_eficiencia'] * inversores)), replace=False):
+        desde = rng.integers(0, dias)
+        hasta = rng.integers(desde + 1, dias + 1)
+        eficiencia[desde * LECTURAS_DIA:hasta * LECTURAS_DIA, inverter] = rng.uniform(0.8, 0.9)
+        inyectados.append((inverters[inverter], 'baja_eficiencia', desde * LECTURAS_DIA, hasta * LECTURAS_DIA - 1))
+
+    ac = dc * eficiencia
+
+    for dia, inverter in np.argwhere(rng.random((dias, inversores)) < fallos['dc_cero']):
+        desde = dia * LECTURAS_DIA + rng.integers(8 * 4, 14 * 4)
+        hasta = desde + rng.integers(8, 25)
+        dc[desde:hasta, inverter] = 0
+        ac[desde:hasta, inverter] = 0
+        inyectados.append((inverters[inverter], 'dc_cero', desde, hasta - 1))
+
+    energia = ac * 0.25
+    kw_dia = energia.reshape(dias, LECTURAS_DIA, inversores).cumsum(axis=1).reshape(n_fechas, inversores)
+
+    # TOTAL_YIELD se actualiza una vez al día con la energía de los días anteriores
+
+    energia_dia = kw_dia[LECTURAS_DIA - 1::LECTURAS_DIA]
+    kw_total = np.repeat(rng.uniform(6e6, 7e6, inversores) + energia_dia.cumsum(axis=0) - energia_dia, LECTURAS_DIA, axis=0)
+
+    if escalada:
+        dc *= 10
+
+    # Huecos: las lecturas que faltan no se escriben
+
+    presente, huecos_generacion = huecos(rng, n_fechas, inversores, fallos['huecos'])
+    filas, columnas = np.nonzero(presente)
+
+    texto = np.asarray(fechas.strftime(formato_generacion(numero)), dtype=object)
+    gener = pd.DataFrame({'DATE_TIME': texto[filas],
+                          'PLANT_ID': planta_id,
+                          'SOURCE_KEY': inverters[columnas],
+                          'DC_POWER': dc[filas, columnas],
+                          'AC_POWER': ac[filas, columnas],
+                          'DAILY_YIELD': kw_dia[filas, columnas],
+                          'TOTAL_YIELD': kw_total[filas, columnas]})
+
+    presente_sensor, huecos_sensor = huecos(rng, n_fechas, 1, fallos['huecos'])
+    filas = np.flatnonzero(presente_sensor[:, 0])
+
+    texto = np.asarray(fechas.strftime(FORMATO_ISO), dtype=object)
+    sensor = pd.DataFrame({'DATE_TIME': texto[filas],
+                           'PLANT_ID': planta_id,
+                           'SOURCE_KEY': claves_aleatorias(rng, 1)[0],
+                           'AMBIENT_TEMPERATURE': t_ambiente[filas],
+                           'MODULE_TEMPERATURE': t_modulo[filas],
+                           'IRRADIATION': irradiacion[filas]})
+
+    # Registro de los fallos inyectados, con las fechas de su primera y última lectura
+
+    registros = pd.concat([pd.DataFrame(inyectados, columns=['inverter_id', 'fallo', 'desde', 'hasta']),
+                           huecos_generacion.assign(inverter_id=inverters[huecos_generacion.columna], fallo='hueco'),
+                           huecos_sensor.assign(inverter_id=None, fallo='hueco_sensor')], ignore_index=True)
+
+    return gener, sensor, pd.DataFrame({'planta': planta,
+                                        'inverter_id': registros.inverter_id,
+                                        'fallo': registros.fallo,
+                                        'inicio': fechas[registros.desde.to_numpy(dtype='int64')],
+                                        'fin': fechas[registros.hasta.to_numpy(dtype='int64')]})
+
+
+def rutas_planta(carpeta, numero):
+    return (os.path.join(carpeta, f'Plant_{numero}_Generation_Data.csv'),
+            os.path.join(carpeta, f'Plant_{numero}_Weather_Sensor_Data.csv'))
+
+
+def generar_flota(carpeta, plantas=2, inversores=22, dias=34, fallos=None, escala_dc=(1,), inicio=INICIO, semilla=0):
+    """Escribe en carpeta los ficheros de generación y sensor de las plantas 1 a plantas, y fallos_inyectados.csv.
+
+    Cada planta se genera y se escribe por separado, así que la memoria depende del tamaño de una planta y no de la flota.
+    Devuelve los fallos inyectados.
+    """
+
+    os.makedirs(carpeta, exist_ok=True)
+    semillas = np.random.SeedSequence(semilla).spawn(plantas)
+
+    inyectados = []
+    for numero in range(1, plantas + 1):
+        gener, sensor, registros = generar_planta(numero, inversores, dias, fallos, numero in escala_dc, inicio,
+                                                  np.random.default_rng(semillas[numero - 1]))
+        ruta_generacion, ruta_sensor = rutas_planta(carpeta, numero)
+        gener.to_csv(ruta_generacion, index=False)
+        sensor.to_csv(ruta_sensor, index=False)
+        inyectados.append(registros)
+
+    inyectados = pd.concat(inyectados, ignore_index=True)
+    inyectados.to_csv(os.path.join(carpeta, 'fallos_inyectados.csv'), index=False)
+
+    return inyectados
+
+
+def usar_flota(carpeta, plantas):
+    """Sustituye las fuentes registradas (FUENTES y PLANTAS de planta_solar/ingesta.py) por las de la flota de carpeta.
+
+    Las funciones de carga leen FUENTES al ejecutarse, así que todo el proceso (procesar_plantas, actualizar, ...) pasa a usar la flota.
+    """
+
+    FUENTES.clear()
+    PLANTAS.clear()
+
+    for numero in range(1, plantas + 1):
+        planta = f'p{numero}'
+        ruta_generacion, ruta_sensor = rutas_planta(carpeta, numero)
+        PLANTAS[ID_PRIMERA_PLANTA + (numero - 1) * 1000] = planta
+        FUENTES[f'{planta}_generacion'] = {'planta': planta, 'ruta': ruta_generacion, 'tipo': 'generacion',
+                                           'formato_fecha': formato_generacion(numero)}
+        FUENTES[f'{planta}_sensor'] = {'planta': planta, 'ruta': ruta_sensor, 'tipo': 'sensor', 'formato_fecha': FORMATO_ISO}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--carpeta', required=True, help='carpeta en la que escribir los ficheros')
+    parser.add_argument('--plantas', type=int, default=2)
+    parser.add_argument('--inversores', type=int, default=22)
+    parser.add_argument('--dias', type=int, default=34)
+    parser.add_argument('--dc-cero', type=float, default=FALLOS['dc_cero'])
+    parser.add_argument('--baja-eficiencia', type=float, default=FALLOS['baja_eficiencia'])
+    parser.add_argument('--huecos', type=float, default=FALLOS['huecos'])
+    parser.add_argument('--escala-dc', type=int, nargs='*', default=[1], help='plantas con el DC multiplicado por 10')
+    parser.add_argument('--semilla', type=int, default=0)
+    args = parser.parse_args()
+
+    inicio = time.perf_counter()
+    inyectados = generar_flota(args.carpeta, args.plantas, args.inversores, args.dias,
+                               {'dc_cero': args.dc_cero, 'baja_eficiencia': args.baja_eficiencia, 'huecos': args.huecos},
+                               args.escala_dc, semilla=args.semilla)
+
+    print(f'{args.plantas} plantas en {args.carpeta} en {time.perf_counter() - inicio:.1f} s')
+    print(inyectados.fallo.value_counts())
+
+
+if __name__ == '__main__':
+    main()
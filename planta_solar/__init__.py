@@ -0,0 +1,93 @@
+"""PLANTA SOLAR: FUNCIONES DEL ANÁLISIS COMO LIBRERÍA
+
+Los scripts analisis_planta_solar_datos.py, analisis_planta_solar_variables.py y analisis_planta_solar_insights.py son cuadernos:
+al importarlos leen los csv, imprimen dataframes enteros y dibujan gráficos, e importan matplotlib y seaborn nada más empezar.
+
+La lógica que usan está en los módulos de este paquete, como funciones que reciben y devuelven dataframes sin imprimir ni dibujar nada:
+
+- Carga y limpieza: ingesta (lectura por lotes ya limpia y renombrada), fechas, calidad
+- Integración: integracion (as-of join de generación y sensores), huecos, coherencia
+- Variables derivadas y tipos: derivadas, tipos, calibracion (escala de DC de cada inverter)
+- Agregación: agregacion (df_dia), rollup (perfiles horarios), cubo (medida x fecha x inverter)
+- Detección: alertas (DC cero con irradiación), monitor (eficiencia), modelo (DC esperada), comparacion (inverters frente a su planta),
+  sensores (coherencia de los sensores ambientales)
+- Almacenamiento: datamart (Parquet particionado), clima (generación y clima por separado, unidos con una vista)
+- Procesos completos: paralelo (construcción del datamart), incremental (actualización), informe (gráficos en ficheros)
+- Utilidades: comun (claves de un inverter, códigos de grupo y eficiencia nominal que comparten los demás módulos)
+- Instrumentación: instrumentacion (tiempo, filas y memoria de cada etapa en una traza JSON, cProfile de una etapa)
+
+Las funciones principales se pueden importar directamente del paquete (from planta_solar import puntuar).
+Cada una se importa de su módulo la primera vez que se pide, así que import planta_solar no carga pandas ni pyarrow,
+y matplotlib solo se importa al dibujar (planta_solar/informe.py).
+
+Desde la línea de comandos, en la raíz del repositorio: python -m planta_solar --help
+"""
+
+import importlib
+
+# Módulo de cada función que se puede importar directamente del paquete
+
+FUNCIONES = {
+    # Carga y limpieza
+    'leer_fuentes': 'ingesta',
+    'leer_por_lotes': 'ingesta',
+    'convertir_fechas': 'fechas',
+    'perfilar': 'calidad',
+    # Integración
+    'integrar': 'integracion',
+    'detectar_huecos': 'huecos',
+    'verificar_coherencia': 'coherencia',
+    # Variables derivadas y tipos
+    'crear_variables': 'derivadas',
+    'compactar_tipos': 'tipos',
+    'estimar_calibracion': 'calibracion',
+    # Agregación
+    'agregar_diario': 'agregacion',
+    'construir_rollup': 'rollup',
+    'perfil': 'rollup',
+    'construir_cubo': 'cubo',
+    # Detección
+    'detectar_dc_cero': 'alertas',
+    'monitorizar': 'monitor',
+    'ajustar_modelo': 'modelo',
+    'puntuar': 'modelo',
+    'comparar': 'comparacion',
+    'clasificar': 'comparacion',
+    'validar_sensores': 'sensores',
+    'leer_sensores': 'sensores',
+    # Almacenamiento
+    'cargar_datamart': 'datamart',
+    'guardar_datamart': 'datamart',
+    'cargar_vista': 'clima',
+    'cargar_clima': 'clima',
+    'guardar_estrella': 'clima',
+    'cargar_calibracion': 'calibracion',
+    'guardar_calibracion': 'calibracion',
+    'abrir_cubo': 'cubo',
+    'guardar_cubo': 'cubo',
+    'cargar_rollup': 'rollup',
+    'guardar_rollup': 'rollup',
+    # Procesos completos
+    'procesar_plantas': 'paralelo',
+    'actualizar': 'incremental',
+    'generar_informe': 'informe',
+    # Instrumentación
+    'activar': 'instrumentacion',
+    'etapa': 'instrumentacion',
+    'leer_traza': 'instrumentacion',
+    'resumen_traza': 'instrumentacion',
+    'comparar_trazas': 'instrumentacion',
+}
+
+__all__ = list(FUNCIONES)
+
+
+def __getattr__(nombre):
+    if nombre not in FUNCIONES:
+        raise AttributeError(f'module {__name__!r} has no attribute {nombre!r}')
+
+    return getattr(importlib.import_module(f'{__name__}.{FUNCIONES[nombre]}'), nombre)
+
+
+def __dir__():
+    return sorted(set(globals()) | set(FUNCIONES))
@@ -0,0 +1,203 @@
+"""LÍNEA DE COMANDOS
+
+Ejecuta los procesos del análisis sin pasar por los scripts, desde la raíz del repositorio (las rutas de Datos/ son relativas):
+
+python -m planta_solar construir      carga, limpia e integra todas las plantas en paralelo y guarda el datamart, df_dia, el cubo, el rollup
+                                      y la tabla de calibración
+python -m planta_solar actualizar     incorpora solo los registros nuevos de los csv (marcas de agua), de todas las plantas o de las de --plantas
+python -m planta_solar calibrar       estima la escala de DC de cada inverter sobre el datamart y guarda la tabla de calibración
+python -m planta_solar puntuar        ajusta el modelo de DC esperada y ordena los inverters por su ratio de rendimiento
+python -m planta_solar alertas        alertas de DC cero con irradiación sobre el datamart
+python -m planta_solar sensores       intervalos en los que cada sensor ambiental da lecturas físicamente incoherentes (sobre los csv de los sensores)
+python -m planta_solar ranking        inverters ordenados por su desviación respecto a la mediana de su planta
+python -m planta_solar informe        gráficos de cada planta en ficheros, sin pantalla
+python -m planta_solar traza          tiempo, filas y memoria de cada etapa de una traza, y comparación con una traza anterior
+
+puntuar, ranking e informe corrigen kw_dc y eficiencia con la tabla de calibración si existe (Datos/calibracion.csv).
+Cada comando importa sus módulos al ejecutarse, así que ninguno carga matplotlib salvo informe,
+y los que solo leen el datamart no cargan lo necesario para leer los csv.
+
+Con --traza (antes del comando) se mide cada etapa del proceso (ver planta_solar/instrumentacion.py):
+python -m planta_solar --traza traza.jsonl --perfilar integrar construir
+"""
+
+import argparse
+import sys
+import time
+
+
+def mostrar(tabla, salida=None):
+    """Imprime una tabla completa y, con salida, la guarda en csv."""
+
+    import pandas as pd
+
+    with pd.option_context('display.width', 200, 'display.max_columns', None, 'display.max_rows', 100):
+        print(tabla)
+
+    if salida:
+        tabla.to_csv(salida)
+
+
+def construir(args):
+    from planta_solar.agregacion import agregar_diario
+    from planta_solar.calibracion import estimar_calibracion, guardar_calibracion
+    from planta_solar.clima import guardar_estrella
+    from planta_solar.cubo import guardar_cubo
+    from planta_solar.datamart import RUTA_DATAMART_DIA, guardar_datamart
+    from planta_solar.paralelo import procesar_plantas
+    from planta_solar.rollup import construir_rollup, guardar_rollup
+
+    df, informe, rechazos = procesar_plantas(args.plantas, args.procesos)
+    mostrar(informe)
+    if len(rechazos):
+        print(f'{len(rechazos)} registros con fechas no válidas')
+
+    guardar_estrella(df)
+    guardar_datamart(agregar_diario(df), RUTA_DATAMART_DIA)
+    guardar_cubo(df)
+    guardar_rollup(construir_rollup(df))
+    guardar_calibracion(estimar_calibracion(df))
+
+
+def actualizar(args):
+    from planta_solar.incremental import actualizar, fuentes_de_tipo
+
+    informe = actualizar(fuentes_de_tipo('generacion', args.plantas), fuentes_de_tipo('sensor', args.plantas))
+    for clave in ['registros_nuevos', 'dias_recalculados', 'horas_rollup']:
+        print(f'{clave}: {informe[clave]}')
+
+
+def calibrar(args):
+    from planta_solar.calibracion import estimar_calibracion, guardar_calibracion
+    from planta_solar.clima import cargar_vista
+
+    df = cargar_vista(columnas=['planta', 'inverter_id', 'irradiacion', 'kw_dc', 'kw_ac'],
+                      desde=args.desde, hasta=args.hasta, plantas=args.plantas).unir()
+
+    calibracion = estimar_calibracion(df)
+    guardar_calibracion(calibracion)
+    mostrar(calibracion, args.salida)
+
+
+def puntuar(args):
+    from planta_solar.calibracion import cargar_calibracion
+    from planta_solar.clima import cargar_vista
+    from planta_solar.modelo import ajustar_modelo, puntuar
+
+    df = cargar_vista(columnas=['planta', 'inverter_id', 'irradiacion', 't_modulo', 'kw_dc'],
+                      desde=args.desde, hasta=args.hasta, plantas=args.plantas, calibracion=cargar_calibracion()).unir()
+
+    modelo = ajustar_modelo(df)
+    ratio = puntuar(df, modelo).ratio_rendimiento.groupby([df.planta, df.inverter_id], observed=True).mean()
+
+    mostrar(modelo.assign(ratio_rendimiento=ratio).sort_values('ratio_rendimiento'), args.salida)
+
+
+def alertas(args):
+    from planta_solar.alertas import detectar_dc_cero
+    from planta_solar.clima import cargar_vista
+
+    df = cargar_vista(columnas=['planta', 'inverter_id', 'kw_dc', 'irradiacion'],
+                      desde=args.desde, hasta=args.hasta, plantas=args.plantas).unir()
+
+    mostrar(detectar_dc_cero(df), args.salida)
+
+
+def sensores(args):
+    from planta_solar.sensores import leer_sensores, validar_sensores
+
+    marcados = validar_sensores(leer_sensores(args.plantas, args.desde, args.hasta))
+    print(marcados.groupby(['planta', 'sensor_id', 'comprobacion'], observed=True).lecturas.agg(['count', 'sum']))
+
+    mostrar(marcados, args.salida)
+
+
+def ranking(args):
+    from planta_solar.calibracion import cargar_calibracion
+    from planta_solar.comparacion import clasificar
+    from planta_solar.cubo import abrir_cubo
+
+    cubo = abrir_cubo().calibrar(cargar_calibracion()).periodo(args.desde, args.hasta)
+    if args.plantas is not None:
+        cubo = cubo.seleccionar(args.plantas)
+
+    mostrar(clasificar(cubo, args.medida), args.salida)
+
+
+def informe(args):
+    from planta_solar.informe import CARPETA_INFORME, generar_informe
+
+    registros = generar_informe(args.plantas, args.carpeta or CARPETA_INFORME, args.procesos)
+    mostrar(registros.groupby('figura', sort=False).segundos.agg(['count', 'mean', 'max']))
+
+
+def traza(args):
+    from planta_solar.instrumentacion import comparar_trazas, resumen_traza
+
+    if args.comparar:
+        comparacion = comparar_trazas(args.comparar, args.ruta, args.umbral)
+        mostrar(comparacion, args.salida)
+        if comparacion.regresion.any():
+            print(f'etapas más lentas que en {args.comparar}: {", ".join(comparacion.index[comparacion.regresion])}')
+    else:
+        mostrar(resumen_traza(args.ruta).sort_values('segundos', ascending=False), args.salida)
+
+
+def crear_parser():
+    parser = argparse.ArgumentParser(prog='python -m planta_solar', description='Procesos del análisis de las plantas solares.')
+    parser.add_argument('--traza', help='fichero JSON Lines en el que añadir el tiempo, las filas y la memoria de cada etapa')
+    parser.add_argument('--perfilar', metavar='ETAPA', help='etapa a ejecutar con cProfile (con --traza, se guarda junto a la traza)')
+    comandos = parser.add_subparsers(dest='comando', required=True)
+
+    def comando(nombre, funcion, ayuda, fechas=True, salida=True):
+        sub = comandos.add_parser(nombre, help=ayuda, description=ayuda)
+        sub.set_defaults(funcion=funcion)
+        sub.add_argument('--plantas', nargs='+', help='plantas a procesar (por defecto todas)')
+        if fechas:
+            sub.add_argument('--desde', help='primera fecha, como en loc (2020-06-01)')
+            sub.add_argument('--hasta', help='última fecha, incluida entera como en loc')
+        if salida:
+            sub.add_argument('--salida', help='fichero csv en el que guardar el resultado')
+        return sub
+
+    comando('construir', construir, 'construye el datamart, df_dia, el cubo, el rollup y la calibración desde los csv',
+            fechas=False, salida=False).add_argument('--procesos', type=int, help='número de procesos (por defecto uno por núcleo)')
+    comando('actualizar', actualizar, 'incorpora los registros nuevos de los csv', fechas=False, salida=False)
+    comando('calibrar', calibrar, 'estima el factor de escala de DC de cada inverter y guarda la tabla de calibración')
+    comando('puntuar', puntuar, 'ratio de rendimiento de cada inverter según el modelo de DC esperada')
+    comando('alertas', alertas, 'alertas de DC cero con irradiación')
+    comando('sensores', sensores, 'intervalos con lecturas incoherentes de cada sensor ambiental')
+    comando('ranking', ranking, 'inverters ordenados por su desviación respecto a su planta').add_argument(
+        '--medida', default='kw_dc', help='medida a comparar (por defecto kw_dc)')
+
+    sub = comando('informe', informe, 'gráficos de cada planta en ficheros', fechas=False, salida=False)
+    sub.add_argument('--carpeta', help='carpeta del informe (por defecto Informe)')
+    sub.add_argument('--procesos', type=int, help='número de procesos (por defecto uno por núcleo)')
+
+    sub = comandos.add_parser('traza', help='resumen por etapa de una traza', description='resumen por etapa de una traza')
+    sub.set_defaults(funcion=traza)
+    sub.add_argument('ruta', help='traza generada con --traza')
+    sub.add_argument('--comparar', metavar='ANTERIOR', help='traza anterior con la que comparar el tiempo de cada etapa')
+    sub.add_argument('--umbral', type=float, default=1.5, help='veces que tiene que crecer el tiempo de una etapa para marcarla (por defecto 1.5)')
+    sub.add_argument('--salida', help='fichero csv en el que guardar el resultado')
+
+    return parser
+
+
+def main(argv=None):
+    args = crear_parser().parse_args(argv)
+
+    if args.traza:
+        from planta_solar.instrumentacion import activar
+        activar(args.traza, args.perfilar)
+
+    from planta_solar.instrumentacion import etapa
+
+    inicio = time.perf_counter()
+    with etapa(args.comando):
+        args.funcion(args)
+    print(f'{args.comando}: {time.perf_counter() - inicio:.1f} s', file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
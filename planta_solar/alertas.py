@@ -0,0 +1,121 @@
+"""DETECTOR EN TIEMPO REAL DE DC CERO CON IRRADIACIÓN
+
+En analisis_planta_solar_insights.py encontramos el fallo de la planta 2 a posteriori: nos quedamos con las horas centrales del día (between_time('08:00:00','15:00:00')),
+creamos el indicador kw_dc_cero y ordenamos los inverters por su media.
+
+Aquí lo convertimos en un detector que procesa las lecturas según van llegando, sin guardar el histórico:
+
+- Por cada planta solo se guarda la última irradiación del sensor y su fecha
+- Por cada inverter solo se guarda cuántas lecturas seguidas lleva con DC cero habiendo irradiación, y desde cuándo
+- Cuando un inverter llega a lecturas_minimas lecturas seguidas con DC cero y la irradiación de su planta supera el umbral se genera una alerta
+
+En vez de una franja horaria fija usamos la irradiación, que también vale en días nublados o en otras épocas del año.
+El estado es de tamaño fijo por inverter y cada lectura se procesa con un par de consultas a diccionarios, así que el coste por lectura es constante.
+
+Uso:
+
+detector = DetectorDCCero()
+detector.sensor('p2', fecha, irradiacion)
+alerta = detector.generacion('p2', inverter_id, fecha, kw_dc)
+"""
+
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+from planta_solar.instrumentacion import instrumentada
+
+# Irradiación a partir de la cual el inverter debería estar generando DC
+
+UMBRAL_IRRADIACION = 0.2
+
+# Lecturas seguidas con DC cero necesarias para alertar (con 2 lecturas de 15 minutos se descartan los ceros aislados)
+
+LECTURAS_MINIMAS = 2
+
+# Antigüedad máxima de la última medición del sensor para darla por buena
+
+VIGENCIA_SENSOR = '15min'
+
+Alerta = namedtuple('Alerta', ['planta', 'inverter_id', 'inicio', 'fecha', 'lecturas', 'irradiacion'])
+
+
+class DetectorDCCero:
+    """Detector de inverters que no generan DC cuando su planta tiene irradiación.
+
+    Las alertas generadas se devuelven en cada lectura y se acumulan en el atributo alertas.
+    """
+
+    def __init__(self, umbral_irradiacion=UMBRAL_IRRADIACION, lecturas_minimas=LECTURAS_MINIMAS, vigencia=VIGENCIA_SENSOR):
+        self.umbral_irradiacion = umbral_irradiacion
+        self.lecturas_minimas = lecturas_minimas
+        self.vigencia = pd.Timedelta(vigencia).to_timedelta64()
+
+        # planta -> (fecha, irradiación) de la última medición del sensor
+        self.irradiacion = {}
+
+        # (planta, inverter_id) -> [lecturas seguidas con DC cero, fecha de la primera]
+        self.estado = {}
+
+        self.alertas = []
+
+    def sensor(self, planta, fecha, irradiacion):
+        """Registra una medición del sensor ambiental de la planta."""
+
+        self.irradiacion[planta] = (fecha, irradiacion)
+
+    def generacion(self, planta, inverter_id, fecha, kw_dc, irradiacion=None):
+        """Procesa una lectura de generación. Devuelve la alerta si se genera con esta lectura, si no None.
+
+        irradiacion: irradiación de la planta en esa fecha (None para usar la última medición registrada con sensor())
+        Si no hay irradiación conocida la lectura no cuenta como fallo.
+        """
+
+        if irradiacion is None:
+            ultima = self.irradiacion.get(planta)
+            irradiacion = ultima[1] if ultima is not None and fecha - ultima[0] <= self.vigencia else np.nan
+
+        estado = self.estado.get((planta, inverter_id))
+        if estado is None:
+            estado = self.estado[(planta, inverter_id)] = [0, None]
+
+        if not (kw_dc == 0 and irradiacion > self.umbral_irradiacion):
+            estado[0] = 0
+            return None
+
+        if estado[0] == 0:
+            estado[1] = fecha
+        estado[0] += 1
+
+        if estado[0] != self.lecturas_minimas:
+            return None
+
+        alerta = Alerta(planta, inverter_id, estado[1], fecha, estado[0], irradiacion)
+        self.alertas.append(alerta)
+
+        return alerta
+
+    def en_fallo(self):
+        """Inverters que en su última lectura llevaban al menos lecturas_minimas lecturas seguidas con DC cero."""
+
+        return [clave for clave, (lecturas, _) in self.estado.items() if lecturas >= self.lecturas_minimas]
+
+
+@instrumentada
+def detectar_dc_cero(df, detector=None):
+    """Pasa por el detector las lecturas del datamart (fecha en el index, con irradiacion) en orden de fecha, como si llegaran en tiempo real.
+
+    Devuelve las alertas como dataframe.
+    """
+
+    if detector is None:
+        detector = DetectorDCCero()
+
+    df = df.sort_index(kind='stable') if not df.index.is_monotonic_increasing else df
+
+    for fila in zip(df.planta.to_numpy(), df.inverter_id.to_numpy(), df.index.to_numpy(),
+                    df.kw_dc.to_numpy(), df.irradiacion.to_numpy()):
+        detector.generacion(*fila)
+
+    return pd.DataFrame(detector.alertas, columns=Alerta._fields)
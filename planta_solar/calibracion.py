@@ -0,0 +1,131 @@
+"""CALIBRACIÓN DE LA ESCALA DE DC DE CADA INVERTER
+
+En analisis_planta_solar_datos.py el ratio entre DC y AC de la planta 1 sale en torno a 10, y en analisis_planta_solar_insights.py concluimos
+que el dato de DC de la planta 1 probablemente está escalado unas 10 veces. Mientras no se corrija, la eficiencia de la planta 1 y todo lo que
+depende de kw_dc (el modelo de DC esperada, las alertas, el monitor) salen con esa escala.
+
+Aquí estimamos un factor de escala de kw_dc por inverter y lo guardamos en una tabla de calibración (Datos/calibracion.csv):
+
+- Solo se usan las lecturas con irradiación alta y DC y AC positivos, en las que el ratio DC / AC es estable
+- El ratio de cada inverter es la mediana de esas lecturas, que no se mueve por unas pocas lecturas anómalas
+- El factor es la potencia de 10 más cercana al ratio dividido por el ratio de un inverter que funciona bien (100 / EFICIENCIA_NOMINAL).
+  Un error de unidades o de escala multiplica por una potencia de 10, y redondear evita "corregir" a un inverter que simplemente rinde mal
+- Los inverters con pocas lecturas válidas toman el factor de su planta (con la mediana de todas las lecturas de la planta)
+
+Los datos guardados no se modifican: el factor se aplica al leer las columnas afectadas (kw_dc y eficiencia) con una Vista
+(cargar_vista(calibracion=...), ver planta_solar/clima.py) o con un cubo calibrado (cubo.calibrar(...), ver planta_solar/cubo.py).
+La tabla se puede revisar y corregir a mano antes de usarla. Se recalcula con python -m planta_solar construir o calibrar,
+no con la actualización incremental: los inverters que no están en la tabla no se corrigen.
+"""
+
+import os
+
+import numpy as np
+import pandas as pd
+
+from planta_solar.comun import CLAVES, EFICIENCIA_NOMINAL, codigos_grupo
+from planta_solar.instrumentacion import instrumentada
+
+RUTA_CALIBRACION = 'Datos/calibracion.csv'
+
+# Irradiación mínima de las lecturas con las que se estima el ratio DC / AC
+
+IRRADIACION_CALIBRACION = 0.5
+
+# Lecturas válidas mínimas para estimar el factor de un inverter. Con menos toma el de su planta
+
+LECTURAS_CALIBRACION = 100
+
+# Ratio DC / AC de un inverter que funciona bien
+
+RATIO_NOMINAL = 100 / EFICIENCIA_NOMINAL
+
+# Columnas afectadas por la escala de kw_dc y cómo se corrigen con el factor: kw_dc se divide y la eficiencia (AC / DC) se multiplica
+
+CALIBRADAS = {'kw_dc': np.divide, 'eficiencia': np.multiply}
+
+
+def factor_escala(ratio, ratio_nominal=RATIO_NOMINAL):
+    """Potencia de 10 más cercana a la escala del ratio DC / AC respecto al nominal (1 sin ratio)."""
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        factor = 10.0 ** np.round(np.log10(np.asarray(ratio, dtype='float64') / ratio_nominal))
+
+    return np.where(np.isfinite(factor), factor, 1.0)
+
+
+@instrumentada
+def estimar_calibracion(df, irradiacion_minima=IRRADIACION_CALIBRACION, lecturas_minimas=LECTURAS_CALIBRACION):
+    """Tabla de calibración a partir del datamart (planta, inverter_id, irradiacion, kw_dc y kw_ac).
+
+    Devuelve un registro por inverter (index planta, inverter_id): lecturas válidas, ratio DC / AC del inverter y de su planta y factor_dc.
+    """
+
+    validas = ((df.irradiacion >= irradiacion_minima) & (df.kw_dc > 0) & (df.kw_ac > 0)).to_numpy()
+    ratio = pd.Series(df.kw_dc.to_numpy()[validas] / df.kw_ac.to_numpy()[validas])
+    plantas = df.planta.to_numpy()[validas]
+
+    por_inverter = ratio.groupby([plantas, df.inverter_id.to_numpy()[validas]]).agg(['size', 'median'])
+    por_inverter.index.names = list(CLAVES)
+    por_planta = ratio.groupby(plantas).median()
+
+    tabla = pd.DataFrame({'lecturas': por_inverter['size'],
+                          'ratio_dc_ac': por_inverter['median'],
+                          'ratio_planta': por_planta.reindex(por_inverter.index.get_level_values('planta')).to_numpy()})
+
+    propio = tabla.lecturas >= lecturas_minimas
+    tabla['factor_dc'] = factor_escala(np.where(propio, tabla.ratio_dc_ac, tabla.ratio_planta))
+
+    return tabla
+
+
+def guardar_calibracion(tabla, ruta=RUTA_CALIBRACION):
+    tabla.to_csv(ruta)
+
+
+def cargar_calibracion(ruta=RUTA_CALIBRACION):
+    """Tabla de calibración guardada, o None si no hay ninguna (en ese caso no se corrige nada)."""
+
+    if not os.path.exists(ruta):
+        return None
+
+    return pd.read_csv(ruta, index_col=list(CLAVES), dtype={clave: str for clave in CLAVES})
+
+
+def factores_inverters(calibracion, inverters):
+    """Factor de cada inverter de inverters (MultiIndex planta, inverter_id). Los que no están en la tabla no se corrigen (factor 1)."""
+
+    return calibracion.factor_dc.reindex(inverters).fillna(1.0).to_numpy(dtype='float64')
+
+
+def factores_registro(df, calibracion):
+    """Factor de cada registro del datamart según su planta e inverter."""
+
+    plantas, inverters = (df[clave] for clave in CLAVES)
+
+    # Con planta e inverter categóricos (datamart compacto) los códigos de las categorías indexan una tabla planta x inverter,
+    # sin factorizar los registros. Solo si esa tabla no es mayor que el propio dataframe
+
+    if isinstance(plantas.dtype, pd.CategoricalDtype) and isinstance(inverters.dtype, pd.CategoricalDtype) and \
+            len(plantas.cat.categories) * len(inverters.cat.categories) <= len(df):
+        todos = pd.MultiIndex.from_product([plantas.cat.categories, inverters.cat.categories])
+        codigo_planta = plantas.cat.codes.to_numpy().astype('int64')
+        codigo_inverter = inverters.cat.codes.to_numpy()
+        codigos = np.where((codigo_planta < 0) | (codigo_inverter < 0), -1, codigo_planta * len(inverters.cat.categories) + codigo_inverter)
+
+        return np.append(factores_inverters(calibracion, todos), 1.0)[codigos]
+
+    codigos, inverters = codigos_grupo(df, list(CLAVES))
+
+    # Los registros con alguna clave nula tienen código -1, que toma el último valor: un 1 añadido al final
+
+    return np.append(factores_inverters(calibracion, inverters), 1.0)[codigos]
+
+
+def corregir(columna, valores, factores):
+    """Valores de una columna de CALIBRADAS corregidos con los factores. Devuelve un array nuevo del mismo tipo (float32 si la columna está compactada)."""
+
+    if valores.dtype.kind == 'f':
+        factores = np.asarray(factores, dtype=valores.dtype)
+
+    return CALIBRADAS[columna](valores, factores)
@@ -0,0 +1,222 @@
+"""PERFIL DE CALIDAD DE DATOS EN UNA SOLA PASADA
+
+En la calidad de datos de analisis_planta_solar_datos.py revisamos cada uno de los 4 ficheros con una secuencia de info(), describe().T, nunique(), value_counts()
+y dt.date.value_counts().plot.bar(). Cada una de esas llamadas vuelve a recorrer el dataset completo, y con toda la flota además no cabe en memoria.
+
+Aquí calculamos todo el perfil recorriendo los datos una única vez, lote a lote (por ejemplo con leer_por_lotes de planta_solar/ingesta.py):
+
+- Por cada variable numérica: nulos, mínimo, máximo, media y desviación típica (las medias y varianzas de cada lote se combinan sin volver a leerlo)
+- Por cada variable categórica (planta, inverter_id, sensor_id): nulos y cardinalidad
+- Número de lecturas por día y por inverter (o sensor)
+- Distribución del ratio DC / AC por planta, como histograma de ancho fijo del que se sacan los percentiles
+
+El resultado es un diccionario de dataframes (ver PerfilCalidad.informe) que se puede imprimir o guardar.
+"""
+
+import numpy as np
+import pandas as pd
+
+from planta_solar.ingesta import TAMANO_LOTE, leer_por_lotes
+
+# Bordes del histograma del ratio DC / AC. Los ratios fuera del rango se cuentan en el primer o el último intervalo.
+# Con intervalos de 0.01 los percentiles tienen un error máximo de 0.01.
+
+BORDES_RATIO = np.linspace(0, 20, 2001)
+
+PERCENTILES = [0.05, 0.25, 0.5, 0.75, 0.95]
+
+# Nombres de las columnas para perfilar los csv tal cual se leen, sin renombrar (PerfilCalidad(**COLUMNAS_ORIGINALES))
+
+COLUMNAS_ORIGINALES = {'fecha': 'DATE_TIME', 'planta': 'PLANT_ID', 'clave': 'SOURCE_KEY', 'dc': 'DC_POWER', 'ac': 'AC_POWER'}
+
+
+class PerfilCalidad:
+    """Acumula el perfil de calidad de una fuente lote a lote.
+
+    fecha: columna con la fecha de la lectura
+    clave: columna con el identificador del equipo (None para usar inverter_id o sensor_id, el que exista)
+    dc, ac: columnas con la potencia DC y AC para el ratio (si no existen no se calcula)
+    """
+
+    def __init__(self, fecha='fecha', planta='planta', clave=None, dc='kw_dc', ac='kw_ac', bordes_ratio=BORDES_RATIO):
+        self.fecha = fecha
+        self.planta = planta
+        self.clave = clave
+        self.dc = dc
+        self.ac = ac
+        self.bordes_ratio = bordes_ratio
+
+        self.registros = 0
+        self.tipos = {}
+        self.numericas = {}
+        self.categoricas = {}
+        self.lecturas_dia = pd.Series(dtype='int64')
+        self.lecturas_clave = pd.Series(dtype='int64')
+        self.ratio = {}
+
+    def actualizar(self, lote):
+        """Incorpora un lote al perfil."""
+
+        if self.clave is None:
+            self.clave = 'inverter_id' if 'inverter_id' in lote.columns else 'sensor_id'
+
+        self.registros += len(lote)
+        self.tipos.update(lote.dtypes.astype(str).to_dict())
+
+        numericas = list(lote.select_dtypes('number').columns)
+        if numericas:
+            self._actualizar_numericas(numericas, lote[numericas].to_numpy(dtype='float64'))
+
+        for columna in lote.columns.difference(numericas + [self.fecha]):
+            acumulado = self.categoricas.setdefault(columna, {'nulos': 0, 'valores': set()})
+            acumulado['nulos'] += int(lote[columna].isna().sum())
+            acumulado['valores'].update(pd.unique(lote[columna].dropna()))
+
+        if self.fecha in lote.columns:
+            self._actualizar_fechas(lote)
+
+        if {self.dc, self.ac} <= set(lote.columns):
+            self._actualizar_ratio(lote)
+
+    def _actualizar_numericas(self, columnas, valores):
+
+        # Media y varianza de cada lote, que se combinan con las acumuladas (método de Chan),
+        # así no hace falta guardar los valores ni volver a recorrerlos
+
+        nulos = np.isnan(valores)
+        n = (~nulos).sum(axis=0)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            media = np.nansum(valores, axis=0) / n
+            m2 = np.nansum((valores - media) ** 2, axis=0)
+            minimo = np.where(n > 0, np.fmin.reduce(valores, axis=0), np.nan)
+            maximo = np.where(n > 0, np.fmax.reduce(valores, axis=0), np.nan)
+
+        for i, columna in enumerate(columnas):
+            if columna not in self.numericas:
+                self.numericas[columna] = {'nulos': 0, 'n': 0, 'media': 0.0, 'm2': 0.0, 'minimo': np.nan, 'maximo': np.nan}
+            acumulado = self.numericas[columna]
+
+            acumulado['nulos'] += int(nulos[:, i].sum())
+            acumulado['minimo'] = np.fmin(acumulado['minimo'], minimo[i])
+            acumulado['maximo'] = np.fmax(acumulado['maximo'], maximo[i])
+
+            if n[i] == 0:
+                continue
+
+            total = acumulado['n'] + n[i]
+            delta = media[i] - acumulado['media']
+            acumulado['media'] += delta * n[i] / total
+            acumulado['m2'] += m2[i] + delta ** 2 * acumulado['n'] * n[i] / total
+            acumulado['n'] = total
+
+    def _actualizar_fechas(self, lote):
+
+        fechas = lote[self.fecha]
+        acumulado = self.categoricas.setdefault(self.fecha, {'nulos': 0, 'minimo': pd.NaT, 'maximo': pd.NaT})
+        acumulado['nulos'] += int(fechas.isna().sum())
+        acumulado['minimo'] = min(filter(pd.notna, [acumulado['minimo'], fechas.min()]), default=pd.NaT)
+        acumulado['maximo'] = max(filter(pd.notna, [acumulado['maximo'], fechas.max()]), default=pd.NaT)
+
+        dias = fechas.dt.normalize().value_counts()
+        self.lecturas_dia = self.lecturas_dia.add(dias, fill_value=0).astype('int64')
+
+        claves = [columna for columna in (self.planta, self.clave) if columna in lote.columns]
+        if claves:
+            lecturas = lote.groupby(claves, observed=True).size()
+            self.lecturas_clave = lecturas if self.lecturas_clave.empty else \
+                self.lecturas_clave.add(lecturas, fill_value=0).astype('int64')
+
+    def _actualizar_ratio(self, lote):
+
+        dc = lote[self.dc].to_numpy(dtype='float64')
+        ac = lote[self.ac].to_numpy(dtype='float64')
+        validos = (ac > 0) & ~np.isnan(dc)
+
+        plantas = lote[self.planta].to_numpy() if self.planta in lote.columns else np.full(len(lote), None)
+        codigos, unicas = pd.factorize(plantas[validos])
+        ratios = dc[validos] / ac[validos]
+        recortados = np.clip(ratios, self.bordes_ratio[0], self.bordes_ratio[-1])
+
+        for codigo, planta in enumerate(unicas):
+            ratio = ratios[codigos == codigo]
+            acumulado = self.ratio.setdefault(planta, {'histograma': np.zeros(len(self.bordes_ratio) - 1, dtype='int64'),
+                                                       'n': 0, 'suma': 0.0, 'minimo': np.inf, 'maximo': -np.inf})
+            acumulado['histograma'] += np.histogram(recortados[codigos == codigo], self.bordes_ratio)[0]
+            acumulado['n'] += len(ratio)
+            acumulado['suma'] += ratio.sum()
+            acumulado['minimo'] = min(acumulado['minimo'], ratio.min())
+            acumulado['maximo'] = max(acumulado['maximo'], ratio.max())
+
+    def informe(self):
+        """Perfil acumulado como diccionario de dataframes:
+
+        registros: número total de registros
+        columnas: tipo, nulos, mínimo, máximo, media, desviación y cardinalidad de cada variable
+        lecturas_dia: número de lecturas por día
+        lecturas_clave: número de lecturas por planta e inverter (o sensor)
+        ratio_dc_ac: distribución del ratio DC / AC por planta (registros con AC mayor que cero)
+        """
+
+        filas = {}
+        for columna, acumulado in self.numericas.items():
+            filas[columna] = {'nulos': acumulado['nulos'],
+                              'minimo': acumulado['minimo'],
+                              'maximo': acumulado['maximo'],
+                              'media': acumulado['media'] if acumulado['n'] else np.nan,
+                              'desviacion': np.sqrt(acumulado['m2'] / (acumulado['n'] - 1)) if acumulado['n'] > 1 else np.nan}
+
+        for columna, acumulado in self.categoricas.items():
+            filas[columna] = {'nulos': acumulado['nulos'],
+                              'minimo': acumulado.get('minimo'),
+                              'maximo': acumulado.get('maximo'),
+                              'cardinalidad': len(acumulado['valores']) if 'valores' in acumulado else np.nan}
+
+        columnas = pd.DataFrame.from_dict(filas, orient='index')
+        columnas.insert(0, 'tipo', pd.Series(self.tipos))
+        columnas.insert(2, 'porcentaje_nulos', 100 * columnas.nulos / max(self.registros, 1))
+        columnas = columnas.reindex([columna for columna in self.tipos if columna in columnas.index])
+
+        return {'registros': self.registros,
+                'columnas': columnas,
+                'lecturas_dia': self.lecturas_dia.sort_index().rename('lecturas').rename_axis(self.fecha),
+                'lecturas_clave': self.lecturas_clave.sort_index().rename('lecturas'),
+                'ratio_dc_ac': self._informe_ratio()}
+
+    def _informe_ratio(self):
+
+        centros = (self.bordes_ratio[:-1] + self.bordes_ratio[1:]) / 2
+
+        filas = {}
+        for planta, acumulado in self.ratio.items():
+            fila = {'registros': acumulado['n'],
+                    'media': acumulado['suma'] / acumulado['n'] if acumulado['n'] else np.nan,
+                    'minimo': acumulado['minimo'],
+                    'maximo': acumulado['maximo']}
+
+            # Percentiles a partir del histograma: el centro del intervalo en el que la frecuencia acumulada supera el percentil
+
+            acumulada = np.cumsum(acumulado['histograma'])
+            for percentil in PERCENTILES:
+                posicion = np.searchsorted(acumulada, percentil * acumulada[-1]) if acumulada[-1] else None
+                fila[f'p{round(percentil * 100):02d}'] = centros[posicion] if posicion is not None else np.nan
+
+            filas[planta] = fila
+
+        return pd.DataFrame.from_dict(filas, orient='index').rename_axis(self.planta)
+
+
+def perfilar(datos, **opciones):
+    """Perfil de calidad de un dataframe o de un iterable de lotes (por ejemplo leer_por_lotes('p1_generacion'))."""
+
+    perfil = PerfilCalidad(**opciones)
+
+    for lote in [datos] if isinstance(datos, pd.DataFrame) else datos:
+        perfil.actualizar(lote)
+
+    return perfil.informe()
+
+
+def perfilar_fuente(fuente, tamano_lote=TAMANO_LOTE):
+    """Perfil de calidad de una fuente de FUENTES, leída por lotes ya limpios y renombrados."""
+
+    return perfilar(leer_por_lotes(fuente, tamano_lote))
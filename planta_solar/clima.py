@@ -0,0 +1,251 @@
+"""ESQUEMA EN ESTRELLA: CLIMA UNA VEZ POR PLANTA Y FECHA
+
+La integración (planta_solar/integracion.py) asigna a cada registro de generación la medición ambiental de su planta,
+así que sensor_id, irradiacion, t_ambiente y t_modulo se repiten en los 22 inverters de cada planta en cada fecha.
+Ocupan 22 veces lo necesario y para trabajar solo con el clima en analisis_planta_solar_insights.py había que quedarse con un inverter de cada planta.
+
+Aquí el datamart se guarda como un esquema en estrella:
+
+- Datos/datamart es la tabla de hechos de generación (un registro por fecha e inverter), sin las columnas del clima
+- Datos/datamart_clima es la tabla de clima, con un registro por planta y fecha: la medición que la integración asignó a los inverters de esa planta en esa fecha
+
+Las dos se unen por planta y fecha solo cuando se necesitan, con una Vista:
+
+- vista.clima es la tabla de clima, para los análisis que solo necesitan las variables ambientales
+- vista['irradiacion'] (o vista.irradiacion) es la columna del clima alineada con los registros de generación, calculada al pedirla
+- vista.unir() devuelve el dataframe de generación con las columnas del clima, como el datamart de antes
+- con una tabla de calibración (planta_solar/calibracion.py) kw_dc y eficiencia se corrigen al pedirlas, sin modificar la tabla de hechos
+
+La posición en la tabla de clima de cada registro de generación se calcula una sola vez, sin merge:
+una tabla fecha x planta con la fila del clima de cada combinación, en la que cada registro de generación busca su fecha y su planta.
+"""
+
+import numpy as np
+import pandas as pd
+
+from planta_solar.calibracion import CALIBRADAS, corregir, factores_registro
+from planta_solar.datamart import RUTA_DATAMART, cargar_datamart, existe_datamart, fusionar_datamart, guardar_datamart, leer_esquema
+from planta_solar.derivadas import ORDEN
+
+RUTA_DATAMART_CLIMA = 'Datos/datamart_clima'
+
+# Columnas de la tabla de clima además de la planta. Todas salen de la misma medición del sensor
+
+COLUMNAS_CLIMA = ['sensor_id', 'irradiacion', 't_ambiente', 't_modulo']
+
+
+def separar_clima(df):
+    """Separa el datamart (fecha en el index) en la tabla de hechos de generación y la de clima (un registro por planta y fecha con medición).
+
+    La tabla de clima mantiene el orden de df, así que sale ordenada por fecha dentro de cada planta si df lo estaba.
+    """
+
+    columnas = [columna for columna in COLUMNAS_CLIMA if columna in df.columns]
+    medidas = [columna for columna in columnas if columna != 'sensor_id']
+
+    # Cada planta y fecha como un único entero, que es mucho más rápido de deduplicar que las dos columnas
+
+    fechas, _ = pd.factorize(df.index.asi8)
+    plantas, unicas = pd.factorize(df.planta)
+    repetidos = pd.Series(fechas * (len(unicas) + 1) + plantas + 1).duplicated().to_numpy()
+    con_medicion = df[medidas].notna().to_numpy().any(axis=1)
+
+    clima = df.loc[~repetidos & con_medicion, ['planta'] + columnas]
+    if isinstance(clima.planta.dtype, pd.CategoricalDtype):
+        clima['planta'] = clima.planta.cat.remove_unused_categories()
+
+    return df.reindex(columns=[columna for columna in df.columns if columna not in columnas], copy=False), clima
+
+
+def codigos_planta(plantas, categorias):
+    """Posición de cada planta en categorias (-1 si no está), sin buscar valor a valor cuando la columna es categórica."""
+
+    if not isinstance(plantas.dtype, pd.CategoricalDtype):
+        return categorias.get_indexer(plantas)
+
+    codigos = categorias.get_indexer(plantas.cat.categories)[plantas.cat.codes.to_numpy()]
+    codigos[plantas.cat.codes.to_numpy() < 0] = -1
+
+    return codigos
+
+
+def posiciones_clima(hechos, clima):
+    """Fila de la tabla de clima de cada registro de generación (misma planta y fecha), -1 si no tiene clima."""
+
+    if not len(clima):
+        return np.full(len(hechos), -1, dtype='int64')
+
+    plantas = pd.Index(pd.unique(clima.planta.astype(str)))
+    fechas = pd.Index(np.unique(clima.index.asi8))
+
+    filas = np.full((len(fechas), len(plantas)), -1, dtype='int64')
+    filas[fechas.get_indexer(clima.index.asi8), codigos_planta(clima.planta, plantas)] = np.arange(len(clima))
+
+    fecha = fechas.get_indexer(hechos.index.asi8)
+    planta = codigos_planta(hechos.planta, plantas)
+
+    return np.where((fecha >= 0) & (planta >= 0), filas[fecha, planta], -1)
+
+
+def tomar(serie, posiciones):
+    """Valores de serie en las posiciones (nulo en las -1), conservando el tipo (las categóricas por sus códigos)."""
+
+    faltan = posiciones < 0
+
+    if isinstance(serie.dtype, pd.CategoricalDtype):
+        codigos = serie.cat.codes.to_numpy()[posiciones]
+        codigos[faltan] = -1
+        return pd.Categorical.from_codes(codigos, dtype=serie.dtype)
+
+    valores = serie.to_numpy()[posiciones]
+    if faltan.any():
+        valores = valores.astype('float64' if valores.dtype.kind in 'iub' else valores.dtype)
+        valores[faltan] = np.nan
+
+    return valores
+
+
+class Vista:
+    """Tabla de hechos de generación y tabla de clima unidas por planta y fecha sin replicar el clima.
+
+    hechos: datamart de generación (fecha en el index, con planta)
+    clima: tabla de clima (fecha en el index, con planta), o None si no hace falta
+    columnas: columnas que devuelve unir() por defecto (None para todas)
+    calibracion: tabla de calibración de la escala de DC, o None para no corregir kw_dc ni eficiencia
+    """
+
+    def __init__(self, hechos, clima=None, columnas=None, calibracion=None):
+        self.hechos = hechos
+        self.clima = clima
+        self.columnas = columnas
+        self.calibracion = calibracion
+        self._posiciones = None
+        self._factores = None
+
+    def __repr__(self):
+        return f'Vista({len(self.hechos)} registros de generación, {0 if self.clima is None else len(self.clima)} de clima)'
+
+    def __len__(self):
+        return len(self.hechos)
+
+    @property
+    def posiciones(self):
+        """Fila del clima de cada registro de generación. Se calcula la primera vez que se pide una columna del clima."""
+
+        if self._posiciones is None:
+            self._posiciones = posiciones_clima(self.hechos, self.clima)
+
+        return self._posiciones
+
+    @property
+    def factores(self):
+        """Factor de calibración de cada registro de generación. Se calcula la primera vez que se pide una columna calibrada."""
+
+        if self._factores is None:
+            self._factores = factores_registro(self.hechos, self.calibracion)
+
+        return self._factores
+
+    def calibrada(self, columna):
+        return self.calibracion is not None and columna in CALIBRADAS and columna in self.hechos.columns
+
+    def __getitem__(self, columna):
+        if self.calibrada(columna):
+            return pd.Series(corregir(columna, self.hechos[columna].to_numpy(), self.factores), index=self.hechos.index, name=columna)
+
+        if columna in self.hechos.columns:
+            return self.hechos[columna]
+
+        if self.clima is None or columna not in self.clima.columns:
+            raise KeyError(columna)
+
+        return pd.Series(tomar(self.clima[columna], self.posiciones), index=self.hechos.index, name=columna)
+
+    def __getattr__(self, columna):
+        if columna.startswith('_') or columna in ('hechos', 'clima', 'columnas', 'calibracion'):
+            raise AttributeError(columna)
+
+        try:
+            return self[columna]
+        except KeyError:
+            raise AttributeError(columna) from None
+
+    def unir(self, columnas=None):
+        """Dataframe de generación con las columnas pedidas de las dos tablas (las de generación no se copian, salvo las calibradas).
+
+        Sin columnas devuelve las de la vista, y si la vista no las fija todas, en el orden del proceso (ORDEN).
+        """
+
+        columnas = columnas or self.columnas
+        if columnas is None:
+            disponibles = list(self.hechos.columns) + [columna for columna in COLUMNAS_CLIMA
+                                                        if self.clima is not None and columna in self.clima.columns]
+            columnas = [columna for columna in ORDEN if columna in disponibles] + [columna for columna in disponibles if columna not in ORDEN]
+
+        df = self.hechos.reindex(columns=[columna for columna in columnas if columna in self.hechos.columns], copy=False)
+        for posicion, columna in enumerate(columnas):
+            if columna not in df.columns:
+                if self.clima is None or columna not in self.clima.columns:
+                    raise KeyError(columna)
+                df.insert(posicion, columna, tomar(self.clima[columna], self.posiciones))
+
+        # Asignar la columna corregida sustituye la del dataframe devuelto sin escribir en la tabla de hechos
+
+        for columna in list(df.columns):
+            if self.calibrada(columna):
+                df[columna] = corregir(columna, df[columna].to_numpy(), self.factores)
+
+        return df
+
+
+def guardar_estrella(df, ruta=RUTA_DATAMART, ruta_clima=RUTA_DATAMART_CLIMA):
+    """Guarda el datamart separado en la tabla de hechos de generación (ruta) y la de clima (ruta_clima)."""
+
+    hechos, clima = separar_clima(df)
+
+    guardar_datamart(hechos, ruta)
+    guardar_datamart(clima, ruta_clima)
+
+
+def fusionar_estrella(nuevo, ruta=RUTA_DATAMART, ruta_clima=RUTA_DATAMART_CLIMA):
+    """Añade los registros nuevos a las dos tablas reescribiendo solo las particiones afectadas (ver fusionar_datamart)."""
+
+    hechos, clima = separar_clima(nuevo)
+
+    fusionar_datamart(hechos, ruta)
+    if len(clima):
+        fusionar_datamart(clima, ruta_clima, claves=('planta',))
+
+
+def cargar_clima(ruta_clima=RUTA_DATAMART_CLIMA, columnas=None, desde=None, hasta=None, plantas=None):
+    """Tabla de clima: un registro por planta y fecha (mismos filtros que cargar_datamart)."""
+
+    return cargar_datamart(ruta_clima, columnas, desde, hasta, plantas)
+
+
+def cargar_vista(ruta=RUTA_DATAMART, ruta_clima=RUTA_DATAMART_CLIMA, columnas=None, desde=None, hasta=None, plantas=None, calibracion=None):
+    """Carga una Vista del datamart, con los mismos filtros que cargar_datamart.
+
+    columnas: columnas de cualquiera de las dos tablas (None para todas). La tabla de clima solo se lee si se pide alguna de sus columnas.
+    Si el datamart es anterior al esquema en estrella (tiene las columnas del clima y no hay tabla de clima) las toma de él.
+    calibracion: tabla de calibración (cargar_calibracion()) con la que corregir kw_dc y eficiencia al leerlas
+    """
+
+    guardadas = leer_esquema(ruta)['columnas']
+    pedidas = list(guardadas) + COLUMNAS_CLIMA if columnas is None else list(columnas)
+
+    de_hechos = [columna for columna in pedidas if columna in guardadas]
+    de_clima = [columna for columna in pedidas if columna not in guardadas]
+
+    # Para unir el clima hace falta la planta, y para calibrar la planta y el inverter
+
+    claves = (['planta'] if de_clima else []) + (['planta', 'inverter_id'] if calibracion is not None and set(CALIBRADAS) & set(de_hechos) else [])
+    hechos = cargar_datamart(ruta, list(dict.fromkeys(claves + de_hechos)), desde, hasta, plantas)
+
+    clima = None
+    if de_clima and existe_datamart(ruta_clima):
+        clima = cargar_clima(ruta_clima, ['planta'] + [columna for columna in de_clima if columna != 'planta'], desde, hasta, plantas)
+
+    disponibles = set(hechos.columns) | (set() if clima is None else set(clima.columns))
+
+    return Vista(hechos, clima, None if columnas is None else [columna for columna in pedidas if columna in disponibles], calibracion)
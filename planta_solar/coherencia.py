@@ -0,0 +1,99 @@
+"""ANÁLISIS DE COHERENCIA DE KW_DIA Y KW_TOTAL
+
+En la calidad de datos comprobábamos a mano que el incremento diario de kw_total coincide con el máximo de kw_dia del día anterior:
+copiando todo el dataset de generación, agregando por planta, día e inverter, ordenando, calculando el retardo con un groupby().shift(1) y revisando las 50 primeras filas.
+
+Aquí hacemos lo mismo en una sola pasada y sin copiar el dataset:
+
+- Codificamos cada inverter y cada día como enteros y ordenamos solo esos códigos
+- Agregamos por inverter y día con reduceat sobre las medidas ya ordenadas
+- El retardo se calcula desplazando los arrays diarios y comprobando que la fila anterior es del mismo inverter
+
+En vez de revisar filas a mano devolvemos una tabla con los inverters y días en los que el incremento no coincide.
+"""
+
+import numpy as np
+import pandas as pd
+
+# Diferencia máxima admitida entre el incremento de kw_total y kw_dia:
+# la mayor de una diferencia absoluta (en kw) y una relativa al propio kw_dia
+
+TOLERANCIA_ABSOLUTA = 1.0
+TOLERANCIA_RELATIVA = 0.01
+
+
+def desplazar(valores, grupos, pasos):
+    """Valor de pasos filas antes dentro del mismo grupo (NaN si la fila anterior es de otro grupo o no existe)."""
+
+    if pasos == 0:
+        return valores.astype('float64')
+
+    desplazado = np.full(len(valores), np.nan)
+    mismo = grupos[pasos:] == grupos[:-pasos]
+    desplazado[pasos:] = np.where(mismo, valores[:-pasos], np.nan)
+
+    return desplazado
+
+
+def coherencia_diaria(gener, desfase=1):
+    """Agrega la generación por planta, inverter y día y calcula el incremento diario de kw_total.
+
+    desfase: días de diferencia entre el incremento de kw_total y el kw_dia con el que se compara (1 para el día anterior)
+
+    Devuelve un registro por planta, inverter y día con la suma de kw_dc y kw_ac, el máximo de kw_dia y kw_total,
+    el incremento de kw_total respecto al día anterior, el kw_dia de referencia y la diferencia entre ambos.
+    """
+
+    codigos_planta, plantas = pd.factorize(gener.planta)
+    codigos_inverter, inverters = pd.factorize(gener.inverter_id)
+
+    inverter = codigos_planta.astype('int64') * len(inverters) + codigos_inverter
+    dia = gener.fecha.to_numpy().astype('datetime64[D]').astype('int64')
+
+    orden = np.lexsort((dia, inverter))
+    inverter = inverter[orden]
+    dia = dia[orden]
+
+    nuevo_grupo = np.empty(len(orden), dtype=bool)
+    nuevo_grupo[:1] = True
+    nuevo_grupo[1:] = (inverter[1:] != inverter[:-1]) | (dia[1:] != dia[:-1])
+    inicios = np.flatnonzero(nuevo_grupo)
+
+    def sumar(columna):
+        return np.add.reduceat(np.nan_to_num(gener[columna].to_numpy(dtype='float64')[orden]), inicios)
+
+    def maximo(columna):
+        return np.fmax.reduceat(gener[columna].to_numpy(dtype='float64')[orden], inicios)
+
+    inverter_dia = inverter[inicios]
+
+    diario = pd.DataFrame({'planta': plantas.take(inverter_dia // len(inverters)),
+                           'inverter_id': inverters.take(inverter_dia % len(inverters)),
+                           'fecha': dia[inicios].astype('datetime64[D]').astype('datetime64[ns]'),
+                           'kw_dc': sumar('kw_dc'),
+                           'kw_ac': sumar('kw_ac'),
+                           'kw_dia': maximo('kw_dia'),
+                           'kw_total': maximo('kw_total')})
+
+    diario['incremento'] = diario.kw_total.to_numpy() - desplazar(diario.kw_total.to_numpy(), inverter_dia, 1)
+    diario['kw_dia_referencia'] = desplazar(diario.kw_dia.to_numpy(), inverter_dia, desfase)
+    diario['diferencia'] = diario.incremento - diario.kw_dia_referencia
+
+    return diario
+
+
+def verificar_coherencia(gener, desfase=1, tolerancia_absoluta=TOLERANCIA_ABSOLUTA,
+                         tolerancia_relativa=TOLERANCIA_RELATIVA):
+    """Inverters y días en los que el incremento de kw_total no coincide con el kw_dia de referencia.
+
+    Los primeros días de cada inverter, que no tienen día anterior con el que comparar, no se consideran incoherentes.
+    """
+
+    diario = coherencia_diaria(gener, desfase)
+
+    tolerancia = np.maximum(tolerancia_absoluta, tolerancia_relativa * diario.kw_dia_referencia.abs())
+    incoherentes = diario.diferencia.abs() > tolerancia
+
+    return diario.loc[incoherentes, ['planta', 'inverter_id', 'fecha', 'kw_dia_referencia', 'incremento',
+                                     'diferencia']].reset_index(drop=True)
+
@@ -0,0 +1,147 @@
+"""COMPARACIÓN DE CADA INVERTER CON LOS DE SU PLANTA EN CADA MOMENTO
+
+En analisis_planta_solar_insights.py buscamos los inverters con problemas mirando rejillas de gráficos (unstack().plot(subplots=True)), uno por inverter o por día.
+Aquí comparamos en cada fecha la generación (kw_dc o kw_ac) de cada inverter con la mediana de los inverters de su planta en esa misma fecha:
+
+- Se construye una matriz fecha x inverter con la medida (NaN donde no hay lectura), o se toma directamente del cubo (planta_solar/cubo.py)
+- La mediana de cada planta se calcula para todas las fechas a la vez, sobre las columnas de sus inverters, sin agrupar por fecha
+- La desviación de cada lectura es valor / mediana - 1: -0.5 significa que el inverter genera la mitad que la mediana de su planta
+
+Las fechas en las que la mediana de la planta es muy baja (noche, amanecer) no se comparan, porque cualquier diferencia daría desviaciones enormes.
+Con la desviación de todas las fechas se ordenan los inverters de peor a mejor (ver clasificar).
+"""
+
+import numpy as np
+import pandas as pd
+
+from planta_solar.comun import CLAVES
+from planta_solar.cubo import Cubo, posiciones
+from planta_solar.instrumentacion import instrumentada
+
+# Fracción de la mediana máxima de la planta por debajo de la cual una fecha no se compara
+
+FRACCION_MINIMA = 0.05
+
+# Desviación a partir de la cual una lectura cuenta como baja (un 20% por debajo de la mediana de la planta)
+
+UMBRAL_BAJO = 0.2
+
+# Porcentaje de fechas con lecturas bajas a partir del cual un inverter se considera de bajo rendimiento
+
+PORCENTAJE_BAJO_MAXIMO = 5
+
+
+def matriz_inverters(df, medida, claves=CLAVES):
+    """Matriz fecha x inverter con la medida (fecha en el index de df).
+
+    Devuelve la matriz, las fechas (filas), los grupos de claves (columnas) y la fila y columna de cada registro de df.
+    """
+
+    filas, columnas, fechas, grupos = posiciones(df, claves)
+
+    valores = np.full((len(fechas), len(grupos)), np.nan)
+    valores[filas, columnas] = df[medida].to_numpy(dtype='float64')
+
+    return valores, fechas, grupos, (filas, columnas)
+
+
+def mediana_filas(valores):
+    """Mediana de cada fila ignorando los NaN, como np.nanmedian(valores, axis=1) pero con una única ordenación de la matriz.
+
+    np.sort deja los NaN al final de cada fila, así que la mediana está en el centro de los valores no nulos.
+    Sin columnas (o sin filas) no hay valores que ordenar: la mediana de cada fila es NaN.
+    """
+
+    if valores.size == 0:
+        return np.full(len(valores), np.nan)
+
+    ordenados = np.sort(valores, axis=1)
+    validos = (~np.isnan(valores)).sum(axis=1)
+    filas = np.arange(len(valores))
+
+    mediana = (ordenados[filas, np.maximum((validos - 1) // 2, 0)] + ordenados[filas, validos // 2 - (validos == 0)]) / 2
+    mediana[validos == 0] = np.nan
+
+    return mediana
+
+
+def medianas_planta(valores, grupos, fraccion_minima=FRACCION_MINIMA):
+    """Mediana de cada planta en cada fecha (matriz fecha x planta, NaN si la fecha no se compara) y la planta de cada columna de valores.
+
+    La primera clave de grupos debe ser la planta.
+    """
+
+    plantas = grupos.get_level_values(0) if isinstance(grupos, pd.MultiIndex) else grupos
+    codigos, unicas = pd.factorize(plantas)
+
+    medianas = np.empty((len(valores), len(unicas)))
+    for codigo in range(len(unicas)):
+        mediana = mediana_filas(valores[:, codigos == codigo])
+        mediana[mediana < fraccion_minima * np.nanmax(mediana, initial=0)] = np.nan
+        medianas[:, codigo] = mediana
+
+    return medianas, codigos
+
+
+def comparar(df, medida='kw_dc', claves=CLAVES, fraccion_minima=FRACCION_MINIMA):
+    """Mediana de la planta en la fecha y desviación respecto a ella de cada lectura del datamart.
+
+    Devuelve un dataframe con el mismo index que df, sin copiar df.
+    """
+
+    valores, _, grupos, (filas, columnas) = matriz_inverters(df, medida, claves)
+    medianas, plantas = medianas_planta(valores, grupos, fraccion_minima)
+
+    mediana = medianas[filas, plantas[columnas]]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        desviacion = df[medida].to_numpy(dtype='float64') / mediana - 1
+
+    return pd.DataFrame({'mediana_planta': mediana, 'desviacion': desviacion}, index=df.index)
+
+
+@instrumentada
+def clasificar(datos, medida='kw_dc', claves=CLAVES, fraccion_minima=FRACCION_MINIMA, umbral=UMBRAL_BAJO,
+               porcentaje_maximo=PORCENTAJE_BAJO_MAXIMO):
+    """Ordena los inverters de peor a mejor según su desviación media respecto a su planta.
+
+    datos: el datamart (fecha en el index) o un Cubo, del que se usa la matriz de la medida sin pivotar
+
+    Usamos la media y no la mediana porque los fallos intermitentes (como las paradas de DC de la planta 2) no mueven la mediana.
+    Devuelve un registro por inverter con las fechas comparadas, la desviación media y mediana,
+    el porcentaje de fechas en las que estaba más de umbral por debajo de la mediana de su planta y si es un inverter de bajo rendimiento
+    (ese porcentaje supera porcentaje_maximo).
+    """
+
+    if isinstance(datos, Cubo):
+        valores, grupos = datos.medida(medida).astype('float64'), datos.inverters
+    else:
+        valores, _, grupos, _ = matriz_inverters(datos, medida, claves)
+
+    # Sin fechas o sin inverters (un periodo o unas plantas sin datos) no hay nada que comparar: el ranking queda vacío
+
+    if valores.size == 0:
+        vacio = np.zeros(0)
+        return pd.DataFrame({'fechas_comparadas': vacio.astype('int64'),
+                             'desviacion_media': vacio,
+                             'desviacion_mediana': vacio,
+                             'porcentaje_bajo': vacio,
+                             'bajo_rendimiento': vacio.astype(bool)}, index=grupos[:0])
+
+    medianas, plantas = medianas_planta(valores, grupos, fraccion_minima)
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        desviacion = valores / medianas[:, plantas] - 1
+
+    comparadas = (~np.isnan(desviacion)).sum(axis=0)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mediana = mediana_filas(desviacion.T)
+        media = np.nanmean(desviacion, axis=0)
+        bajas = 100 * (desviacion < -umbral).sum(axis=0) / comparadas
+
+    ranking = pd.DataFrame({'fechas_comparadas': comparadas,
+                            'desviacion_media': media,
+                            'desviacion_mediana': mediana,
+                            'porcentaje_bajo': bajas,
+                            'bajo_rendimiento': bajas > porcentaje_maximo}, index=grupos)
+
+    return ranking.sort_values(['desviacion_media', 'porcentaje_bajo'], ascending=[True, False])
@@ -0,0 +1,56 @@
+"""UTILIDADES COMUNES DEL PAQUETE
+
+Claves, constantes y agrupación que usan varios módulos del paquete (agregacion, modelo, monitor, comparacion, cubo, rollup, calibracion).
+Están aquí y no en el primer módulo que las necesitó para que esos módulos no dependan unos de otros.
+"""
+
+import numpy as np
+import pandas as pd
+
+# Claves de un inverter en el datamart
+
+CLAVES = ('planta', 'inverter_id')
+
+# Eficiencia (%) esperada en un inverter que funciona bien
+
+EFICIENCIA_NOMINAL = 96
+
+
+def codigos_grupo(df, claves):
+    """Código de grupo de cada registro y los valores de las claves de cada grupo (ordenados).
+
+    Cada clave se factoriza por separado y se combina con las anteriores en un único entero,
+    que es mucho más rápido que factorizar un MultiIndex. Los registros con alguna clave nula quedan con código -1.
+    """
+
+    if len(claves) == 1:
+        codigos, grupos = pd.factorize(df[claves[0]], sort=True)
+        return codigos, pd.Index(grupos, name=claves[0])
+
+    codigo = np.zeros(len(df), dtype='int64')
+    nulos = np.zeros(len(df), dtype=bool)
+    factorizadas = []
+    for clave in claves:
+        codigos, valores = pd.factorize(df[clave], sort=True)
+        codigo = codigo * len(valores) + codigos
+        nulos |= codigos < 0
+        factorizadas.append(valores)
+
+    # Los códigos combinados van de 0 al producto de las cardinalidades, así que se compactan marcando los presentes sin ordenar
+
+    presentes = np.zeros(int(np.prod([len(valores) for valores in factorizadas])), dtype=bool)
+    codigo[nulos] = 0
+    presentes[codigo[~nulos]] = True
+    combinados = np.flatnonzero(presentes)
+
+    codigos = np.cumsum(presentes)[codigo] - 1
+    codigos[nulos] = -1
+
+    # Las claves de cada grupo se recuperan deshaciendo la combinación del código, empezando por la última
+
+    niveles = []
+    for valores in reversed(factorizadas):
+        combinados, codigos_clave = np.divmod(combinados, len(valores))
+        niveles.insert(0, valores.take(codigos_clave))
+
+    return codigos, pd.MultiIndex.from_arrays(niveles, names=list(claves))
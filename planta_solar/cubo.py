@@ -0,0 +1,211 @@
+"""CUBO MEDIDA x FECHA x INVERTER EN DISCO
+
+En analisis_planta_solar_insights.py pasamos muchas veces del formato largo del datamart (un registro por fecha e inverter) a formato ancho
+con groupby([...]).sum().unstack(...): dc_constante_p1, dc_constante_p2 o las rejillas de eficiencia por inverter.
+Cada una de esas pivotaciones vuelve a agrupar y reordenar todos los registros.
+
+Aquí guardamos el datamart una sola vez ya pivotado, como un array de NumPy de 3 dimensiones (medida, fecha, inverter) en float32:
+
+Datos/cubo/valores.npy    el cubo, con NaN donde no hay lectura
+Datos/cubo/fechas.npy     la fecha de cada posición del segundo eje (ordenadas)
+Datos/cubo/_indice.json   el nombre de cada medida, la planta y el inverter de cada posición del tercer eje y el orden de los ejes
+
+El cubo se abre con np.load(mmap_mode='r'): no se lee nada hasta que se usa y solo se leen del disco las páginas que se tocan.
+La medida es el primer eje, así que cada medida es un bloque contiguo del fichero: leer la DC no toca las páginas de las otras medidas.
+Los inverters se guardan ordenados por planta e inverter, así que:
+
+- Una medida es una vista contigua de 2 dimensiones (fecha x inverter) que se convierte en dataframe ancho sin copiarla
+- Un rango de fechas es un rango de filas de cada medida y una planta es un rango de columnas, y seleccionarlos no copia datos (son vistas)
+
+El cubo se reconstruye entero a partir del datamart (guardar_cubo), no se actualiza de forma incremental.
+cubo.calibrar(calibracion) devuelve el mismo cubo con kw_dc y eficiencia corregidas al leerlas (ver planta_solar/calibracion.py), sin tocar los valores guardados.
+"""
+
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from planta_solar.calibracion import CALIBRADAS, corregir, factores_inverters
+from planta_solar.comun import CLAVES, codigos_grupo
+
+RUTA_CUBO = 'Datos/cubo'
+
+# Medidas del cubo. kw_total no se incluye porque en float32 perdería los decimales (sus valores superan el millón)
+
+MEDIDAS = ['irradiacion', 't_ambiente', 't_modulo', 'kw_dc', 'kw_ac', 'eficiencia', 'kw_dia']
+
+FICHERO_VALORES = 'valores.npy'
+FICHERO_FECHAS = 'fechas.npy'
+FICHERO_INDICE = '_indice.json'
+
+# Orden de los ejes de valores.npy
+
+EJES = ['medida', 'fecha', 'inverter']
+
+
+def posiciones(df, claves=CLAVES):
+    """Posición de cada registro del datamart (fecha en el index) en los dos primeros ejes del cubo.
+
+    Devuelve la fila (fecha) y columna (inverter) de cada registro en la matriz de una medida, las fechas ordenadas y las claves de cada columna.
+    """
+
+    filas, fechas = pd.factorize(df.index.to_numpy().view('int64'), sort=True)
+    columnas, inverters = codigos_grupo(df, list(claves))
+
+    return filas, columnas, pd.DatetimeIndex(fechas.view(df.index.dtype), name=df.index.name), inverters
+
+
+class Cubo:
+    """Cubo medida x fecha x inverter con sus índices.
+
+    valores: array de 3 dimensiones (en memoria o mapeado del disco)
+    medidas: nombres del primer eje
+    fechas: DatetimeIndex del segundo eje
+    inverters: MultiIndex (planta, inverter_id) del tercer eje
+    factores: factor de calibración de la escala de DC de cada inverter, o None para no corregir
+    """
+
+    def __init__(self, valores, fechas, inverters, medidas, factores=None):
+        self.valores = valores
+        self.fechas = fechas
+        self.inverters = inverters
+        self.medidas = pd.Index(medidas)
+        self.factores = factores
+
+    def __repr__(self):
+        return (f'Cubo({len(self.fechas)} fechas x {len(self.inverters)} inverters x {len(self.medidas)} medidas, '
+                f'{self.fechas.min()} - {self.fechas.max()})')
+
+    def periodo(self, desde=None, hasta=None):
+        """Subcubo de un rango de fechas, con la misma semántica que loc['desde':'hasta']. No copia los valores."""
+
+        inicio = 0 if desde is None else self.fechas.searchsorted(pd.Period(desde).start_time, side='left')
+        fin = len(self.fechas) if hasta is None else self.fechas.searchsorted((pd.Period(hasta) + 1).start_time, side='left')
+
+        return Cubo(self.valores[:, inicio:fin], self.fechas[inicio:fin], self.inverters, self.medidas, self.factores)
+
+    def seleccionar(self, plantas=None, inverter_ids=None):
+        """Subcubo de unas plantas y/o unos inverters.
+
+        Si la selección es un rango contiguo de inverters (por ejemplo una sola planta) no copia los valores;
+        si no, NumPy tiene que copiar los inverters seleccionados.
+        """
+
+        seleccion = np.ones(len(self.inverters), dtype=bool)
+        if plantas is not None:
+            seleccion &= self.inverters.get_level_values(0).isin(np.atleast_1d(plantas))
+        if inverter_ids is not None:
+            seleccion &= self.inverters.get_level_values(1).isin(np.atleast_1d(inverter_ids))
+
+        columnas = np.flatnonzero(seleccion)
+        if len(columnas) and columnas[-1] - columnas[0] + 1 == len(columnas):
+            columnas = slice(columnas[0], columnas[-1] + 1)
+
+        return Cubo(self.valores[:, :, columnas], self.fechas, self.inverters[columnas], self.medidas,
+                    None if self.factores is None else self.factores[columnas])
+
+    def calibrar(self, calibracion):
+        """El mismo cubo con kw_dc y eficiencia corregidas con la tabla de calibración al leerlas (None para no corregir). No copia los valores."""
+
+        return Cubo(self.valores, self.fechas, self.inverters, self.medidas,
+                    None if calibracion is None else factores_inverters(calibracion, self.inverters))
+
+    def medida(self, nombre):
+        """Matriz fecha x inverter de una medida (vista del cubo, o una matriz nueva si es una medida calibrada)."""
+
+        valores = self.valores[self.medidas.get_loc(nombre)]
+        if self.factores is not None and nombre in CALIBRADAS:
+            return corregir(nombre, valores, self.factores)
+
+        return valores
+
+    def tabla(self, nombre):
+        """Dataframe ancho de una medida: fechas en el index y (planta, inverter_id) en las columnas.
+
+        Equivale a df.set_index(['planta','inverter_id'], append=True)[nombre].unstack(['planta','inverter_id']), sin pivotar.
+        """
+
+        return pd.DataFrame(self.medida(nombre), index=self.fechas, columns=self.inverters, copy=False)
+
+    def largo(self, medidas=None):
+        """Vuelve al formato largo del datamart (un registro por fecha e inverter con lectura), con las medidas pedidas."""
+
+        medidas = list(self.medidas if medidas is None else medidas)
+        valores = self.valores[[self.medidas.get_loc(medida) for medida in medidas]]
+
+        filas, columnas = np.nonzero(~np.isnan(valores).all(axis=0))
+        df = pd.DataFrame(valores[:, filas, columnas].T, columns=medidas, index=self.fechas[filas])
+        if self.factores is not None:
+            for medida in set(CALIBRADAS) & set(medidas):
+                df[medida] = corregir(medida, df[medida].to_numpy(), self.factores[columnas])
+        df.index.name = self.fechas.name
+        for nivel, nombre in enumerate(self.inverters.names):
+            df.insert(nivel, nombre, self.inverters.get_level_values(nivel)[columnas])
+
+        return df
+
+
+def construir_cubo(df, medidas=MEDIDAS, claves=CLAVES, ruta=None):
+    """Pivota el datamart (fecha en el index) a un cubo en una sola pasada por medida, que escribe el bloque contiguo de la medida.
+
+    Con ruta el cubo se escribe directamente en el disco (np.lib.format.open_memmap) sin tenerlo entero en memoria y se devuelve abierto para lectura.
+    """
+
+    medidas = [medida for medida in medidas if medida in df.columns]
+    filas, columnas, fechas, inverters = posiciones(df, claves)
+    forma = (len(medidas), len(fechas), len(inverters))
+
+    if ruta is None:
+        valores = np.full(forma, np.nan, dtype='float32')
+    else:
+        os.makedirs(ruta, exist_ok=True)
+        valores = np.lib.format.open_memmap(os.path.join(ruta, FICHERO_VALORES), mode='w+', dtype='float32', shape=forma)
+        valores[:] = np.nan
+
+    for posicion, medida in enumerate(medidas):
+        valores[posicion, filas, columnas] = df[medida].to_numpy(dtype='float32')
+
+    if ruta is None:
+        return Cubo(valores, fechas, inverters, medidas)
+
+    valores.flush()
+    del valores
+
+    np.save(os.path.join(ruta, FICHERO_FECHAS), fechas.to_numpy())
+    with open(os.path.join(ruta, FICHERO_INDICE), 'w') as f:
+        json.dump({'fecha': fechas.name,
+                   'claves': list(inverters.names),
+                   'inverters': [list(map(str, inverters.get_level_values(nivel))) for nivel in range(inverters.nlevels)],
+                   'medidas': medidas,
+                   'ejes': EJES}, f)
+
+    return abrir_cubo(ruta)
+
+
+def guardar_cubo(df, ruta=RUTA_CUBO, medidas=MEDIDAS, claves=CLAVES):
+    """Guarda el cubo del datamart en ruta, sustituyendo el que hubiera, y lo devuelve abierto para lectura."""
+
+    return construir_cubo(df, medidas, claves, ruta)
+
+
+def existe_cubo(ruta=RUTA_CUBO):
+    return os.path.exists(os.path.join(ruta, FICHERO_INDICE))
+
+
+def abrir_cubo(ruta=RUTA_CUBO, modo='r'):
+    """Abre el cubo guardado mapeándolo del disco (modo 'r' solo lectura, 'r+' lectura y escritura, 'c' copia en escritura)."""
+
+    with open(os.path.join(ruta, FICHERO_INDICE)) as f:
+        indice = json.load(f)
+
+    if indice.get('ejes') != EJES:
+        raise ValueError(f'El cubo de {ruta} tiene los ejes {indice.get("ejes")} y se esperan {EJES}: hay que reconstruirlo con guardar_cubo')
+
+    valores = np.load(os.path.join(ruta, FICHERO_VALORES), mmap_mode=modo)
+    fechas = pd.DatetimeIndex(np.load(os.path.join(ruta, FICHERO_FECHAS)), name=indice['fecha'])
+    inverters = pd.MultiIndex.from_arrays(indice['inverters'], names=indice['claves']) if len(indice['claves']) > 1 else \
+        pd.Index(indice['inverters'][0], name=indice['claves'][0])
+
+    return Cubo(valores, fechas, inverters, indice['medidas'])
@@ -0,0 +1,187 @@
+"""DATAMART COLUMNAR EN PARQUET
+
+Hasta ahora los scripts se pasaban los datos mediante Datos/df.pickle y Datos/df_dia.pickle.
+El pickle es cómodo pero obliga a deserializar el dataframe entero aunque solo necesitemos 3 columnas o 5 días.
+
+Aquí guardamos el datamart en Parquet, que es un formato columnar, particionado en carpetas por planta y por mes:
+
+Datos/datamart/planta=p1/periodo=2020-05/parte-0.parquet
+
+Dentro de cada fichero los registros se agrupan en bloques (row groups) de unos pocos días que guardan el mínimo y el máximo de la fecha.
+Particionar directamente por día generaría miles de ficheros diminutos con muchas plantas, y leerlos es más lento que leer pocos grandes.
+
+Esto nos da dos ventajas al cargar:
+
+- Proyección de columnas: solo se leen del disco las columnas que pedimos (por ejemplo irradiacion, t_ambiente, t_modulo sin kw_total)
+- Filtros sobre el almacenamiento: un rango de fechas como el loc['2020-06-01':'2020-06-05'] solo abre las carpetas de esos meses
+  y dentro de ellas solo los bloques que contienen esos días
+
+El dataframe que se guarda y se recupera tiene la misma forma que el del pickle: la fecha en el index y el resto como columnas.
+
+Para la actualización incremental fusionar_datamart() añade registros nuevos reescribiendo solo las particiones de las plantas y meses afectados.
+"""
+
+import json
+import os
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+RUTA_DATAMART = 'Datos/datamart'
+RUTA_DATAMART_DIA = 'Datos/datamart_dia'
+
+# Esquema de las carpetas de partición. El mes se llama periodo para no chocar con la variable mes del datamart
+
+PARTICIONES = ds.partitioning(pa.schema([('planta', pa.string()), ('periodo', pa.string())]), flavor='hive')
+
+# Registros por bloque dentro de cada fichero: unos 7 días de 22 inverters en ventanas de 15 minutos
+
+REGISTROS_BLOQUE = 16_384
+
+# Fichero donde guardamos el orden de las columnas, ya que las de partición no se guardan dentro de los parquet,
+# cuáles son categóricas, ya que la planta se recupera de las carpetas como texto,
+# y el tipo de cada columna, para que las particiones que se añadan después tengan los mismos tipos
+
+FICHERO_COLUMNAS = '_columnas.json'
+
+
+def guardar_datamart(df, ruta=RUTA_DATAMART):
+    """Guarda el dataframe (con la fecha en el index) particionado por planta y mes.
+
+    Solo se reescriben las particiones de los meses que vienen en df, el resto ya guardadas se mantienen.
+    Para que los filtros por fecha sean efectivos df debe venir ordenado por fecha dentro de cada planta, como el datamart.
+    """
+
+    tabla = pa.Table.from_pandas(df, preserve_index=True)
+    tabla = tabla.append_column('periodo', pc.strftime(tabla[df.index.name], '%Y-%m'))
+
+    pq.write_to_dataset(tabla,
+                        ruta,
+                        partitioning=PARTICIONES,
+                        existing_data_behavior='delete_matching',
+                        basename_template='parte-{i}.parquet',
+                        max_rows_per_group=REGISTROS_BLOQUE,
+                        min_rows_per_group=REGISTROS_BLOQUE)
+
+    with open(os.path.join(ruta, FICHERO_COLUMNAS), 'w') as f:
+        json.dump({'indice': df.index.name,
+                   'columnas': list(df.columns),
+                   'categoricas': list(df.select_dtypes('category').columns),
+                   'tipos': {columna: str(tipo) for columna, tipo in df.dtypes.items()}}, f)
+
+
+def existe_datamart(ruta=RUTA_DATAMART):
+    return os.path.exists(os.path.join(ruta, FICHERO_COLUMNAS))
+
+
+def leer_esquema(ruta=RUTA_DATAMART):
+    with open(os.path.join(ruta, FICHERO_COLUMNAS)) as f:
+        return json.load(f)
+
+
+def hasta_periodo(fin):
+    """Última partición que puede contener registros anteriores a fin (exclusivo)."""
+
+    return (fin - pd.Timedelta(microseconds=1)).strftime('%Y-%m')
+
+
+def filtro_fechas(desde=None, hasta=None, campo='fecha'):
+    """Construye el filtro de un rango de fechas con la misma semántica que el slice loc['desde':'hasta'].
+
+    Igual que en Pandas, una fecha sin hora incluye el día completo, por eso trabajamos con periodos (día, mes, minuto...).
+    Además del filtro sobre la fecha añadimos el del mes para que no se lleguen a abrir las particiones de fuera del rango.
+    """
+
+    filtro = None
+
+    if desde is not None:
+        inicio = pd.Period(desde).start_time
+        filtro = (ds.field('periodo') >= inicio.strftime('%Y-%m')) & (ds.field(campo) >= inicio.to_pydatetime())
+
+    if hasta is not None:
+        # Comparamos con el inicio del periodo siguiente para no depender de los nanosegundos de end_time
+        fin = (pd.Period(hasta) + 1).start_time
+        condicion = (ds.field('periodo') <= hasta_periodo(fin)) & (ds.field(campo) < fin.to_pydatetime())
+        filtro = condicion if filtro is None else filtro & condicion
+
+    return filtro
+
+
+def cargar_datamart(ruta=RUTA_DATAMART, columnas=None, desde=None, hasta=None, plantas=None):
+    """Carga el datamart con la fecha en el index.
+
+    Los registros salen agrupados por planta y mes y, dentro de cada mes, en el orden en que se guardaron.
+    Para el datamart horario eso equivale a ordenado por planta y fecha, igual que el pickle.
+
+    columnas: lista de columnas a leer (None para todas)
+    desde, hasta: rango de fechas, como en loc['2020-06-01':'2020-06-05']
+    plantas: lista de plantas a leer (None para todas)
+    """
+
+    esquema = leer_esquema(ruta)
+    indice = esquema['indice']
+
+    if columnas is None:
+        columnas = esquema['columnas']
+    columnas = list(columnas)
+
+    filtro = filtro_fechas(desde, hasta, campo=indice)
+    if plantas is not None:
+        condicion = ds.field('planta').isin(list(plantas))
+        filtro = condicion if filtro is None else filtro & condicion
+
+    dataset = ds.dataset(ruta, format='parquet', partitioning=PARTICIONES)
+    tabla = dataset.to_table(columns=[indice] + columnas, filter=filtro)
+
+    # self_destruct libera cada columna de Arrow según se convierte, así no tenemos los datos dos veces en memoria
+
+    df = tabla.to_pandas(ignore_metadata=True, split_blocks=True, self_destruct=True).set_index(indice)
+
+    for columna in esquema.get('categoricas', []):
+        if columna in df.columns and not isinstance(df[columna].dtype, pd.CategoricalDtype):
+            df[columna] = df[columna].astype('category')
+
+    return df
+
+
+def fusionar_datamart(nuevo, ruta=RUTA_DATAMART, claves=('planta', 'inverter_id')):
+    """Añade los registros de nuevo al datamart reescribiendo solo las particiones (planta y mes) en las que caen.
+
+    Si un registro ya existía (misma fecha y mismas claves) se queda el de nuevo.
+    Los registros fusionados toman los tipos guardados en el datamart, para que todas las particiones tengan el mismo esquema.
+    """
+
+    if not existe_datamart(ruta):
+        guardar_datamart(nuevo, ruta)
+        return
+
+    esquema = leer_esquema(ruta)
+    indice = esquema['indice']
+
+    periodos = nuevo.index.strftime('%Y-%m')
+    afectadas = pd.MultiIndex.from_arrays([nuevo.planta.astype(str), periodos]).unique()
+
+    viejo = cargar_datamart(ruta,
+                            plantas=afectadas.get_level_values(0).unique(),
+                            desde=periodos.min(),
+                            hasta=periodos.max())
+
+    # Al filtrar por plantas y rango de meses pueden venir combinaciones de planta y mes que no hay que reescribir
+
+    en_afectadas = pd.MultiIndex.from_arrays([viejo.planta.astype(str), viejo.index.strftime('%Y-%m')]).isin(afectadas)
+    viejo = viejo[en_afectadas]
+
+    combinado = pd.concat([viejo, nuevo[esquema['columnas']]]).reset_index()
+    combinado = combinado.drop_duplicates([indice] + list(claves), keep='last')
+    combinado = combinado.sort_values(indice, kind='stable').set_index(indice)
+
+    for columna in combinado.columns:
+        if columna in esquema['categoricas']:
+            combinado[columna] = combinado[columna].astype('category')
+        elif columna in esquema.get('tipos', {}):
+            combinado[columna] = combinado[columna].astype(esquema['tipos'][columna])
+
+    guardar_datamart(combinado, ruta)
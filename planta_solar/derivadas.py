@@ -0,0 +1,168 @@
+"""VARIABLES DERIVADAS DEL DATAMART
+
+Funciones de creación de variables de analisis_planta_solar_variables.py.
+Las tenemos en un módulo aparte para poder aplicarlas también a los registros nuevos en la actualización incremental.
+
+Además de las funciones originales hay una capa de variables derivadas accesible desde cualquier dataframe del datamart como df.derivadas:
+
+- Las variables se calculan solo la primera vez que se piden (df.derivadas.eficiencia, df.derivadas['hora'])
+- Los componentes de la fecha se memorizan con una huella del contenido del index, así que si se vuelve a cargar el mismo datamart no se recalculan,
+  y si llegan datos nuevos la huella cambia y se recalculan. La eficiencia no se memoriza: dividir kw_ac entre kw_dc cuesta menos que calcular su huella
+- Los resultados memorizados son de solo lectura (se comparten entre todos los dataframes con el mismo contenido) y la memoria que ocupan está limitada
+- df.derivadas.anadir() las incorpora como columnas nuevas sin copiar las que ya tiene el dataframe,
+  en vez del concat con reset_index() y set_index('fecha') que copiaba todo el dataframe
+"""
+
+import hashlib
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from planta_solar.instrumentacion import instrumentada
+
+# Orden del proceso: factores ambientales --> kw_dc --> kw ac
+
+ORDEN = ['planta', 'mes', 'dia', 'hora', 'minuto', 'sensor_id', 'irradiacion', 't_ambiente', 't_modulo',
+         'inverter_id', 'kw_dc', 'kw_ac', 'eficiencia', 'kw_dia', 'kw_total']
+
+
+# Componentes de la fecha del index como nuevas variables
+
+def componentes_fecha(dataframe):
+
+    mes = dataframe.index.month
+    dia = dataframe.index.day
+    hora = dataframe.index.hour
+    minuto = dataframe.index.minute
+
+    return(pd.DataFrame({'mes':mes, 'dia':dia, 'hora':hora, 'minuto':minuto}))
+
+
+# Porcentaje de DC que el inverter transforma a AC.
+# Si DC es cero el ratio da nulo, y como en ese caso AC también debería ser cero lo imputamos por cero.
+
+def eficiencia_inverter(AC,DC):
+    temp = AC / DC * 100
+    return(temp.fillna(0))
+
+
+# CAPA DE VARIABLES DERIVADAS
+
+# Cada variable: columnas de las que depende (None para el index), función que la calcula a partir del dataframe y si se memoriza.
+# Solo se memorizan las que cuesta más calcular que resumir: con 10 millones de registros la huella del index tarda unos 0,17 s
+# y cada componente de la fecha unos 0,25 s, mientras que la eficiencia se calcula en 0,06 s y la huella de kw_ac y kw_dc tarda 0,13 s.
+
+VARIABLES = {'mes': ([None], lambda df: df.index.month, True),
+             'dia': ([None], lambda df: df.index.day, True),
+             'hora': ([None], lambda df: df.index.hour, True),
+             'minuto': ([None], lambda df: df.index.minute, True),
+             'eficiencia': (['kw_ac', 'kw_dc'], lambda df: eficiencia_inverter(df.kw_ac, df.kw_dc), False)}
+
+# Memoria máxima de los resultados memorizados. Al superarla se descartan los que llevan más tiempo sin usarse,
+# y un resultado mayor que el límite no se memoriza.
+
+MAXIMO_CACHE_MB = 256
+
+CACHE = OrderedDict()
+
+
+def huella(df, columnas):
+    """Huella del contenido de las columnas (None para el index). Lee los bytes de los arrays sin copiarlos."""
+
+    resumen = hashlib.blake2b(digest_size=16)
+    resumen.update(str(len(df)).encode())
+
+    for columna in columnas:
+        valores = df.index if columna is None else df[columna]
+
+        # Los textos y categóricas no se pueden leer como bytes, así que se resumen antes con el hash de Pandas
+
+        if valores.dtype.kind not in 'biufmM':
+            valores = pd.util.hash_pandas_object(valores, index=False)
+
+        valores = np.ascontiguousarray(valores.to_numpy())
+        resumen.update(str(valores.dtype).encode())
+        resumen.update(valores.view('uint8'))
+
+    return resumen.hexdigest()
+
+
+def vaciar_cache():
+    CACHE.clear()
+
+
+def memorizar(clave, valores):
+    """Guarda los valores de solo lectura en CACHE y descarta los más antiguos hasta que la memoria vuelve a estar por debajo del límite."""
+
+    if valores.nbytes > MAXIMO_CACHE_MB * 1024 ** 2:
+        return
+
+    valores.setflags(write=False)
+    CACHE[clave] = valores
+
+    while sum(memorizados.nbytes for memorizados in CACHE.values()) > MAXIMO_CACHE_MB * 1024 ** 2:
+        CACHE.popitem(last=False)
+
+
+@pd.api.extensions.register_dataframe_accessor('derivadas')
+class Derivadas:
+    """Variables derivadas de un dataframe del datamart, calculadas bajo demanda y memorizadas por contenido."""
+
+    def __init__(self, df):
+        self._df = df
+
+    def __getattr__(self, variable):
+        if variable.startswith('_') or variable not in VARIABLES:
+            raise AttributeError(variable)
+        return self[variable]
+
+    def __getitem__(self, variable):
+        """Serie de la variable. Si está memorizada es de solo lectura: para modificarla hay que copiarla antes."""
+
+        return self._serie(variable, {})
+
+    def _serie(self, variable, huellas):
+        """huellas guarda las huellas ya calculadas en la misma llamada, para resumir el index una sola vez para los cuatro componentes de la fecha."""
+
+        if variable not in VARIABLES:
+            raise KeyError(f'{variable} no es una variable derivada. Disponibles: {list(VARIABLES)}')
+
+        columnas, funcion, memorizada = VARIABLES[variable]
+
+        if not memorizada:
+            return pd.Series(np.asarray(funcion(self._df)), index=self._df.index, name=variable)
+
+        if tuple(columnas) not in huellas:
+            huellas[tuple(columnas)] = huella(self._df, columnas)
+        clave = (variable, huellas[tuple(columnas)])
+
+        if clave in CACHE:
+            CACHE.move_to_end(clave)
+            valores = CACHE[clave]
+        else:
+            valores = np.asarray(funcion(self._df))
+            memorizar(clave, valores)
+
+        return pd.Series(valores, index=self._df.index, name=variable, copy=False)
+
+    def anadir(self, *variables):
+        """Añade las variables (todas si no se indica ninguna) como columnas del propio dataframe y lo devuelve.
+
+        Al asignarlas como columnas Pandas las copia, así que las columnas añadidas se pueden modificar sin tocar lo memorizado.
+        """
+
+        huellas = {}
+        for variable in variables or VARIABLES:
+            self._df[variable] = self._serie(variable, huellas)
+
+        return self._df
+
+
+@instrumentada
+def crear_variables(df):
+    """Añade los componentes de la fecha y la eficiencia, y ordena las columnas según el proceso."""
+
+    df = df.copy(deep=False).derivadas.anadir()
+
+    return df.reindex(columns=ORDEN, copy=False)
@@ -0,0 +1,58 @@
+"""CONVERSIÓN RÁPIDA DE FECHAS CON FORMATO EXPLÍCITO
+
+En la calidad de datos convertíamos DATE_TIME con pd.to_datetime, con dayfirst=True en la generación de la planta 1 y dejando que Pandas infiera el formato en el resto.
+Esto tiene dos problemas:
+
+- Es de los pasos más lentos con ficheros de millones de registros
+- Si el formato se infiere mal, una fecha como 06-05-2020 puede leerse como 5 de Junio en vez de 6 de Mayo sin que nadie se entere
+
+Por eso cada fuente declara su formato exacto en FUENTES (planta_solar/ingesta.py) y aquí lo aplicamos:
+
+- Cada ventana de 15 minutos se repite una vez por inverter, así que solo convertimos los textos únicos y después los expandimos
+- Los registros que no cumplen el formato no se interpretan de otra forma, se devuelven aparte para poder revisarlos
+"""
+
+import pandas as pd
+
+from planta_solar.instrumentacion import instrumentada
+
+
+@instrumentada
+def convertir_fechas(textos, formato):
+    """Convierte una serie de textos a datetime con un formato exacto.
+
+    Devuelve la serie convertida (NaT donde el texto no cumple el formato) y un dataframe con los registros que no lo cumplen.
+    """
+
+    codigos, unicos = pd.factorize(textos)
+
+    convertidas = pd.DatetimeIndex(pd.to_datetime(unicos, format=formato, errors='coerce'))
+
+    # Los textos nulos tienen código -1, que take convierte en NaT
+
+    fechas = pd.Series(convertidas.take(codigos, allow_fill=True, fill_value=pd.NaT),
+                       index=textos.index,
+                       name=textos.name)
+
+    return fechas, no_validas(textos, fechas, formato)
+
+
+def no_validas(textos, fechas, formato):
+    """Registros cuyo texto no se ha podido convertir con el formato."""
+
+    fallos = fechas.isna()
+
+    return pd.DataFrame({'valor': textos[fallos], 'formato': formato})
+
+
+def resumen_fechas(informes):
+    """Resumen de una lista de dataframes de no_validas: número de fallos y algunos ejemplos por fuente y formato."""
+
+    if not informes:
+        return pd.DataFrame(columns=['registros', 'ejemplos'])
+
+    fallos = pd.concat(informes)
+    claves = [clave for clave in ('fuente', 'formato') if clave in fallos.columns]
+
+    return fallos.groupby(claves, dropna=False).valor.agg(registros='size',
+                                                         ejemplos=lambda v: list(v.drop_duplicates()[:5]))
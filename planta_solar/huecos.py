@@ -0,0 +1,119 @@
+"""DETECCIÓN DE HUECOS EN LA MALLA DE 15 MINUTOS
+
+En la calidad de datos veíamos a ojo en los gráficos de barras que algunos días (como el 21/05 o el 29/05) tienen menos mediciones,
+y con value_counts que 4 inverters de la planta 2 tienen unas 800 mediciones menos que el resto. Pero no sabíamos cuándo faltan.
+
+Cada inverter y cada sensor debería tener una lectura cada 15 minutos. Aquí comparamos cada serie con esa malla y devolvemos los huecos
+como intervalos (inicio, fin y número de lecturas que faltan), sin bucles por serie:
+
+- Codificamos cada serie (planta e inverter o sensor) como un entero y ordenamos una sola vez por serie y fecha
+- La diferencia entre cada fecha y la anterior de la misma serie nos dice cuántas lecturas faltan entre ambas
+- Opcionalmente también se detectan los huecos al principio y al final del período esperado
+
+Las fechas se suponen alineadas con la malla (00:00, 00:15, ...), como en los ficheros de las plantas.
+"""
+
+import numpy as np
+import pandas as pd
+
+FRECUENCIA = '15min'
+
+
+def detectar_huecos(df, clave='inverter_id', fecha='fecha', planta='planta', frecuencia=FRECUENCIA, desde=None, hasta=None):
+    """Huecos de cada serie (planta y clave) respecto a la malla de la frecuencia.
+
+    La fecha puede ser una columna o el index.
+    desde, hasta: período en el que se espera que haya lecturas. Si se indican también se detectan los huecos al principio y al final de cada serie
+    (None para considerar solo los huecos entre la primera y la última lectura de cada serie)
+
+    Devuelve un registro por hueco con la planta, la clave, la primera y la última lectura que faltan, el número de lecturas que faltan y la duración.
+    """
+
+    paso = pd.Timedelta(frecuencia).value
+
+    fechas = df.index if fecha == df.index.name else df[fecha]
+    tiempos = np.asarray(fechas, dtype='datetime64[ns]').view('int64')
+
+    codigos_planta, plantas = pd.factorize(df[planta])
+    codigos_clave, claves = pd.factorize(df[clave])
+    serie = codigos_planta.astype('int64') * len(claves) + codigos_clave
+
+    orden = np.lexsort((tiempos, serie))
+    serie = serie[orden]
+    tiempos = tiempos[orden]
+
+    # Huecos entre lecturas consecutivas de la misma serie
+
+    misma_serie = serie[1:] == serie[:-1]
+    saltos = np.flatnonzero(misma_serie & (tiempos[1:] - tiempos[:-1] > paso))
+
+    series = [serie[saltos]]
+    inicios = [tiempos[saltos] + paso]
+    fines = [tiempos[saltos + 1] - paso]
+
+    # Huecos al principio y al final del período esperado, desde la primera y la última lectura de cada serie (ninguna si no hay lecturas)
+
+    primera = np.empty(len(serie), dtype=bool)
+    primera[:1] = True
+    primera[1:] = ~misma_serie
+
+    ultima = np.empty(len(serie), dtype=bool)
+    ultima[-1:] = True
+    ultima[:-1] = ~misma_serie
+
+    primeras = np.flatnonzero(primera)
+    ultimas = np.flatnonzero(ultima)
+
+    if desde is not None:
+        desde = pd.Timestamp(desde).value
+        tarde = primeras[tiempos[primeras] > desde]
+        series.append(serie[tarde])
+        inicios.append(np.full(len(tarde), desde))
+        fines.append(tiempos[tarde] - paso)
+
+    if hasta is not None:
+        hasta = pd.Timestamp(hasta).value
+        pronto = ultimas[tiempos[ultimas] < hasta]
+        series.append(serie[pronto])
+        inicios.append(tiempos[pronto] + paso)
+        fines.append(np.full(len(pronto), hasta))
+
+    series = np.concatenate(series)
+    inicios = np.concatenate(inicios)
+    fines = np.concatenate(fines)
+
+    huecos = pd.DataFrame({planta: plantas.take(series // len(claves)),
+                           clave: claves.take(series % len(claves)),
+                           'inicio': inicios.astype('datetime64[ns]'),
+                           'fin': fines.astype('datetime64[ns]'),
+                           'lecturas_faltantes': (fines - inicios) // paso + 1})
+    huecos['duracion'] = huecos.fin - huecos.inicio + pd.Timedelta(frecuencia)
+
+    return huecos.sort_values([planta, clave, 'inicio'], ignore_index=True)
+
+
+def faltantes_por_dia(huecos, frecuencia=FRECUENCIA, planta='planta'):
+    """Número de lecturas que faltan por planta y día, repartiendo entre días los huecos que pasan de un día a otro.
+
+    Sirve para localizar días como el 21/05, con menos mediciones que el resto.
+    """
+
+    paso = pd.Timedelta(frecuencia)
+
+    dia_inicio = huecos.inicio.dt.normalize()
+    dias = ((huecos.fin.dt.normalize() - dia_inicio) // pd.Timedelta('1D')).to_numpy() + 1
+
+    # Un registro por hueco y día que ocupa
+
+    fila = np.repeat(np.arange(len(huecos)), dias)
+    desplazamiento = np.arange(len(fila)) - np.repeat(np.cumsum(dias) - dias, dias)
+    dia = dia_inicio.to_numpy()[fila] + desplazamiento * np.timedelta64(1, 'D')
+
+    inicio = np.maximum(huecos.inicio.to_numpy()[fila], dia)
+    fin = np.minimum(huecos.fin.to_numpy()[fila], dia + np.timedelta64(1, 'D') - paso.to_timedelta64())
+
+    faltantes = pd.DataFrame({planta: huecos[planta].to_numpy()[fila],
+                              'dia': dia,
+                              'lecturas_faltantes': (fin - inicio) // paso.to_timedelta64() + 1})
+
+    return faltantes.groupby([planta, 'dia'], observed=True).lecturas_faltantes.sum().reset_index()
@@ -0,0 +1,181 @@
+"""ACTUALIZACIÓN INCREMENTAL DEL DATAMART
+
+Con un día más de lecturas no tiene sentido volver a ejecutar analisis_planta_solar_datos.py y analisis_planta_solar_variables.py de principio a fin:
+releer todos los csv, volver a integrarlo todo, recalcular la eficiencia y volver a agregar df_dia.
+
+Aquí guardamos una marca de agua (la última fecha ya incorporada) por planta para los sensores y por inverter para la generación, y en cada actualización:
+
+- Leemos los csv por lotes y nos quedamos solo con los registros posteriores a la marca de agua
+- Integramos y creamos las variables derivadas solo para esos registros
+- Los añadimos a la generación y al clima del datamart (planta_solar/clima.py) reescribiendo solo las particiones de las plantas y meses afectados
+- Recalculamos en df_dia solo los días afectados
+- Combinamos el rollup horario de los registros nuevos con el guardado (planta_solar/rollup.py), si existe
+- Avanzamos las marcas de agua
+
+Si no existe el fichero de marcas pero sí el datamart (por ejemplo porque se construyó con los scripts) las marcas se calculan a partir del datamart.
+"""
+
+import json
+import os
+
+import pandas as pd
+
+from planta_solar.agregacion import agregar_diario
+from planta_solar.clima import RUTA_DATAMART_CLIMA, cargar_vista, fusionar_estrella
+from planta_solar.datamart import RUTA_DATAMART, RUTA_DATAMART_DIA, existe_datamart, fusionar_datamart
+from planta_solar.derivadas import crear_variables
+from planta_solar.ingesta import FUENTES, leer_fuentes
+from planta_solar.integracion import TOLERANCIA, integrar
+from planta_solar.rollup import RUTA_ROLLUP, actualizar_rollup
+from planta_solar.tipos import compactar_tipos
+
+RUTA_MARCAS = 'Datos/marcas_agua.json'
+
+
+def marcas_desde_datamart(ruta=RUTA_DATAMART, ruta_clima=RUTA_DATAMART_CLIMA):
+    """Calcula las marcas de agua a partir del datamart, leyendo solo las columnas necesarias."""
+
+    df = cargar_vista(ruta, ruta_clima, columnas=['planta', 'inverter_id', 'irradiacion']).unir().reset_index()
+    df['planta'] = df.planta.astype(str)
+    df['inverter_id'] = df.inverter_id.astype(str)
+
+    inverters = df.groupby(['planta', 'inverter_id']).fecha.max()
+    plantas = df[df.irradiacion.notna()].groupby('planta').fecha.max()
+
+    return {'plantas': plantas, 'inverters': inverters}
+
+
+def cargar_marcas(ruta_marcas=RUTA_MARCAS, ruta=RUTA_DATAMART, ruta_clima=RUTA_DATAMART_CLIMA):
+    """Marcas de agua como dos series: por planta y por (planta, inverter_id)."""
+
+    if not os.path.exists(ruta_marcas):
+        if existe_datamart(ruta):
+            return marcas_desde_datamart(ruta, ruta_clima)
+        return {'plantas': pd.Series(dtype='datetime64[ns]'),
+                'inverters': pd.Series(dtype='datetime64[ns]',
+                                       index=pd.MultiIndex.from_tuples([], names=['planta', 'inverter_id']))}
+
+    with open(ruta_marcas) as f:
+        marcas = json.load(f)
+
+    plantas = pd.to_datetime(pd.Series(marcas['plantas'], dtype=object))
+    inverters = pd.to_datetime(pd.Series({(planta, inverter): fecha
+                                          for planta, fechas in marcas['inverters'].items()
+                                          for inverter, fecha in fechas.items()}, dtype=object))
+    plantas.index.name = 'planta'
+    inverters.index.names = ['planta', 'inverter_id']
+
+    return {'plantas': plantas, 'inverters': inverters}
+
+
+def guardar_marcas(marcas, ruta_marcas=RUTA_MARCAS):
+
+    inverters = {}
+    for (planta, inverter), fecha in marcas['inverters'].items():
+        inverters.setdefault(planta, {})[inverter] = fecha.isoformat()
+
+    with open(ruta_marcas, 'w') as f:
+        json.dump({'plantas': {planta: fecha.isoformat() for planta, fecha in marcas['plantas'].items()},
+                   'inverters': inverters}, f, indent=1)
+
+
+def posteriores(lotes, marcas, claves, margen=None):
+    """Concatena los registros de los lotes posteriores a la marca de agua de sus claves.
+
+    Las claves que no tienen marca (plantas o inverters nuevos) se incorporan completas.
+    margen: se incorporan también los registros hasta margen antes de la marca
+    Sin lotes (ninguna fuente) devuelve un dataframe vacío con las claves y la fecha.
+    """
+
+    if margen is not None:
+        marcas = marcas - pd.Timedelta(margen)
+
+    nuevos = []
+    for lote in lotes:
+        if len(claves) == 1:
+            claves_lote = lote[claves[0]]
+        else:
+            claves_lote = pd.MultiIndex.from_frame(lote[claves])
+
+        marca = marcas.reindex(claves_lote).to_numpy()
+        nuevos.append(lote[pd.isna(marca) | (lote.fecha.to_numpy() > marca)])
+
+    if not nuevos:
+        return pd.DataFrame(columns=list(claves) + ['fecha'])
+
+    return pd.concat(nuevos, ignore_index=True)
+
+
+def avanzar_marcas(marcas, gener, temper):
+    """Marcas de agua con las últimas fechas incorporadas. Las plantas e inverters sin registros nuevos conservan su marca."""
+
+    inverters = gener.groupby(['planta', 'inverter_id']).fecha.max()
+    plantas = temper.groupby('planta').fecha.max()
+
+    return {'plantas': pd.concat([marcas['plantas'], plantas]).groupby(level=0).max(),
+            'inverters': pd.concat([marcas['inverters'], inverters]).groupby(level=[0, 1]).max()}
+
+
+def actualizar_dia(nuevo, ruta=RUTA_DATAMART, ruta_dia=RUTA_DATAMART_DIA, ruta_clima=RUTA_DATAMART_CLIMA):
+    """Recalcula df_dia solo para los días (por planta e inverter) en los que hay registros nuevos."""
+
+    dias = nuevo.index.normalize()
+    afectados = pd.MultiIndex.from_arrays([nuevo.planta.astype(str), nuevo.inverter_id.astype(str), dias]).unique()
+
+    # Los días afectados se recalculan completos, con los registros que ya había y los nuevos
+
+    df = cargar_vista(ruta,
+                      ruta_clima,
+                      plantas=afectados.get_level_values(0).unique(),
+                      desde=dias.min().strftime('%Y-%m-%d'),
+                      hasta=dias.max().strftime('%Y-%m-%d')).unir()
+
+    df_dia = agregar_diario(df)
+
+    # Nos quedamos solo con las combinaciones afectadas (resample también rellena los días intermedios)
+
+    claves = pd.MultiIndex.from_arrays([df_dia.planta.astype(str), df_dia.inverter_id.astype(str), df_dia.index])
+    df_dia = df_dia[claves.isin(afectados)]
+
+    fusionar_datamart(df_dia, ruta_dia)
+
+    return len(df_dia)
+
+
+def actualizar(fuentes_generacion, fuentes_sensor, ruta=RUTA_DATAMART, ruta_dia=RUTA_DATAMART_DIA,
+               ruta_marcas=RUTA_MARCAS, tolerancia=TOLERANCIA, ruta_rollup=RUTA_ROLLUP, ruta_clima=RUTA_DATAMART_CLIMA):
+    """Incorpora al datamart (generación y clima), a df_dia y al rollup (si existe) los registros de las fuentes posteriores a las marcas de agua.
+
+    Devuelve un informe con los registros nuevos, los días recalculados, las horas del rollup actualizadas y los registros sin medición ambiental.
+    """
+
+    marcas = cargar_marcas(ruta_marcas, ruta, ruta_clima)
+
+    gener = posteriores(leer_fuentes(fuentes_generacion), marcas['inverters'], ['planta', 'inverter_id'])
+
+    if gener.empty:
+        return {'registros_nuevos': 0, 'dias_recalculados': 0, 'horas_rollup': 0, 'no_emparejados': None}
+
+    # De los sensores necesitamos también las mediciones de la última ventana ya incorporada,
+    # por si son las más cercanas a los primeros registros nuevos de generación
+
+    temper = posteriores(leer_fuentes(fuentes_sensor), marcas['plantas'], ['planta'], margen=tolerancia)
+
+    df, no_emparejados = integrar(gener, temper, tolerancia)
+
+    df = crear_variables(df.set_index('fecha'))
+    df, _ = compactar_tipos(df)
+
+    fusionar_estrella(df, ruta, ruta_clima)
+    dias = actualizar_dia(df, ruta, ruta_dia, ruta_clima)
+    horas = actualizar_rollup(df, ruta_rollup) if existe_datamart(ruta_rollup) else 0
+
+    guardar_marcas(avanzar_marcas(marcas, gener, temper), ruta_marcas)
+
+    return {'registros_nuevos': len(df), 'dias_recalculados': dias, 'horas_rollup': horas, 'no_emparejados': no_emparejados}
+
+
+def fuentes_de_tipo(tipo, plantas=None):
+    """Fuentes registradas en FUENTES de un tipo ('generacion' o 'sensor'), de las plantas indicadas (None para todas)."""
+
+    return [fuente for fuente, config in FUENTES.items() if config['tipo'] == tipo and (plantas is None or config['planta'] in plantas)]
@@ -0,0 +1,253 @@
+"""INFORME DE LA FLOTA EN FICHEROS, SIN PANTALLA
+
+Los scripts dibujan decenas de gráficos uno detrás de otro para verlos en Jupyter: rejillas de subplots por día (layout=(17,2)),
+pairplots y scatterplots sobre todos los registros del datamart... Con 40 plantas eso son horas.
+
+Aquí generamos un informe con los gráficos principales de cada planta guardados en ficheros (png por defecto) y un indice.html para verlos:
+
+- Cada planta es una tarea de un ProcessPoolExecutor, que lee solo sus datos: su parte del cubo (mapeado del disco, sin copiarlo) y sus particiones del rollup
+- Las figuras se crean con matplotlib.figure.Figure, que dibuja con el backend Agg sin pasar por pyplot, así que no hace falta pantalla
+  ni se acumulan figuras abiertas en los procesos
+- Los scatterplots de todas las lecturas (irradiación frente a DC, DC frente a AC, variables ambientales) se dibujan como hexbin:
+  el coste de dibujar no depende del número de puntos y se ve la densidad
+- Las rejillas de un subplot por día o por inverter se sustituyen por un mapa de calor (una sola imagen en vez de 34 ejes)
+
+Necesita el cubo y el rollup que guarda analisis_planta_solar_variables.py.
+Si hay tabla de calibración (planta_solar/calibracion.py) kw_dc y eficiencia se dibujan corregidas.
+
+Uso desde la raíz del repositorio:
+
+python -m planta_solar.informe
+"""
+
+import html
+import os
+import time
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from planta_solar.calibracion import RUTA_CALIBRACION, cargar_calibracion, factores_registro
+from planta_solar.comparacion import clasificar
+from planta_solar.cubo import RUTA_CUBO, abrir_cubo
+from planta_solar.rollup import RUTA_ROLLUP, cargar_rollup, perfil
+
+CARPETA_INFORME = 'Informe'
+
+FORMATO = 'png'
+
+# Resolución de las imágenes y número de hexágonos en el eje x de los hexbin
+
+DPI = 80
+HEXAGONOS = 60
+
+
+def nueva_figura(filas=1, columnas=1, tamano=(12, 5)):
+    """Figura fuera de pyplot (se dibuja con Agg) y sus ejes."""
+
+    from matplotlib.figure import Figure
+
+    figura = Figure(figsize=tamano, dpi=DPI)
+    return figura, figura.subplots(filas, columnas, squeeze=False).ravel()
+
+
+def hexbin(ax, x, y, titulo, etiqueta_x, etiqueta_y):
+    """Densidad de puntos con hexágonos, descartando los pares con algún nulo."""
+
+    validos = ~(np.isnan(x) | np.isnan(y))
+    if validos.any():
+        ax.hexbin(x[validos], y[validos], gridsize=HEXAGONOS, bins='log', mincnt=1, cmap='viridis')
+    ax.set_title(titulo)
+    ax.set_xlabel(etiqueta_x)
+    ax.set_ylabel(etiqueta_y)
+
+
+def mapa_calor(figura, ax, tabla, titulo, etiqueta):
+    """Mapa de calor de una tabla (filas en el eje y, columnas en el eje x)."""
+
+    imagen = ax.imshow(tabla.to_numpy(dtype='float64'), aspect='auto', interpolation='nearest', cmap='viridis')
+    paso = max(len(tabla.columns) // 20, 1)
+    ax.set_xticks(range(0, len(tabla.columns), paso))
+    ax.set_xticklabels([str(columna) for columna in tabla.columns[::paso]], rotation=90, fontsize=7)
+    ax.set_yticks(range(len(tabla.index)))
+    ax.set_yticklabels([str(fila) for fila in tabla.index], fontsize=7)
+    ax.set_title(titulo)
+    figura.colorbar(imagen, ax=ax, label=etiqueta)
+
+
+def ambiente_planta(cubo):
+    """Medidas ambientales de la planta en cada fecha. Se repiten en todos sus inverters, así que basta la media entre ellos."""
+
+    # nanmean avisa de las fechas sin ninguna lectura, que quedan a nulo
+
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', RuntimeWarning)
+        return {medida: np.nanmean(cubo.medida(medida), axis=1) for medida in ('irradiacion', 't_ambiente', 't_modulo')}
+
+
+def figura_perfil_horario(cubo, rollup):
+    figura, ejes = nueva_figura(1, 3, (18, 4))
+    for ax, medida in zip(ejes, ['irradiacion', 't_ambiente', 't_modulo']):
+        horario = perfil(rollup, medida, por=['hora'])
+        ax.bar(horario.index, horario.to_numpy(), alpha=0.6)
+        ax.set_title(f'{medida} media por hora')
+    return figura
+
+
+def figura_ambiente(cubo, rollup):
+    ambiente = ambiente_planta(cubo)
+    figura, ejes = nueva_figura(1, 3, (18, 5))
+    for ax, (x, y) in zip(ejes, [('irradiacion', 't_modulo'), ('irradiacion', 't_ambiente'), ('t_ambiente', 't_modulo')]):
+        hexbin(ax, ambiente[x], ambiente[y], f'{x} frente a {y}', x, y)
+    return figura
+
+
+def figura_dc_por_dia(cubo, rollup):
+    dc = pd.Series(np.nansum(cubo.medida('kw_dc'), axis=1), index=cubo.fechas)
+    tabla = dc.groupby([dc.index.hour, dc.index.date]).sum().unstack(level=1)
+    figura, ejes = nueva_figura(1, 1, (16, 6))
+    mapa_calor(figura, ejes[0], tabla, 'DC total de la planta por hora (filas) y día (columnas)', 'kw_dc')
+    return figura
+
+
+def figura_irradiacion_dc(cubo, rollup):
+    kw_dc = np.asarray(cubo.medida('kw_dc'), dtype='float64')
+    kw_ac = np.asarray(cubo.medida('kw_ac'), dtype='float64')
+    irradiacion = np.broadcast_to(ambiente_planta(cubo)['irradiacion'][:, np.newaxis], kw_dc.shape)
+
+    figura, ejes = nueva_figura(1, 2, (16, 6))
+    hexbin(ejes[0], irradiacion.ravel(), kw_dc.ravel(), 'Irradiación frente a DC', 'irradiacion', 'kw_dc')
+    hexbin(ejes[1], kw_dc.ravel(), kw_ac.ravel(), 'DC frente a AC', 'kw_dc', 'kw_ac')
+    return figura
+
+
+def figura_eficiencia_inverters(cubo, rollup):
+    eficiencia = cubo.tabla('eficiencia').where(cubo.tabla('kw_dc') > 0).droplevel(0, axis=1)
+    tabla = eficiencia.groupby(eficiencia.index.date).mean().T
+    figura, ejes = nueva_figura(1, 1, (16, max(4, len(tabla) * 0.25)))
+    mapa_calor(figura, ejes[0], tabla, 'Eficiencia media diaria de cada inverter (lecturas con DC)', 'eficiencia')
+    return figura
+
+
+def figura_ranking(cubo, rollup):
+    ranking = clasificar(cubo).droplevel(0)
+    figura, ejes = nueva_figura(1, 1, (14, 5))
+    colores = np.where(ranking.bajo_rendimiento, 'red', 'steelblue')
+    ejes[0].bar([str(inverter) for inverter in ranking.index], ranking.desviacion_media * 100, color=colores)
+    ejes[0].tick_params(axis='x', rotation=90, labelsize=7)
+    ejes[0].set_title('Desviación media de la DC respecto a la mediana de la planta (%), en rojo los de bajo rendimiento')
+    return figura
+
+
+# Gráficos de cada planta: nombre del fichero y función que crea la figura a partir del cubo y el rollup de la planta
+
+FIGURAS = {'perfil_horario': figura_perfil_horario,
+           'ambiente': figura_ambiente,
+           'dc_por_dia': figura_dc_por_dia,
+           'irradiacion_dc': figura_irradiacion_dc,
+           'eficiencia_inverters': figura_eficiencia_inverters,
+           'ranking': figura_ranking}
+
+
+def informe_planta(planta, carpeta=CARPETA_INFORME, ruta_cubo=RUTA_CUBO, ruta_rollup=RUTA_ROLLUP, formato=FORMATO, figuras=None,
+                   ruta_calibracion=RUTA_CALIBRACION):
+    """Genera y guarda los gráficos de una planta en carpeta/planta. Devuelve un registro por gráfico con el fichero y los segundos que ha tardado."""
+
+    cubo = abrir_cubo(ruta_cubo).calibrar(cargar_calibracion(ruta_calibracion)).seleccionar(planta)
+    rollup = cargar_rollup(ruta_rollup, plantas=[planta])
+
+    os.makedirs(os.path.join(carpeta, planta), exist_ok=True)
+
+    registros = []
+    for nombre in figuras or FIGURAS:
+        inicio = time.perf_counter()
+        figura = FIGURAS[nombre](cubo, rollup)
+        figura.tight_layout()
+        fichero = os.path.join(planta, f'{nombre}.{formato}')
+        figura.savefig(os.path.join(carpeta, fichero))
+        registros.append({'planta': planta, 'figura': nombre, 'fichero': fichero, 'segundos': time.perf_counter() - inicio})
+
+    return registros
+
+
+def informe_flota(carpeta=CARPETA_INFORME, ruta_rollup=RUTA_ROLLUP, formato=FORMATO, ruta_calibracion=RUTA_CALIBRACION):
+    """Gráficos que comparan todas las plantas, a partir del rollup."""
+
+    inicio = time.perf_counter()
+    rollup = cargar_rollup(ruta_rollup, columnas=['planta', 'hora', 'inverter_id', 'irradiacion_sum', 'irradiacion_count',
+                                                   'eficiencia_sum', 'eficiencia_count'])
+
+    # El rollup suma por inverter, así que la suma de la eficiencia se corrige con el factor de su inverter como cada lectura
+
+    calibracion = cargar_calibracion(ruta_calibracion)
+    if calibracion is not None:
+        rollup['eficiencia_sum'] = rollup.eficiencia_sum.to_numpy() * factores_registro(rollup, calibracion)
+
+    irradiacion = perfil(rollup, 'irradiacion')
+    eficiencia = perfil(rollup, 'eficiencia', por=['planta']).sort_values()
+
+    figura, ejes = nueva_figura(1, 2, (18, 5))
+    ejes[0].plot(irradiacion.index, irradiacion.to_numpy(), alpha=0.6)
+    ejes[0].set_title('Irradiación media por hora de cada planta')
+    ejes[1].bar([str(planta) for planta in eficiencia.index], eficiencia.to_numpy())
+    ejes[1].tick_params(axis='x', rotation=90)
+    ejes[1].set_title('Eficiencia media de cada planta')
+    figura.tight_layout()
+
+    fichero = f'flota.{formato}'
+    figura.savefig(os.path.join(carpeta, fichero))
+
+    return [{'planta': None, 'figura': 'flota', 'fichero': fichero, 'segundos': time.perf_counter() - inicio}]
+
+
+def escribir_indice(registros, carpeta=CARPETA_INFORME):
+    """indice.html con todos los gráficos, agrupados por planta."""
+
+    partes = ['<html><head><meta charset="utf-8"><title>Informe de la flota</title></head><body>']
+    for planta, grupo in registros.groupby(registros.planta.fillna('flota'), sort=False):
+        partes.append(f'<h2>{html.escape(str(planta))}</h2>')
+        partes.extend(f'<img src="{html.escape(fichero)}" style="max-width:100%"><br>' for fichero in grupo.fichero)
+    partes.append('</body></html>')
+
+    with open(os.path.join(carpeta, 'indice.html'), 'w', encoding='utf-8') as f:
+        f.write('\n'.join(partes))
+
+
+def generar_informe(plantas=None, carpeta=CARPETA_INFORME, procesos=None, ruta_cubo=RUTA_CUBO, ruta_rollup=RUTA_ROLLUP, formato=FORMATO,
+                    ruta_calibracion=RUTA_CALIBRACION):
+    """Genera el informe de las plantas en paralelo (una tarea por planta) y el índice.
+
+    plantas: lista de plantas (None para todas las del cubo)
+    procesos: número de procesos (None para uno por núcleo, 1 para generarlo en el proceso actual sin paralelizar)
+
+    Devuelve un dataframe con un registro por gráfico.
+    """
+
+    if plantas is None:
+        plantas = list(abrir_cubo(ruta_cubo).inverters.get_level_values(0).unique())
+
+    os.makedirs(carpeta, exist_ok=True)
+    procesos = min(procesos or os.cpu_count() or 1, len(plantas))
+    argumentos = ([carpeta] * len(plantas), [ruta_cubo] * len(plantas), [ruta_rollup] * len(plantas), [formato] * len(plantas),
+                  [None] * len(plantas), [ruta_calibracion] * len(plantas))
+
+    if procesos == 1:
+        resultados = list(map(informe_planta, plantas, *argumentos))
+    else:
+        with ProcessPoolExecutor(max_workers=procesos) as pool:
+            resultados = list(pool.map(informe_planta, plantas, *argumentos))
+
+    registros = pd.DataFrame([registro for resultado in resultados for registro in resultado] + informe_flota(carpeta, ruta_rollup, formato, ruta_calibracion))
+    escribir_indice(registros, carpeta)
+
+    return registros
+
+
+if __name__ == '__main__':
+    inicio = time.perf_counter()
+    registros = generar_informe()
+
+    print(registros.groupby('figura', sort=False).segundos.agg(['count', 'mean', 'max']))
+    print(f'{len(registros)} gráficos en {time.perf_counter() - inicio:.1f} s: {os.path.join(CARPETA_INFORME, "indice.html")}')
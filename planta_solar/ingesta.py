@@ -0,0 +1,133 @@
+"""INGESTA POR LOTES DE LOS FICHEROS DE LAS PLANTAS
+
+En analisis_planta_solar_datos.py cargamos cada fichero completo con pd.read_csv.
+Con 34 días y 2 plantas no hay problema, pero con meses de datos de decenas de plantas el histórico no cabe en memoria.
+
+Aquí leemos los csv por trozos (chunksize) mediante generadores, y cada lote sale ya preparado igual que en la fase de calidad:
+
+- DATE_TIME convertido a datetime con el formato exacto de la fuente (ver planta_solar/fechas.py)
+- PLANT_ID reemplazado por su literal (p1, p2, ...)
+- columnas renombradas a fecha, planta, inverter_id, kw_dc, ... como en el datamart
+
+Como nunca tenemos más de un lote en memoria el pico de memoria depende del tamaño del lote y no de la longitud del fichero.
+
+Uso:
+
+for lote in leer_por_lotes('p1_generacion'):
+    ...
+"""
+
+import pandas as pd
+
+from planta_solar.fechas import convertir_fechas
+
+# Renombrado de las columnas de cada tipo de fichero a los nombres del datamart
+
+COLUMNAS = {
+    'generacion': {'DATE_TIME': 'fecha',
+                   'PLANT_ID': 'planta',
+                   'SOURCE_KEY': 'inverter_id',
+                   'DC_POWER': 'kw_dc',
+                   'AC_POWER': 'kw_ac',
+                   'DAILY_YIELD': 'kw_dia',
+                   'TOTAL_YIELD': 'kw_total'},
+    'sensor': {'DATE_TIME': 'fecha',
+               'PLANT_ID': 'planta',
+               'SOURCE_KEY': 'sensor_id',
+               'AMBIENT_TEMPERATURE': 't_ambiente',
+               'MODULE_TEMPERATURE': 't_modulo',
+               'IRRADIATION': 'irradiacion'}
+}
+
+# Tipos de lectura. Fijarlos evita que Pandas tenga que inferirlos en cada lote (y que lotes distintos salgan con tipos distintos).
+
+TIPOS = {
+    'generacion': {'DATE_TIME': str, 'PLANT_ID': 'int64', 'SOURCE_KEY': str,
+                   'DC_POWER': 'float64', 'AC_POWER': 'float64',
+                   'DAILY_YIELD': 'float64', 'TOTAL_YIELD': 'float64'},
+    'sensor': {'DATE_TIME': str, 'PLANT_ID': 'int64', 'SOURCE_KEY': str,
+               'AMBIENT_TEMPERATURE': 'float64', 'MODULE_TEMPERATURE': 'float64',
+               'IRRADIATION': 'float64'}
+}
+
+# Literal más legible para cada identificador de planta
+
+PLANTAS = {4135001: 'p1',
+           4136001: 'p2'}
+
+# Los 4 ficheros del caso, con su planta y el formato exacto de su DATE_TIME.
+# La generación de la planta 1 viene con el día delante y sin segundos (15-05-2020 00:00), el resto en ISO (2020-05-15 00:00:00).
+
+FORMATO_ISO = '%Y-%m-%d %H:%M:%S'
+
+FUENTES = {
+    'p1_generacion': {'planta': 'p1', 'ruta': 'Datos/Plant_1_Generation_Data.csv', 'tipo': 'generacion', 'formato_fecha': '%d-%m-%Y %H:%M'},
+    'p1_sensor': {'planta': 'p1', 'ruta': 'Datos/Plant_1_Weather_Sensor_Data.csv', 'tipo': 'sensor', 'formato_fecha': FORMATO_ISO},
+    'p2_generacion': {'planta': 'p2', 'ruta': 'Datos/Plant_2_Generation_Data.csv', 'tipo': 'generacion', 'formato_fecha': FORMATO_ISO},
+    'p2_sensor': {'planta': 'p2', 'ruta': 'Datos/Plant_2_Weather_Sensor_Data.csv', 'tipo': 'sensor', 'formato_fecha': FORMATO_ISO}
+}
+
+# Número máximo de registros por lote
+
+TAMANO_LOTE = 100_000
+
+
+def limpiar_lote(lote, fuente, rechazos=None):
+    """Aplica a un lote las mismas transformaciones que la fase de calidad de datos.
+
+    Los registros cuya fecha no cumple el formato de la fuente se quitan del lote y se añaden a la lista rechazos.
+    Si no se pasa la lista se lanza un error, para que no pasen desapercibidos.
+    """
+
+    config = FUENTES[fuente]
+
+    lote['DATE_TIME'], no_validas = convertir_fechas(lote.DATE_TIME, config['formato_fecha'])
+
+    if len(no_validas) > 0:
+        if rechazos is None:
+            raise ValueError(f'{len(no_validas)} registros de {fuente} no cumplen el formato {config["formato_fecha"]}, '
+                             f'por ejemplo {list(no_validas.valor[:3])}')
+        rechazos.append(no_validas.assign(fuente=fuente))
+        lote = lote.drop(index=no_validas.index)
+
+    # Si la planta no está dada de alta en PLANTAS dejamos su identificador como literal
+
+    lote['PLANT_ID'] = lote.PLANT_ID.map(PLANTAS).fillna(lote.PLANT_ID.astype(str))
+
+    return lote.rename(columns=COLUMNAS[config['tipo']])
+
+
+def leer_por_lotes(fuente, tamano_lote=TAMANO_LOTE, ruta=None, rechazos=None):
+    """Generador que devuelve el fichero de la fuente en lotes de como mucho tamano_lote registros ya limpios.
+
+    rechazos: lista donde acumular los registros con fecha no válida (ver limpiar_lote)
+    """
+
+    config = FUENTES[fuente]
+    tipo = config['tipo']
+
+    lector = pd.read_csv(ruta or config['ruta'],
+                         usecols=list(COLUMNAS[tipo]),
+                         dtype=TIPOS[tipo],
+                         chunksize=tamano_lote)
+
+    with lector:
+        for lote in lector:
+            yield limpiar_lote(lote, fuente, rechazos)
+
+
+def leer_fuentes(fuentes, tamano_lote=TAMANO_LOTE, rechazos=None):
+    """Encadena los lotes de varias fuentes del mismo tipo, por ejemplo la generación de todas las plantas."""
+
+    tipos = {FUENTES[fuente]['tipo'] for fuente in fuentes}
+    if len(tipos) > 1:
+        raise ValueError(f'Las fuentes deben ser del mismo tipo y se han recibido: {sorted(tipos)}')
+
+    for fuente in fuentes:
+        yield from leer_por_lotes(fuente, tamano_lote, rechazos=rechazos)
+
+
+def leer_fuente(fuente, tamano_lote=TAMANO_LOTE, rechazos=None):
+    """Carga la fuente completa a partir de sus lotes. Solo tiene sentido cuando el resultado cabe en memoria."""
+
+    return pd.concat(leer_por_lotes(fuente, tamano_lote, rechazos=rechazos), ignore_index=True)
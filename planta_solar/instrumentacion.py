@@ -0,0 +1,305 @@
+"""INSTRUMENTACIÓN POR ETAPAS
+
+Cuando una ejecución de toda la flota de repente tarda más, no sabemos qué etapa se ha vuelto lenta: la lectura de los csv,
+la conversión de las fechas, la integración, las variables derivadas, la agregación diaria o alguna agregación de los insights.
+
+Aquí medimos cada etapa por separado, solo si se activa (por defecto no se mide nada y el coste es una comprobación por llamada):
+
+- etapa(nombre) es un bloque with que mide lo que se ejecuta dentro. Las funciones principales de la librería
+  (convertir_fechas, integrar, crear_variables, agregar_diario...) ya están decoradas con instrumentada, y los scripts
+  envuelven en etapas la lectura de cada csv, los concat, el dropna y las agregaciones de los insights
+- De cada etapa se guarda el tiempo de reloj y de CPU, las filas de entrada y de salida, el pico de memoria residente
+  (en Linux, reiniciando el pico al empezar) y la etapa dentro de la que se ejecuta
+- La traza es un fichero JSON Lines con un registro por etapa, que se escribe al terminar cada una. Así los procesos
+  de procesar_plantas escriben en el mismo fichero (cada registro lleva el pid) y una ejecución interrumpida deja la traza hasta ese punto
+- Opcionalmente una etapa se ejecuta con cProfile, y sus estadísticas se guardan junto a la traza (<traza>.<etapa>.<pid>.prof)
+  para abrirlas con pstats o snakeviz
+
+Se activa con activar(), con la variable de entorno PLANTA_SOLAR_TRAZA (la etapa a perfilar en PLANTA_SOLAR_PERFIL),
+que vale también para los scripts:
+
+PLANTA_SOLAR_TRAZA=traza.jsonl PLANTA_SOLAR_PERFIL=integrar python analisis_planta_solar_datos.py
+
+o desde la línea de comandos con python -m planta_solar --traza traza.jsonl construir.
+resumen_traza() y comparar_trazas() resumen una traza por etapa y la comparan con la de una ejecución anterior.
+"""
+
+import cProfile
+import functools
+import json
+import os
+import re
+import resource
+import sys
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+VARIABLE_TRAZA = 'PLANTA_SOLAR_TRAZA'
+VARIABLE_PERFIL = 'PLANTA_SOLAR_PERFIL'
+
+# Veces que tiene que crecer el tiempo de una etapa respecto a la traza anterior para considerarlo una regresión
+
+UMBRAL_REGRESION = 1.5
+
+ACTIVA = False
+RUTA_TRAZA = None
+ETAPA_PERFIL = None
+
+# Etapas abiertas del proceso actual, de la más externa a la más interna, y el perfil de la etapa a perfilar
+
+_abiertas = []
+_perfil = {'pid': None, 'perfil': None, 'activo': 0}
+
+
+def pico_rss_mb():
+    """Pico de memoria residente del proceso actual en MB.
+
+    En Linux leemos VmHWM, porque ru_maxrss se hereda del proceso padre al lanzar uno nuevo y falsea la medida.
+    """
+
+    try:
+        with open('/proc/self/status') as f:
+            for linea in f:
+                if linea.startswith('VmHWM:'):
+                    return int(linea.split()[1]) / 1024
+    except OSError:
+        pass
+
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    # En Linux ru_maxrss viene en KB y en macOS en bytes
+
+    return pico / 1024 ** 2 if sys.platform == 'darwin' else pico / 1024
+
+
+def reiniciar_pico_rss():
+    """Reinicia el pico de memoria del proceso cuando el sistema lo permite (Linux)."""
+
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+    except OSError:
+        pass
+
+
+def activar(ruta_traza, etapa_perfil=None):
+    """Empieza a medir las etapas y a añadir sus registros a ruta_traza. Con etapa_perfil, esa etapa se ejecuta con cProfile.
+
+    Se guarda también en las variables de entorno, para que los procesos nuevos que se lancen desde aquí midan igual.
+    """
+
+    global ACTIVA, RUTA_TRAZA, ETAPA_PERFIL
+
+    ACTIVA, RUTA_TRAZA, ETAPA_PERFIL = True, os.path.abspath(ruta_traza), etapa_perfil
+
+    os.environ[VARIABLE_TRAZA] = RUTA_TRAZA
+    if etapa_perfil:
+        os.environ[VARIABLE_PERFIL] = etapa_perfil
+    else:
+        os.environ.pop(VARIABLE_PERFIL, None)
+
+
+def desactivar():
+    global ACTIVA
+
+    ACTIVA = False
+    os.environ.pop(VARIABLE_TRAZA, None)
+    os.environ.pop(VARIABLE_PERFIL, None)
+
+
+def filas(objeto):
+    """Filas de un dataframe, serie o array (del primero si es una tupla), o None si no tiene longitud."""
+
+    if isinstance(objeto, tuple):
+        objeto = objeto[0] if objeto else None
+
+    if isinstance(objeto, int):
+        return objeto
+
+    try:
+        return len(objeto)
+    except TypeError:
+        return None
+
+
+class Registro:
+    """Medida de una etapa abierta. salida() anota las filas del resultado y lo devuelve, para usarlo en la misma línea."""
+
+    def __init__(self, nombre, entrada=None):
+        self.nombre = nombre
+        self.filas_entrada = filas(entrada)
+        self.filas_salida = None
+        self.pico = 0.0
+
+    def salida(self, resultado):
+        self.filas_salida = filas(resultado)
+        return resultado
+
+
+# Registro de las etapas cuando no se mide nada: salida() solo devuelve el resultado
+
+_INACTIVO = Registro(None)
+
+
+def ruta_perfil(nombre):
+    return f'{RUTA_TRAZA}.{re.sub(r"[^0-9A-Za-z_-]+", "_", nombre)}.{os.getpid()}.prof'
+
+
+def perfil_proceso():
+    """Perfil de la etapa a perfilar en el proceso actual. Se acumula en todas las veces que se ejecuta la etapa."""
+
+    if _perfil['pid'] != os.getpid():
+        _perfil.update(pid=os.getpid(), perfil=cProfile.Profile(), activo=0)
+
+    return _perfil['perfil']
+
+
+def escribir(registro):
+    """Añade el registro de una etapa a la traza en una sola escritura, para que no se mezclen los de varios procesos."""
+
+    with open(RUTA_TRAZA, 'a', encoding='utf-8') as f:
+        f.write(json.dumps(registro, ensure_ascii=False, default=str) + '\n')
+
+
+@contextmanager
+def etapa(nombre, entrada=None):
+    """Mide lo que se ejecuta dentro del bloque como la etapa nombre (entrada: lo que recibe la etapa, para contar sus filas).
+
+    with etapa('lectura Plant_1_Generation_Data.csv') as e:
+        p1g = e.salida(pd.read_csv('Datos/Plant_1_Generation_Data.csv'))
+    """
+
+    if not ACTIVA:
+        yield _INACTIVO
+        return
+
+    registro = Registro(nombre, entrada)
+    padre = _abiertas[-1] if _abiertas else None
+
+    # El pico se reinicia al empezar cada etapa: antes se guarda el de la etapa que la contiene hasta aquí
+
+    if padre is not None:
+        padre.pico = max(padre.pico, pico_rss_mb())
+    reiniciar_pico_rss()
+
+    perfil = perfil_proceso() if nombre == ETAPA_PERFIL and not _perfil['activo'] else None
+    _abiertas.append(registro)
+    inicio = datetime.now()
+    inicio_reloj = time.perf_counter()
+    inicio_cpu = time.process_time()
+    error = None
+
+    if perfil is not None:
+        _perfil['activo'] = 1
+        perfil.enable()
+
+    try:
+        yield registro
+    except BaseException as e:
+        error = type(e).__name__
+        raise
+    finally:
+        if perfil is not None:
+            perfil.disable()
+            _perfil['activo'] = 0
+
+        segundos = time.perf_counter() - inicio_reloj
+        cpu_segundos = time.process_time() - inicio_cpu
+        registro.pico = max(registro.pico, pico_rss_mb())
+        _abiertas.pop()
+
+        if padre is not None:
+            padre.pico = max(padre.pico, registro.pico)
+
+        escribir({'etapa': nombre,
+                  'padre': padre.nombre if padre is not None else None,
+                  'nivel': len(_abiertas),
+                  'pid': os.getpid(),
+                  'inicio': inicio.isoformat(timespec='milliseconds'),
+                  'segundos': segundos,
+                  'cpu_segundos': cpu_segundos,
+                  'filas_entrada': registro.filas_entrada,
+                  'filas_salida': registro.filas_salida,
+                  'pico_rss_mb': registro.pico,
+                  'perfil': ruta_perfil(nombre) if perfil is not None else None,
+                  'error': error})
+
+        if perfil is not None:
+            perfil.dump_stats(ruta_perfil(nombre))
+
+
+def instrumentada(funcion=None, nombre=None):
+    """Decorador que mide cada llamada a la función como una etapa (por defecto con el nombre de la función).
+
+    Las filas de entrada son las del primer argumento y las de salida las del resultado (o de su primer elemento si devuelve una tupla).
+    """
+
+    if funcion is None:
+        return functools.partial(instrumentada, nombre=nombre)
+
+    @functools.wraps(funcion)
+    def medida(*args, **kwargs):
+        if not ACTIVA:
+            return funcion(*args, **kwargs)
+
+        with etapa(nombre or funcion.__name__, args[0] if args else None) as registro:
+            return registro.salida(funcion(*args, **kwargs))
+
+    return medida
+
+
+def leer_traza(ruta):
+    """Traza como dataframe, un registro por etapa ejecutada."""
+
+    import pandas as pd
+
+    return pd.read_json(ruta, lines=True, dtype={'padre': 'object', 'perfil': 'object', 'error': 'object'})
+
+
+def resumen_traza(traza):
+    """Por etapa (traza: ruta o dataframe de leer_traza): veces que se ejecuta, tiempos totales, filas totales, pico de memoria y filas por segundo."""
+
+    if isinstance(traza, (str, os.PathLike)):
+        traza = leer_traza(traza)
+
+    etapas = traza.groupby('etapa', sort=False)
+    resumen = etapas.agg(veces=('segundos', 'size'), segundos=('segundos', 'sum'), cpu_segundos=('cpu_segundos', 'sum'))
+
+    # Las etapas que no anotan sus filas quedan sin filas, no con 0
+
+    resumen = resumen.join(etapas[['filas_entrada', 'filas_salida']].sum(min_count=1)).join(etapas.pico_rss_mb.max())
+
+    # Las lecturas no tienen filas de entrada: su rendimiento es el de las filas leídas
+
+    resumen['filas_s'] = resumen.filas_entrada.fillna(resumen.filas_salida) / resumen.segundos
+
+    return resumen
+
+
+def comparar_trazas(anterior, actual, umbral=UMBRAL_REGRESION):
+    """Tiempo y pico de memoria de cada etapa en la traza actual frente a la anterior, de más a menos lenta respecto a la anterior.
+
+    regresion marca las etapas cuyo tiempo (o cuyo tiempo por fila, si las filas han cambiado) ha crecido más de umbral veces.
+    """
+
+    anterior, actual = resumen_traza(anterior), resumen_traza(actual)
+    comparacion = anterior[['segundos', 'filas_entrada', 'pico_rss_mb']].join(
+        actual[['segundos', 'filas_entrada', 'pico_rss_mb']], how='outer', lsuffix='_anterior', rsuffix='_actual')
+
+    comparacion['ratio_segundos'] = comparacion.segundos_actual / comparacion.segundos_anterior
+
+    # Con más filas que antes comparamos el tiempo por fila, para no confundir un crecimiento de la flota con una regresión
+
+    por_fila = (comparacion.segundos_actual / comparacion.filas_entrada_actual) / \
+               (comparacion.segundos_anterior / comparacion.filas_entrada_anterior)
+    comparacion['ratio_por_fila'] = por_fila.where(comparacion.filas_entrada_anterior > 0)
+    comparacion['regresion'] = comparacion.ratio_por_fila.fillna(comparacion.ratio_segundos) > umbral
+
+    return comparacion.sort_values('ratio_segundos', ascending=False)
+
+
+# Activación desde el entorno, para los scripts y para los procesos lanzados desde una ejecución medida
+
+if os.environ.get(VARIABLE_TRAZA):
+    activar(os.environ[VARIABLE_TRAZA], os.environ.get(VARIABLE_PERFIL) or None)
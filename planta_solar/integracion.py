@@ -0,0 +1,80 @@
+"""INTEGRACIÓN DE GENERACIÓN Y MEDIDAS AMBIENTALES
+
+El datamart se creaba con un merge exacto por fecha y planta seguido de un dropna().
+Eso tiene dos inconvenientes:
+
+- Exige que el sensor tenga exactamente la misma marca de tiempo que cada inverter, y si falta una medición (como el 03/06 a las 14:00) se pierden esos registros de generación
+- El merge por hash construye una tabla intermedia muy grande cuando hay más de 100 inverters por sensor
+
+Aquí integramos con un as-of join (pd.merge_asof) sobre los datos ordenados por fecha:
+para cada registro de generación se busca la medición del sensor de su misma planta más cercana en el tiempo, dentro de una tolerancia.
+
+Con los datos ya ordenados el coste es lineal, ya que se recorren ambos datasets a la vez sin construir ninguna tabla hash.
+Los registros que no encuentran medición dentro de la tolerancia no se eliminan: se quedan con nulos y se devuelven en un informe aparte.
+En el mismo informe se cuentan los registros cuya medición tiene otra marca de tiempo (emparejados de forma aproximada),
+ya que sus variables ambientales son las de una lectura vecina y no las de su propia fecha.
+"""
+
+import pandas as pd
+
+from planta_solar.instrumentacion import instrumentada
+
+# Tolerancia por defecto: una ventana de medición
+
+TOLERANCIA = '15min'
+
+# Columna auxiliar con la fecha de la medición emparejada a cada registro. No se queda en el datamart
+
+FECHA_CLIMA = '_fecha_clima'
+
+
+def ordenar_por_fecha(df, fecha='fecha'):
+    """Ordena por fecha solo si hace falta. Comprobarlo es lineal, ordenar no."""
+
+    if df[fecha].is_monotonic_increasing:
+        return df
+
+    return df.sort_values(fecha, kind='stable', ignore_index=True)
+
+
+@instrumentada
+def integrar(gener, temper, tolerancia=TOLERANCIA, direccion='nearest', fecha='fecha', planta='planta'):
+    """Añade a cada registro de generación la medición ambiental de su planta más cercana en el tiempo.
+
+    tolerancia: distancia máxima entre ambas fechas (None para no limitarla)
+    direccion: 'nearest' para la más cercana, 'backward' para la última anterior o 'forward' para la primera posterior
+
+    Devuelve el datamart ordenado por fecha y un informe por planta y fecha con el número de registros sin medición ambiental (registros)
+    y con la medición de otra marca de tiempo (aproximados).
+    """
+
+    gener = ordenar_por_fecha(gener, fecha)
+    temper = ordenar_por_fecha(temper, fecha)
+    columnas_clima = temper.columns.drop([fecha, planta])
+
+    df = pd.merge_asof(gener,
+                       temper.assign(**{FECHA_CLIMA: temper[fecha]}),
+                       on=fecha,
+                       by=planta,
+                       tolerance=None if tolerancia is None else pd.Timedelta(tolerancia),
+                       direction=direccion)
+
+    informe = no_emparejados(df, df.pop(FECHA_CLIMA), fecha, planta)
+
+    return df, informe
+
+
+def no_emparejados(df, fecha_clima, fecha='fecha', planta='planta'):
+    """Por planta y fecha, registros sin ninguna medición ambiental (registros) y con la de otra marca de tiempo (aproximados).
+
+    Solo aparecen las plantas y fechas con alguno de los dos.
+    """
+
+    sin_clima = fecha_clima.isna().to_numpy()
+    aproximados = ~sin_clima & (fecha_clima.to_numpy() != df[fecha].to_numpy())
+    marcados = sin_clima | aproximados
+
+    informe = pd.DataFrame({'registros': sin_clima[marcados], 'aproximados': aproximados[marcados]})
+
+    return informe.groupby([df[planta].to_numpy()[marcados], df[fecha].to_numpy()[marcados]]).sum() \
+                  .rename_axis([planta, fecha]).reset_index()
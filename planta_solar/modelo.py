@@ -0,0 +1,118 @@
+"""MODELO DE DC ESPERADA A PARTIR DE LA IRRADIACIÓN Y LA TEMPERATURA DEL MÓDULO
+
+En analisis_planta_solar_insights.py razonamos sobre la relación entre irradiacion y kw_dc mirando scatterplots.
+Aquí ajustamos esa relación por inverter (o por planta) para que cada lectura tenga una DC esperada con la que compararla:
+
+kw_dc esperada = a * irradiacion + b * irradiacion * (t_modulo - 25)
+
+- El primer término es la respuesta del módulo a la irradiación: sin irradiación no hay DC, por eso no hay término independiente
+- El segundo recoge la pérdida de rendimiento del módulo cuando se calienta por encima de los 25 grados de las condiciones estándar
+
+Ajuste y puntuación están vectorizados para toda la flota a la vez:
+
+- El ajuste por mínimos cuadrados solo necesita unas pocas sumas por grupo (np.bincount) y resolver un sistema 2x2 por grupo con fórmulas cerradas
+- La puntuación asigna a cada lectura los coeficientes de su grupo por posición y calcula esperada, residuo y ratio de rendimiento con operaciones sobre arrays
+
+Para el ajuste solo se usan las lecturas con irradiación y DC mayor que cero, para que las paradas (como las de la planta 2) no rebajen lo esperado.
+"""
+
+import numpy as np
+import pandas as pd
+
+from planta_solar.comun import CLAVES, codigos_grupo
+from planta_solar.instrumentacion import instrumentada
+
+# Temperatura del módulo de referencia (condiciones estándar)
+
+TEMPERATURA_REFERENCIA = 25
+
+# Irradiación mínima para usar una lectura en el ajuste y para calcular el ratio de rendimiento
+
+IRRADIACION_MINIMA = 0.05
+
+
+def variables_modelo(df):
+    """Las dos variables del modelo como arrays float64: irradiacion e irradiacion * (t_modulo - 25)."""
+
+    irradiacion = df.irradiacion.to_numpy(dtype='float64')
+    temperatura = df.t_modulo.to_numpy(dtype='float64') - TEMPERATURA_REFERENCIA
+
+    return irradiacion, irradiacion * temperatura
+
+
+@instrumentada
+def ajustar_modelo(df, claves=CLAVES, irradiacion_minima=IRRADIACION_MINIMA):
+    """Ajusta el modelo de DC esperada por grupo (por defecto planta e inverter; ('planta',) para uno por planta).
+
+    Devuelve un dataframe con un registro por grupo: coeficientes a y b, registros usados y r2.
+    """
+
+    claves = list(claves)
+    x1, x2 = variables_modelo(df)
+    y = df.kw_dc.to_numpy(dtype='float64')
+
+    codigos, grupos = codigos_grupo(df, claves)
+
+    validos = (x1 > irradiacion_minima) & (y > 0) & ~np.isnan(x2) & (codigos >= 0)
+    codigos = codigos[validos]
+    x1, x2, y = x1[validos], x2[validos], y[validos]
+
+    def suma(valores):
+        return np.bincount(codigos, weights=valores, minlength=len(grupos))
+
+    # Ecuaciones normales de cada grupo: [s11 s12; s12 s22] [a; b] = [s1y; s2y]
+
+    s11, s12, s22 = suma(x1 * x1), suma(x1 * x2), suma(x2 * x2)
+    s1y, s2y = suma(x1 * y), suma(x2 * y)
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        determinante = s11 * s22 - s12 * s12
+        a = (s22 * s1y - s12 * s2y) / determinante
+        b = (s11 * s2y - s12 * s1y) / determinante
+
+        # Sin variación de temperatura el sistema es singular: ajustamos solo con la irradiación
+
+        singular = np.abs(determinante) <= 1e-12 * np.maximum(s11 * s22, 1e-300)
+        a = np.where(singular, s1y / s11, a)
+        b = np.where(singular, 0.0, b)
+
+        # r2 respecto a la media de cada grupo
+
+        registros = np.bincount(codigos, minlength=len(grupos))
+        residuo = y - a[codigos] * x1 - b[codigos] * x2
+        media = suma(y) / registros
+        r2 = 1 - suma(residuo ** 2) / suma((y - media[codigos]) ** 2)
+
+    return pd.DataFrame({'a': a, 'b': b, 'registros': registros, 'r2': r2}, index=grupos)
+
+
+@instrumentada
+def puntuar(df, modelo, irradiacion_minima=IRRADIACION_MINIMA):
+    """DC esperada, residuo (kw_dc - esperada) y ratio de rendimiento (kw_dc / esperada) de cada lectura.
+
+    Las claves del modelo se toman de los nombres de su index. Las lecturas de grupos sin modelo o sin medición ambiental quedan a nulo,
+    y el ratio solo se calcula con irradiación por encima de irradiacion_minima (de noche no tiene sentido).
+    Devuelve un dataframe con el mismo index que df, sin copiar df.
+    """
+
+    claves = list(modelo.index.names)
+
+    if len(claves) == 1:
+        posiciones = modelo.index.get_indexer(df[claves[0]])
+    else:
+        posiciones = modelo.index.get_indexer(pd.MultiIndex.from_arrays([df[clave] for clave in claves]))
+
+    con_modelo = posiciones >= 0
+    a = np.where(con_modelo, modelo.a.to_numpy()[posiciones], np.nan)
+    b = np.where(con_modelo, modelo.b.to_numpy()[posiciones], np.nan)
+
+    x1, x2 = variables_modelo(df)
+    kw_dc = df.kw_dc.to_numpy(dtype='float64')
+
+    esperada = a * x1 + b * x2
+    with np.errstate(invalid='ignore', divide='ignore'):
+        ratio = np.where(x1 > irradiacion_minima, kw_dc / esperada, np.nan)
+
+    return pd.DataFrame({'kw_dc_esperada': esperada,
+                         'residuo': kw_dc - esperada,
+                         'ratio_rendimiento': ratio}, index=df.index)
@@ -0,0 +1,223 @@
+"""MONITOR DE EFICIENCIA POR INVERTER CON VENTANA MÓVIL
+
+En analisis_planta_solar_insights.py analizamos la eficiencia de cada inverter con la media diaria de todo el período en boxplots.
+Para vigilarla con cada lectura nueva, recalcular una ventana móvil sobre todo el histórico (groupby().rolling()) es demasiado lento.
+
+Aquí cada lectura actualiza los estadísticos de su inverter en tiempo constante, sin volver a recorrer la ventana:
+
+- Media y varianza de las últimas lecturas con una versión de Welford para ventanas: se suma la lectura que entra y se resta la que sale
+- Percentiles a partir de un histograma de la ventana con intervalos fijos de eficiencia: la lectura que entra suma uno en su intervalo y la que sale lo resta
+- Referencia propia del inverter como media exponencial lenta, para detectar derivas respecto a su comportamiento habitual.
+  Mientras el inverter está en deriva la referencia no se actualiza, para que no acabe adaptándose al fallo
+
+Y se marcan dos situaciones:
+
+- fuera_de_rango: la media de la ventana está lejos de la eficiencia nominal de un inverter (como el ~10% estructural de la planta 1)
+- deriva: la media de la ventana se separa de la referencia del propio inverter
+
+Solo cuentan las lecturas con generación de DC, ya que con DC cero la eficiencia se imputa a cero y no dice nada del inverter,
+y con eficiencia válida: una lectura sin AC no actualiza nada, para que no deje la media de toda la ventana en nulo.
+"""
+
+from collections import deque, namedtuple
+
+import numpy as np
+import pandas as pd
+
+from planta_solar.comun import EFICIENCIA_NOMINAL
+from planta_solar.instrumentacion import instrumentada
+
+# Lecturas de la ventana móvil (con lecturas cada 15 minutos y unas 12 horas de sol, unos 4 días)
+
+VENTANA = 192
+
+# Separación máxima (puntos de eficiencia) respecto a EFICIENCIA_NOMINAL admitida antes de marcar un inverter fuera de rango
+
+TOLERANCIA_NOMINAL = 10
+
+# Separación máxima (puntos de eficiencia) entre la media de la ventana y la referencia del inverter antes de marcar deriva
+
+UMBRAL_DERIVA = 5
+
+# Peso de cada ventana completa en la referencia (media exponencial): cuanto menor, más lenta se adapta
+
+PESO_REFERENCIA = 0.1
+
+PERCENTILES = (0.05, 0.5, 0.95)
+
+# Intervalos del histograma de eficiencia para los percentiles (de 0.5 puntos). Las eficiencias fuera del rango cuentan en el primer o el último intervalo.
+
+BORDES_EFICIENCIA = np.linspace(0, 120, 241)
+
+# DC mínima para considerar que el inverter está generando
+
+DC_MINIMA = 0
+
+Evento = namedtuple('Evento', ['planta', 'inverter_id', 'fecha', 'tipo', 'media', 'referencia'])
+
+
+class EstadoInverter:
+    """Estadísticos de la ventana móvil de un inverter."""
+
+    __slots__ = ['ventana', 'intervalos', 'histograma', 'media', 'm2', 'referencia', 'lecturas', 'fuera_de_rango', 'deriva']
+
+    def __init__(self, tamano):
+        self.ventana = deque(maxlen=tamano)
+        self.intervalos = deque(maxlen=tamano)
+        self.histograma = np.zeros(len(BORDES_EFICIENCIA) - 1, dtype='int32')
+        self.media = 0.0
+        self.m2 = 0.0
+        self.referencia = np.nan
+        self.lecturas = 0
+        self.fuera_de_rango = False
+        self.deriva = False
+
+    def desviacion(self):
+        n = len(self.ventana)
+        return np.sqrt(max(self.m2, 0.0) / (n - 1)) if n > 1 else np.nan
+
+    def percentiles(self, probabilidades):
+        """Percentiles de la ventana: el centro del intervalo en el que la frecuencia acumulada supera cada probabilidad."""
+
+        acumulada = np.cumsum(self.histograma)
+        posiciones = np.searchsorted(acumulada, np.asarray(probabilidades) * acumulada[-1])
+        centros = (BORDES_EFICIENCIA[:-1] + BORDES_EFICIENCIA[1:]) / 2
+
+        return centros[np.minimum(posiciones, len(centros) - 1)]
+
+
+class MonitorEficiencia:
+    """Monitor de la eficiencia de cada inverter, actualizado lectura a lectura.
+
+    Los eventos (inicio de fuera_de_rango o de deriva) se devuelven en cada lectura y se acumulan en el atributo eventos.
+    """
+
+    def __init__(self, ventana=VENTANA, eficiencia_nominal=EFICIENCIA_NOMINAL, tolerancia_nominal=TOLERANCIA_NOMINAL,
+                 umbral_deriva=UMBRAL_DERIVA, peso_referencia=PESO_REFERENCIA, percentiles=PERCENTILES):
+        self.tamano = ventana
+        self.eficiencia_nominal = eficiencia_nominal
+        self.tolerancia_nominal = tolerancia_nominal
+        self.umbral_deriva = umbral_deriva
+        self.percentiles = np.asarray(percentiles)
+
+        # La referencia se actualiza en cada lectura con un peso tal que una ventana completa pesa peso_referencia
+        self.alfa = peso_referencia / ventana
+
+        self.estado = {}
+        self.eventos = []
+
+    def actualizar(self, planta, inverter_id, fecha, kw_dc, kw_ac):
+        """Procesa una lectura. Devuelve la lista de eventos que genera (normalmente vacía)."""
+
+        if not kw_dc > DC_MINIMA:
+            return []
+
+        eficiencia = kw_ac / kw_dc * 100
+        if not np.isfinite(eficiencia):
+            return []
+
+        estado = self.estado.get((planta, inverter_id))
+        if estado is None:
+            estado = self.estado[(planta, inverter_id)] = EstadoInverter(self.tamano)
+
+        self._actualizar_ventana(estado, eficiencia)
+        self._actualizar_histograma(estado, eficiencia)
+
+        if len(estado.ventana) < self.tamano:
+            return []
+
+        # La referencia arranca con la primera ventana completa
+
+        if np.isnan(estado.referencia):
+            estado.referencia = estado.media
+        elif not estado.deriva:
+            estado.referencia += self.alfa * (eficiencia - estado.referencia)
+
+        return self._evaluar(estado, planta, inverter_id, fecha)
+
+    def _actualizar_ventana(self, estado, eficiencia):
+
+        # Welford con ventana: si la ventana está llena, la lectura que entra sustituye a la más antigua
+
+        ventana = estado.ventana
+        if len(ventana) == ventana.maxlen:
+            saliente = ventana[0]
+            ventana.append(eficiencia)
+            media = estado.media + (eficiencia - saliente) / len(ventana)
+            estado.m2 += (eficiencia - saliente) * (eficiencia - media + saliente - estado.media)
+            estado.media = media
+        else:
+            ventana.append(eficiencia)
+            delta = eficiencia - estado.media
+            estado.media += delta / len(ventana)
+            estado.m2 += delta * (eficiencia - estado.media)
+
+        estado.lecturas += 1
+
+    def _actualizar_histograma(self, estado, eficiencia):
+
+        # Los intervalos son de ancho fijo, así que el de la lectura se calcula directamente sin buscarlo
+
+        ancho = BORDES_EFICIENCIA[1] - BORDES_EFICIENCIA[0]
+        intervalo = min(max(int((eficiencia - BORDES_EFICIENCIA[0]) // ancho), 0), len(estado.histograma) - 1)
+
+        if len(estado.intervalos) == estado.intervalos.maxlen:
+            estado.histograma[estado.intervalos[0]] -= 1
+        estado.intervalos.append(intervalo)
+        estado.histograma[intervalo] += 1
+
+    def _evaluar(self, estado, planta, inverter_id, fecha):
+
+        eventos = []
+
+        fuera_de_rango = abs(estado.media - self.eficiencia_nominal) > self.tolerancia_nominal
+        if fuera_de_rango and not estado.fuera_de_rango:
+            eventos.append(Evento(planta, inverter_id, fecha, 'fuera_de_rango', estado.media, self.eficiencia_nominal))
+        estado.fuera_de_rango = fuera_de_rango
+
+        deriva = abs(estado.media - estado.referencia) > self.umbral_deriva
+        if deriva and not estado.deriva:
+            eventos.append(Evento(planta, inverter_id, fecha, 'deriva', estado.media, estado.referencia))
+        estado.deriva = deriva
+
+        self.eventos.extend(eventos)
+
+        return eventos
+
+    def resumen(self):
+        """Situación actual de cada inverter: estadísticos de la ventana, referencia y marcas."""
+
+        filas = []
+        for (planta, inverter_id), estado in self.estado.items():
+            fila = {'planta': planta,
+                    'inverter_id': inverter_id,
+                    'lecturas': estado.lecturas,
+                    'media': estado.media,
+                    'desviacion': estado.desviacion()}
+            for percentil, valor in zip(self.percentiles, estado.percentiles(self.percentiles)):
+                fila[f'p{round(percentil * 100):02d}'] = valor
+            fila.update({'referencia': estado.referencia,
+                         'fuera_de_rango': estado.fuera_de_rango,
+                         'deriva': estado.deriva})
+            filas.append(fila)
+
+        return pd.DataFrame(filas)
+
+
+@instrumentada
+def monitorizar(df, monitor=None):
+    """Pasa por el monitor las lecturas del datamart (fecha en el index) en orden de fecha, como si llegaran en tiempo real.
+
+    Devuelve el resumen final por inverter y los eventos como dataframes.
+    """
+
+    if monitor is None:
+        monitor = MonitorEficiencia()
+
+    df = df.sort_index(kind='stable') if not df.index.is_monotonic_increasing else df
+
+    for fila in zip(df.planta.to_numpy(), df.inverter_id.to_numpy(), df.index.to_numpy(),
+                    df.kw_dc.to_numpy(dtype='float64'), df.kw_ac.to_numpy(dtype='float64')):
+        monitor.actualizar(*fila)
+
+    return monitor.resumen(), pd.DataFrame(monitor.eventos, columns=Evento._fields)
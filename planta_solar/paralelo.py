@@ -0,0 +1,140 @@
+"""PROCESAMIENTO EN PARALELO POR PLANTA
+
+En analisis_planta_solar_datos.py cada planta pasa una detrás de otra por los mismos pasos de calidad:
+carga, conversión de la fecha, reemplazo de PLANT_ID, info, describe, value_counts de SOURCE_KEY...
+y una vez unidas se vuelve a trabajar sobre todas a la vez.
+
+Con 2 plantas no importa, pero con 40 el tiempo crece linealmente con el número de plantas aunque cada planta es independiente de las demás
+(la integración con las mediciones ambientales también se hace dentro de cada planta).
+
+Aquí cada planta es una tarea que se ejecuta en un proceso distinto (ProcessPoolExecutor), así que carga, limpieza, validación e integración
+se hacen en paralelo y el tiempo total se divide aproximadamente por el número de núcleos:
+
+- procesar_planta() lee por lotes la generación y los sensores de una planta, los integra, crea las variables derivadas y devuelve un informe de validación
+- unir() es el paso final (reduce), que concatena los resultados de todas las plantas
+- procesar_plantas() reparte las plantas entre los procesos y une los resultados
+
+Uso desde la raíz del repositorio, para construir el datamart de todas las plantas de FUENTES:
+
+python -m planta_solar.paralelo
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from planta_solar.clima import guardar_estrella
+from planta_solar.derivadas import crear_variables
+from planta_solar.ingesta import FUENTES, TAMANO_LOTE, leer_fuentes
+from planta_solar.instrumentacion import etapa
+from planta_solar.integracion import TOLERANCIA, integrar
+from planta_solar.tipos import compactar_tipos
+
+COLUMNAS_RECHAZOS = ['valor', 'formato', 'fuente']
+
+
+def fuentes_planta(planta, tipo):
+    """Fuentes registradas en FUENTES de una planta y un tipo ('generacion' o 'sensor')."""
+
+    return [fuente for fuente, config in FUENTES.items() if config['planta'] == planta and config['tipo'] == tipo]
+
+
+def validar(gener, temper, df, rechazos, no_emparejados):
+    """Indicadores de calidad de una planta: lo que revisábamos a mano con info, describe y value_counts."""
+
+    return {'registros_generacion': len(gener),
+            'registros_sensor': len(temper),
+            'inverters': gener.inverter_id.nunique(),
+            'sensores': temper.sensor_id.nunique(),
+            'desde': gener.fecha.min(),
+            'hasta': gener.fecha.max(),
+            'fechas_no_validas': len(rechazos),
+            'nulos': int(df.isna().sum().sum()),
+            'sin_clima': int(no_emparejados.registros.sum()),
+            'clima_aproximado': int(no_emparejados.aproximados.sum()),
+            'registros': len(df)}
+
+
+def procesar_planta(planta, tamano_lote=TAMANO_LOTE, tolerancia=TOLERANCIA):
+    """Carga, limpia, valida e integra una planta.
+
+    Devuelve el datamart de la planta (fecha en el index y tipos compactos), el informe de validación y los registros con fechas no válidas.
+    """
+
+    rechazos = []
+
+    with etapa(f'lectura {planta} generacion') as lectura:
+        gener = lectura.salida(pd.concat(leer_fuentes(fuentes_planta(planta, 'generacion'), tamano_lote, rechazos), ignore_index=True))
+    with etapa(f'lectura {planta} sensor') as lectura:
+        temper = lectura.salida(pd.concat(leer_fuentes(fuentes_planta(planta, 'sensor'), tamano_lote, rechazos), ignore_index=True))
+
+    df, no_emparejados = integrar(gener, temper, tolerancia)
+    df, _ = compactar_tipos(crear_variables(df.set_index('fecha')))
+
+    rechazos = pd.concat(rechazos, ignore_index=True) if rechazos else pd.DataFrame(columns=COLUMNAS_RECHAZOS)
+    informe = {'planta': planta, **validar(gener, temper, df, rechazos, no_emparejados)}
+
+    return df, informe, rechazos
+
+
+def unir(resultados):
+    """Concatena los resultados de procesar_planta en un único datamart ordenado por fecha, un informe por planta y los rechazos.
+
+    Antes de concatenar se unifican las categorías de cada columna categórica, si no Pandas las convertiría a texto.
+    Sin resultados (ninguna planta) devuelve un datamart, un informe y unos rechazos vacíos.
+    """
+
+    if not resultados:
+        return (pd.DataFrame(index=pd.DatetimeIndex([], name='fecha')), pd.DataFrame(index=pd.Index([], name='planta')),
+                pd.DataFrame(columns=COLUMNAS_RECHAZOS))
+
+    plantas = [df for df, _, _ in resultados]
+
+    for columna in plantas[0].select_dtypes('category').columns:
+        categorias = pd.api.types.union_categoricals([df[columna] for df in plantas]).categories
+        for df in plantas:
+            df[columna] = df[columna].cat.set_categories(categorias)
+
+    with etapa('union plantas', sum(len(df) for df in plantas)) as union:
+        df = union.salida(pd.concat(plantas).sort_index(kind='stable'))
+
+    informe = pd.DataFrame([informe for _, informe, _ in resultados]).set_index('planta')
+
+    rechazos = pd.concat([rechazos for _, _, rechazos in resultados], ignore_index=True)
+
+    return df, informe, rechazos
+
+
+def procesar_plantas(plantas=None, procesos=None, tamano_lote=TAMANO_LOTE, tolerancia=TOLERANCIA):
+    """Procesa las plantas en paralelo y une los resultados.
+
+    plantas: lista de plantas a procesar (None para todas las de FUENTES)
+    procesos: número de procesos (None para uno por núcleo, 1 para procesarlas en el proceso actual sin paralelizar)
+    """
+
+    if plantas is None:
+        plantas = list(dict.fromkeys(config['planta'] for config in FUENTES.values()))
+
+    procesos = max(1, min(procesos or os.cpu_count() or 1, len(plantas)))
+    argumentos = ([tamano_lote] * len(plantas), [tolerancia] * len(plantas))
+
+    if procesos == 1:
+        resultados = list(map(procesar_planta, plantas, *argumentos))
+    else:
+        with ProcessPoolExecutor(max_workers=procesos) as pool:
+            resultados = list(pool.map(procesar_planta, plantas, *argumentos))
+
+    return unir(resultados)
+
+
+if __name__ == '__main__':
+    df, informe, rechazos = procesar_plantas()
+
+    with pd.option_context('display.width', 200, 'display.max_columns', None):
+        print(informe)
+
+    if len(rechazos):
+        print(f'{len(rechazos)} registros con fechas no válidas')
+
+    guardar_estrella(df)
@@ -0,0 +1,169 @@
+"""ROLLUP POR PLANTA, DÍA, HORA E INVERTER
+
+En analisis_planta_solar_insights.py calculamos una y otra vez perfiles horarios sobre todos los registros del datamart:
+pd.crosstab(recepcion.hora, recepcion.planta, values=..., aggfunc='mean') para la irradiación y las temperaturas,
+df.groupby('hora')[['kw_dia']].mean() o df.groupby(['planta','hora']).eficiencia.mean().
+
+Todos son medias, mínimos o máximos por combinaciones de planta, día, hora e inverter, así que los precalculamos una vez a ese nivel:
+por cada planta, día, hora e inverter guardamos la suma, el número de valores, el mínimo y el máximo de cada medida (kw_dc_sum, kw_dc_count, kw_dc_min, kw_dc_max...).
+Con 4 lecturas por hora el rollup tiene unas 4 veces menos registros que el datamart, y cualquier perfil sale de él sin volver a los registros:
+
+- La media de cualquier agrupación es la suma de las sumas entre la suma de los números de valores
+- El mínimo y el máximo son el mínimo de los mínimos y el máximo de los máximos
+
+Por la misma razón el rollup se actualiza de forma incremental: el rollup de los registros nuevos se combina con el guardado
+sumando sumas y números de valores y quedándose con el menor mínimo y el mayor máximo. Los registros nuevos no deben estar ya incorporados
+(en planta_solar/incremental.py se garantiza con las marcas de agua), porque se contarían dos veces.
+
+Se guarda como el datamart (planta_solar/datamart.py), en Parquet particionado por planta y mes con el día en el index.
+
+Las medidas ambientales (irradiacion, t_ambiente, t_modulo) se repiten en cada inverter de la planta,
+así que sus medias por planta pesan cada lectura del sensor por el número de inverters con lectura en ese momento.
+"""
+
+import numpy as np
+import pandas as pd
+
+from planta_solar.agregacion import reducir, segmentos
+from planta_solar.comun import codigos_grupo
+from planta_solar.datamart import cargar_datamart, existe_datamart, guardar_datamart, leer_esquema
+from planta_solar.instrumentacion import instrumentada
+
+RUTA_ROLLUP = 'Datos/rollup'
+
+MEDIDAS = ['irradiacion', 't_ambiente', 't_modulo', 'kw_dc', 'kw_ac', 'eficiencia', 'kw_dia']
+
+# Claves del rollup además del día, que va en el index
+
+CLAVES = ['planta', 'hora', 'inverter_id']
+
+ESTADISTICOS = ['sum', 'count', 'min', 'max']
+
+# Cómo se combinan los estadísticos de varios registros del rollup
+
+COMBINACIONES = {'sum': 'sum', 'count': 'sum', 'min': 'min', 'max': 'max'}
+
+
+def segmentar(claves, dia):
+    """Ordena los registros por día y claves en una sola ordenación.
+
+    claves: dataframe con las columnas clave
+    dia: array datetime64[D] con el día de cada registro
+
+    Devuelve el orden, el inicio de cada segmento de registros con el mismo día y claves y el rollup solo con las claves (el día en el index).
+    """
+
+    claves = claves.assign(dia=dia.astype('int64'))
+    codigos, grupos = codigos_grupo(claves, ['dia'] + CLAVES)
+    orden, inicios = segmentos(codigos)
+
+    fecha = pd.DatetimeIndex(grupos.get_level_values('dia').to_numpy().astype('datetime64[D]').astype('datetime64[ns]'), name='fecha')
+
+    return orden, inicios, pd.DataFrame({clave: grupos.get_level_values(clave) for clave in CLAVES}, index=fecha)
+
+
+def tipos_rollup(rollup):
+    """Tipos compactos: hora en int8, números de valores en int32 y mínimos y máximos en float32 (como en el datamart)."""
+
+    tipos = {'hora': 'int8', 'planta': 'category', 'inverter_id': 'category'}
+    for columna in rollup.columns:
+        if columna.endswith('_count'):
+            tipos[columna] = 'int32'
+        elif columna.endswith(('_min', '_max')):
+            tipos[columna] = 'float32'
+
+    return rollup.astype(tipos)
+
+
+@instrumentada
+def construir_rollup(df, medidas=MEDIDAS):
+    """Rollup del datamart (fecha en el index): un registro por día, planta, hora e inverter con suma, número de valores, mínimo y máximo de cada medida."""
+
+    claves = pd.DataFrame({'planta': df.planta, 'hora': df.index.hour, 'inverter_id': df.inverter_id}).reset_index(drop=True)
+    orden, inicios, rollup = segmentar(claves, df.index.to_numpy().astype('datetime64[D]'))
+
+    # Medida a medida, para no tener a la vez en memoria todas las columnas en float64
+
+    for medida in [medida for medida in medidas if medida in df.columns]:
+        estadisticos = reducir(df[medida].to_numpy(dtype='float64')[orden], inicios, ESTADISTICOS)
+        for estadistico in ESTADISTICOS:
+            rollup[f'{medida}_{estadistico}'] = estadisticos[estadistico]
+
+    return tipos_rollup(rollup)
+
+
+def combinar(*rollups):
+    """Combina varios rollups de registros distintos en uno solo."""
+
+    rollup = pd.concat(rollups)
+    orden, inicios, combinado = segmentar(rollup[CLAVES].reset_index(drop=True), rollup.index.to_numpy().astype('datetime64[D]'))
+
+    for columna in rollup.columns.difference(CLAVES, sort=False):
+        funcion = COMBINACIONES[columna.rsplit('_', 1)[1]]
+        combinado[columna] = reducir(rollup[columna].to_numpy(dtype='float64')[orden], inicios, [funcion])[funcion]
+
+    return tipos_rollup(combinado)
+
+
+def guardar_rollup(rollup, ruta=RUTA_ROLLUP):
+    guardar_datamart(rollup, ruta)
+
+
+def cargar_rollup(ruta=RUTA_ROLLUP, columnas=None, desde=None, hasta=None, plantas=None):
+    """Carga el rollup con el día en el index (mismos filtros que cargar_datamart)."""
+
+    return cargar_datamart(ruta, columnas, desde, hasta, plantas)
+
+
+def actualizar_rollup(nuevo, ruta=RUTA_ROLLUP, medidas=MEDIDAS):
+    """Incorpora al rollup guardado los registros nuevos del datamart, reescribiendo solo las particiones (planta y mes) en las que caen.
+
+    Devuelve el número de registros del rollup (día, planta, hora e inverter) afectados.
+    """
+
+    rollup = construir_rollup(nuevo, medidas)
+    actualizados = len(rollup)
+
+    if existe_datamart(ruta):
+        periodos = rollup.index.strftime('%Y-%m')
+        afectadas = pd.MultiIndex.from_arrays([rollup.planta.astype(str), periodos]).unique()
+
+        viejo = cargar_rollup(ruta, plantas=afectadas.get_level_values(0).unique(), desde=periodos.min(), hasta=periodos.max())
+        viejo = viejo[pd.MultiIndex.from_arrays([viejo.planta.astype(str), viejo.index.strftime('%Y-%m')]).isin(afectadas)]
+
+        rollup = combinar(viejo[leer_esquema(ruta)['columnas']], rollup)
+
+    guardar_rollup(rollup.sort_index(kind='stable'), ruta)
+
+    return actualizados
+
+
+def perfil(rollup, medida, por=('hora', 'planta'), estadistico='mean'):
+    """Perfil de una medida agrupando el rollup por las claves de por (hora, planta, inverter_id o fecha para el día).
+
+    estadistico: 'mean', 'min', 'max', 'sum' o 'count'
+    Con dos claves devuelve una tabla con la primera en el index y la segunda en columnas,
+    como pd.crosstab(df.hora, df.planta, values=df[medida], aggfunc='mean'); con una, una serie.
+    """
+
+    por = list(por)
+    claves = pd.DataFrame({clave: rollup.index if clave == rollup.index.name else rollup[clave] for clave in por}).reset_index(drop=True)
+    codigos, grupos = codigos_grupo(claves, por)
+
+    def suma(columna):
+        return np.bincount(codigos, weights=rollup[columna].to_numpy(dtype='float64'), minlength=len(grupos))
+
+    if estadistico == 'mean':
+        with np.errstate(invalid='ignore', divide='ignore'):
+            valores = suma(f'{medida}_sum') / suma(f'{medida}_count')
+    elif estadistico in ('sum', 'count'):
+        valores = suma(f'{medida}_{estadistico}')
+    elif estadistico in ('min', 'max'):
+        orden, inicios = segmentos(codigos)
+        valores = reducir(rollup[f'{medida}_{estadistico}'].to_numpy(dtype='float64')[orden], inicios, [estadistico])[estadistico]
+    else:
+        raise ValueError(f'Estadístico no soportado: {estadistico}. Disponibles: mean, {", ".join(ESTADISTICOS)}')
+
+    resultado = pd.Series(valores, index=grupos, name=medida)
+
+    return resultado.unstack(por[1]) if len(por) == 2 else resultado
@@ -0,0 +1,214 @@
+"""SALUD DE LOS SENSORES AMBIENTALES
+
+En analisis_planta_solar_insights.py las preguntas ¿Son fiables los datos de irradiación? y ¿Son fiables los datos de temperatura?
+se responden mirando mapas de calor y pairplots de las tres variables.
+
+Aquí comprobamos la coherencia física de las lecturas de cada sensor en todo el histórico a la vez, con operaciones sobre arrays
+y sin agrupar sensor a sensor. Las lecturas son las de los csv de los sensores (leer_sensores) y no las de la tabla de clima del datamart:
+la tabla de clima tiene la medición emparejada con cada fecha de generación, así que una medición tomada de otra marca de tiempo
+aparece como una lectura más y tapa el hueco del sensor.
+
+- irradiacion_nocturna: irradiación por encima de un mínimo en horas en las que no hay sol
+- temperatura_incoherente: la diferencia entre la temperatura del módulo y la ambiente se explica por la irradiación
+  (el módulo se calienta con el sol). Ajustamos por sensor t_modulo - t_ambiente = a + b * irradiacion con unas pocas sumas (np.bincount)
+  y marcamos las lecturas que se separan del ajuste más de una tolerancia
+- plano_<medida>: el sensor repite exactamente el mismo valor muchas lecturas seguidas (sensor bloqueado).
+  En la irradiación no cuentan los ceros, que son normales de noche
+- pico_<medida>: una lectura salta respecto a la anterior y a la siguiente en el mismo sentido más de un umbral y luego vuelve
+
+Las lecturas se ordenan una vez por sensor y fecha, y solo se comparan dos lecturas seguidas del mismo sensor si entre ellas no falta ninguna.
+El resultado son los intervalos marcados de cada sensor: lecturas seguidas del mismo sensor con la misma comprobación marcada.
+"""
+
+import numpy as np
+import pandas as pd
+
+from planta_solar.incremental import fuentes_de_tipo
+from planta_solar.ingesta import leer_fuentes
+from planta_solar.instrumentacion import instrumentada
+
+MEDIDAS = ['irradiacion', 't_ambiente', 't_modulo']
+
+# Horas sin sol: desde HORA_INICIO_NOCHE hasta antes de HORA_FIN_NOCHE (en los insights hay irradiación entre las 7 y las 17)
+
+HORA_INICIO_NOCHE = 20
+HORA_FIN_NOCHE = 5
+
+# Irradiación a partir de la cual una lectura nocturna es sospechosa
+
+IRRADIACION_NOCTURNA = 0.02
+
+# Grados que puede separarse t_modulo - t_ambiente de lo que corresponde a su irradiación según el ajuste del sensor
+
+TOLERANCIA_TEMPERATURA = 10
+
+# Lecturas seguidas con el mismo valor a partir de las cuales el sensor se considera bloqueado (8 lecturas de 15 minutos, 2 horas)
+
+LECTURAS_PLANAS = 8
+
+# Salto mínimo respecto a la lectura anterior y a la siguiente para considerar una lectura un pico
+
+SALTOS = {'irradiacion': 0.4, 't_ambiente': 8, 't_modulo': 15}
+
+# Separación máxima entre dos lecturas del mismo sensor para compararlas como seguidas
+
+INTERVALO_MAXIMO = '15min'
+
+
+def leer_sensores(plantas=None, desde=None, hasta=None):
+    """Lecturas de los sensores de las fuentes registradas, tal como vienen en los csv (fecha en el index), de las plantas indicadas (None para todas).
+
+    desde, hasta: período, como en loc (hasta incluye el día entero)
+    """
+
+    lotes = list(leer_fuentes(fuentes_de_tipo('sensor', plantas)))
+    if not lotes:
+        return pd.DataFrame({columna: pd.Series(dtype='float64' if columna in MEDIDAS else object) for columna in ['planta', 'sensor_id'] + MEDIDAS},
+                            index=pd.DatetimeIndex([], name='fecha'))
+
+    sensores = pd.concat(lotes, ignore_index=True).set_index('fecha').sort_index(kind='stable')
+
+    return sensores.loc[desde:hasta]
+
+
+def seguidas(sensores, fechas, intervalo_maximo=INTERVALO_MAXIMO):
+    """Si cada lectura (ordenadas por sensor y fecha) es la siguiente del mismo sensor respecto a la anterior, sin huecos."""
+
+    seguida = np.zeros(len(sensores), dtype=bool)
+    seguida[1:] = (sensores[1:] == sensores[:-1]) & (np.diff(fechas) <= pd.Timedelta(intervalo_maximo).value)
+
+    return seguida
+
+
+def irradiacion_nocturna(irradiacion, horas, umbral=IRRADIACION_NOCTURNA, inicio=HORA_INICIO_NOCHE, fin=HORA_FIN_NOCHE):
+    return ((horas >= inicio) | (horas < fin)) & (irradiacion > umbral)
+
+
+def temperatura_incoherente(irradiacion, t_ambiente, t_modulo, sensores, tolerancia=TOLERANCIA_TEMPERATURA):
+    """Lecturas cuya diferencia t_modulo - t_ambiente se separa más de tolerancia grados de la recta de su sensor frente a la irradiación."""
+
+    # Sin lecturas (un periodo o unas plantas sin clima) no hay ningún sensor que ajustar
+
+    if len(sensores) == 0:
+        return np.zeros(0, dtype=bool)
+
+    diferencia = t_modulo - t_ambiente
+    validas = ~(np.isnan(irradiacion) | np.isnan(diferencia))
+    codigos, x, y = sensores[validas], irradiacion[validas], diferencia[validas]
+
+    def suma(valores):
+        return np.bincount(codigos, weights=valores, minlength=sensores.max() + 1)
+
+    n, sx, sy, sxx, sxy = suma(np.ones(len(x))), suma(x), suma(y), suma(x * x), suma(x * y)
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        determinante = n * sxx - sx * sx
+        b = np.where(determinante > 0, (n * sxy - sx * sy) / determinante, 0.0)
+        a = (sy - b * sx) / n
+
+    residuo = diferencia - a[sensores] - b[sensores] * irradiacion
+
+    return validas & (np.abs(residuo) > tolerancia)
+
+
+def valor_plano(valores, seguida, lecturas_minimas=LECTURAS_PLANAS, ignorar=None):
+    """Lecturas que forman parte de una racha de al menos lecturas_minimas lecturas seguidas con el mismo valor.
+
+    ignorar: valor cuyas rachas no cuentan (el cero de la irradiación por la noche)
+    """
+
+    igual = seguida.copy()
+    igual[1:] &= valores[1:] == valores[:-1]
+
+    # Cada racha de valores iguales es un segmento: su número de lecturas sale de contar cuántas lecturas tiene cada identificador de racha
+
+    racha = np.cumsum(~igual) - 1
+    largo = np.bincount(racha)[racha]
+
+    plano = (largo >= lecturas_minimas) & ~np.isnan(valores)
+    if ignorar is not None:
+        plano &= valores != ignorar
+
+    return plano
+
+
+def pico(valores, seguida, salto):
+    """Lecturas que se separan más de salto de la anterior y de la siguiente, en el mismo sentido."""
+
+    anterior = np.full(len(valores), np.nan)
+    siguiente = np.full(len(valores), np.nan)
+    anterior[1:] = np.where(seguida[1:], valores[1:] - valores[:-1], np.nan)
+    siguiente[:-1] = np.where(seguida[1:], valores[:-1] - valores[1:], np.nan)
+
+    with np.errstate(invalid='ignore'):
+        return (np.sign(anterior) == np.sign(siguiente)) & (np.minimum(np.abs(anterior), np.abs(siguiente)) > salto)
+
+
+def marcar(clima, intervalo_maximo=INTERVALO_MAXIMO):
+    """Comprobaciones de cada lectura de los sensores (fecha en el index, con planta y sensor_id, como en leer_sensores).
+
+    Devuelve las lecturas ordenadas por sensor y fecha: planta, sensor_id, si es seguida de la anterior y una columna booleana por comprobación.
+    """
+
+    if clima.sensor_id.isna().any():
+        clima = clima[clima.sensor_id.notna()]
+
+    sensores, _ = pd.factorize(clima.sensor_id)
+    fechas = clima.index.asi8
+    orden = np.lexsort((fechas, sensores))
+
+    sensores, fechas = sensores[orden], fechas[orden]
+    valores = {medida: clima[medida].to_numpy(dtype='float64')[orden] for medida in MEDIDAS}
+    seguida = seguidas(sensores, fechas, intervalo_maximo)
+    indice = clima.index[orden]
+
+    marcas = pd.DataFrame({'planta': clima.planta.array.take(orden),
+                           'sensor_id': clima.sensor_id.array.take(orden),
+                           'seguida': seguida}, index=indice)
+
+    marcas['irradiacion_nocturna'] = irradiacion_nocturna(valores['irradiacion'], indice.hour)
+    marcas['temperatura_incoherente'] = temperatura_incoherente(valores['irradiacion'], valores['t_ambiente'], valores['t_modulo'], sensores)
+
+    for medida in MEDIDAS:
+        marcas[f'plano_{medida}'] = valor_plano(valores[medida], seguida, ignorar=0 if medida == 'irradiacion' else None)
+    for medida in MEDIDAS:
+        marcas[f'pico_{medida}'] = pico(valores[medida], seguida, SALTOS[medida])
+
+    return marcas
+
+
+def intervalos(marcas):
+    """Une las lecturas marcadas seguidas del mismo sensor y la misma comprobación en intervalos.
+
+    Devuelve un registro por intervalo: planta, sensor_id, comprobacion, inicio, fin y número de lecturas.
+    """
+
+    seguida = marcas.seguida.to_numpy()
+    fechas = marcas.index
+
+    resultado = []
+    for comprobacion in marcas.columns.difference(['planta', 'sensor_id', 'seguida'], sort=False):
+        marcada = marcas[comprobacion].to_numpy()
+
+        # Un intervalo empieza en una lectura marcada cuya anterior no está marcada o no es seguida, y termina igual con la siguiente
+
+        continua = np.zeros(len(marcada), dtype=bool)
+        continua[1:] = marcada[1:] & marcada[:-1] & seguida[1:]
+        inicios = np.flatnonzero(marcada & ~continua)
+        fines = np.flatnonzero(marcada & ~np.append(continua[1:], False))
+
+        resultado.append(pd.DataFrame({'planta': marcas.planta.array.take(inicios),
+                                       'sensor_id': marcas.sensor_id.array.take(inicios),
+                                       'comprobacion': comprobacion,
+                                       'inicio': fechas[inicios],
+                                       'fin': fechas[fines],
+                                       'lecturas': fines - inicios + 1}))
+
+    return pd.concat(resultado, ignore_index=True).sort_values(['sensor_id', 'inicio', 'comprobacion'], ignore_index=True)
+
+
+@instrumentada
+def validar_sensores(clima, intervalo_maximo=INTERVALO_MAXIMO):
+    """Intervalos marcados de cada sensor en sus lecturas (ver leer_sensores, marcar e intervalos)."""
+
+    return intervalos(marcar(clima, intervalo_maximo))
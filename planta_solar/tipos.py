@@ -0,0 +1,80 @@
+"""TIPOS COMPACTOS PARA EL DATAMART ANALÍTICO
+
+Por defecto Pandas guarda los identificadores (planta, inverter_id, sensor_id) como textos de Python, las medidas como float64 y los componentes de la fecha como int64.
+Con el datamart de toda la flota eso es mucha más memoria de la necesaria:
+
+- Los identificadores tienen muy pocos valores distintos que se repiten millones de veces: como categóricas se guardan una vez y cada registro solo lleva un código
+- La mayoría de las medidas no necesitan 15 dígitos de precisión: en float32 ocupan la mitad
+- mes, dia, hora y minuto caben de sobra en int8 (1 byte en vez de 8)
+
+Además los groupby por planta e inverter_id son más rápidos sobre categóricas, ya que agrupan por los códigos.
+OJO: al agrupar por una categórica hay que usar observed=True, si no Pandas genera también las combinaciones que no existen (por ejemplo los inverters de la planta 2 dentro de la planta 1).
+"""
+
+import numpy as np
+import pandas as pd
+
+from planta_solar.instrumentacion import instrumentada
+
+CATEGORICAS = ['planta', 'inverter_id', 'sensor_id']
+
+MEDIDAS = ['irradiacion', 't_ambiente', 't_modulo', 'kw_dc', 'kw_ac', 'eficiencia', 'kw_dia', 'kw_total']
+
+COMPONENTES_FECHA = ['mes', 'dia', 'hora', 'minuto']
+
+# Error máximo que admitimos al pasar una medida a float32.
+# Trabajamos con 2 decimales, así que no puede cambiar el segundo decimal.
+# kw_total por ejemplo son millones de kw y en float32 perdería las unidades, por lo que se queda en float64.
+
+ERROR_MAXIMO = 0.005
+
+
+def admite_float32(serie, error_maximo=ERROR_MAXIMO):
+    """Comprueba si la medida se puede pasar a float32 sin un error mayor que error_maximo."""
+
+    valores = serie.to_numpy(dtype='float64')
+    error = np.abs(valores.astype('float32').astype('float64') - valores)
+
+    return bool(np.nanmax(error, initial=0) <= error_maximo)
+
+
+def tipos_compactos(df, error_maximo=ERROR_MAXIMO):
+    """Tipo compacto de cada columna del dataframe que lo admita."""
+
+    tipos = {}
+
+    for columna in df.columns:
+        if columna in CATEGORICAS:
+            tipos[columna] = 'category'
+        elif columna in COMPONENTES_FECHA:
+            tipos[columna] = 'int8'
+        elif columna in MEDIDAS and admite_float32(df[columna], error_maximo):
+            tipos[columna] = 'float32'
+
+    return tipos
+
+
+@instrumentada
+def compactar_tipos(df, error_maximo=ERROR_MAXIMO):
+    """Devuelve el dataframe con tipos compactos y un informe de los bytes ahorrados por columna.
+
+    Solo se convierten de una en una las columnas afectadas, el resto se comparten con el dataframe original.
+    """
+
+    tipos = tipos_compactos(df, error_maximo)
+
+    compacto = df.copy(deep=False)
+    for columna, tipo in tipos.items():
+        compacto[columna] = df[columna].astype(tipo)
+
+    antes = df.memory_usage(deep=True)
+    despues = compacto.memory_usage(deep=True)
+
+    informe = pd.DataFrame({'tipo_antes': df.dtypes.astype(str),
+                            'tipo_despues': compacto.dtypes.astype(str),
+                            'bytes_antes': antes.drop('Index'),
+                            'bytes_despues': despues.drop('Index')})
+    informe['bytes_ahorrados'] = informe.bytes_antes - informe.bytes_despues
+    informe.loc['total'] = ['', '', antes.sum(), despues.sum(), antes.sum() - despues.sum()]
+
+    return compacto, informe
@@ -0,0 +1,9 @@
+"""PRUEBAS DEL PAQUETE planta_solar
+
+Pruebas de comportamiento de las funciones de la librería, comparándolas con la implementación directa en Pandas
+sobre datamarts sintéticos pequeños (benchmarks/comun.py), e incluyendo las entradas vacías.
+
+Se ejecutan desde la raíz del repositorio:
+
+python -m pytest tests
+"""
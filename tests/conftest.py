@@ -0,0 +1,27 @@
+import pytest
+
+from benchmarks.flota import generar_flota, usar_flota
+from planta_solar.ingesta import FUENTES, PLANTAS
+
+
+@pytest.fixture
+def flota(tmp_path):
+    """Generador de flotas sintéticas en tmp_path, registradas como las fuentes del proceso (ver benchmarks/flota.py).
+
+    Al terminar la prueba se restauran las fuentes originales.
+    """
+
+    fuentes, plantas = dict(FUENTES), dict(PLANTAS)
+
+    def generar(n_plantas=2, **opciones):
+        carpeta = str(tmp_path / 'Flota')
+        inyectados = generar_flota(carpeta, n_plantas, **opciones)
+        usar_flota(carpeta, n_plantas)
+        return inyectados
+
+    yield generar
+
+    FUENTES.clear()
+    FUENTES.update(fuentes)
+    PLANTAS.clear()
+    PLANTAS.update(plantas)
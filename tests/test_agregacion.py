@@ -0,0 +1,58 @@
+import numpy as np
+import pandas as pd
+
+from benchmarks.comun import datamart_sintetico
+from planta_solar.agregacion import AGREGACIONES, agregar_diario
+from planta_solar.derivadas import crear_variables
+
+
+def datamart(**opciones):
+    return crear_variables(datamart_sintetico(**opciones))
+
+
+def referencia(df):
+    """df_dia como se calculaba antes, con groupby y agg de Pandas."""
+
+    df_dia = df.groupby([df.planta, df.inverter_id, df.index.normalize()]).agg(AGREGACIONES)
+    df_dia.columns = [f'{variable}_{funcion}' for variable, funcion in df_dia.columns]
+
+    return df_dia.reset_index(['planta', 'inverter_id'])
+
+
+def test_igual_que_pandas():
+    df = datamart(plantas=2, inversores=3, dias=4)
+
+    # Nulos sueltos y un día entero sin temperatura del módulo en un inverter
+
+    df.loc[df.index[::7], 'irradiacion'] = np.nan
+    df.loc[(df.inverter_id == df.inverter_id.iloc[0]) & (df.index.normalize() == df.index[0].normalize()), 't_modulo'] = np.nan
+
+    df_dia = agregar_diario(df)
+
+    pd.testing.assert_frame_equal(df_dia, referencia(df), check_dtype=False, check_names=False)
+
+
+def test_solo_los_dias_con_registros():
+    df = datamart(plantas=1, inversores=2, dias=3)
+    df = df[df.index.normalize() != df.index[0].normalize() + pd.Timedelta('1D')]
+
+    df_dia = agregar_diario(df)
+
+    assert len(df_dia) == 2 * 2
+    pd.testing.assert_frame_equal(df_dia, referencia(df), check_dtype=False, check_names=False)
+
+
+def test_ignora_registros_sin_clave():
+    df = datamart(plantas=2, inversores=2, dias=2)
+    df.loc[df.index[::9], 'inverter_id'] = None
+
+    pd.testing.assert_frame_equal(agregar_diario(df), referencia(df), check_dtype=False, check_names=False)
+
+
+def test_sin_registros():
+    df = datamart(plantas=1, inversores=2, dias=1).iloc[:0]
+
+    df_dia = agregar_diario(df)
+
+    assert df_dia.empty
+    assert list(df_dia.columns) == ['planta', 'inverter_id'] + list(referencia(df).columns.drop(['planta', 'inverter_id']))
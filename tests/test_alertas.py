@@ -0,0 +1,61 @@
+import pandas as pd
+
+from planta_solar.alertas import DetectorDCCero, detectar_dc_cero
+from planta_solar.paralelo import procesar_plantas
+
+
+def test_detecta_los_fallos_inyectados(flota):
+    inyectados = flota(inversores=4, dias=5, fallos={'dc_cero': 0.3, 'huecos': 0})
+    df, _, _ = procesar_plantas(procesos=1)
+
+    alertas = detectar_dc_cero(df)
+
+    # Una alerta por periodo de DC cero, desde su primera lectura
+
+    esperadas = inyectados[inyectados.fallo == 'dc_cero']
+    assert len(esperadas) > 0
+
+    claves = ['planta', 'inverter_id', 'inicio']
+    detectadas = alertas[claves].astype(str).sort_values(claves, ignore_index=True)
+    pd.testing.assert_frame_equal(detectadas, esperadas[claves].astype(str).sort_values(claves, ignore_index=True))
+    assert (alertas.lecturas == 2).all()
+    assert (alertas.fecha - alertas.inicio == pd.Timedelta('15min')).all()
+
+
+def test_lecturas_en_tiempo_real():
+    detector = DetectorDCCero()
+    fecha = pd.Timestamp('2020-05-15 12:00')
+    cuarto = pd.Timedelta('15min')
+
+    detector.sensor('p2', fecha, 0.8)
+    assert detector.generacion('p2', 'A', fecha, 0.0) is None
+
+    # Una lectura con DC reinicia la cuenta
+
+    detector.sensor('p2', fecha + cuarto, 0.8)
+    assert detector.generacion('p2', 'A', fecha + cuarto, 500.0) is None
+    assert detector.generacion('p2', 'A', fecha + 2 * cuarto, 0.0) is None
+    alerta = detector.generacion('p2', 'A', fecha + 3 * cuarto, 0.0, irradiacion=0.8)
+
+    assert (alerta.inicio, alerta.fecha, alerta.lecturas) == (fecha + 2 * cuarto, fecha + 3 * cuarto, 2)
+    assert detector.en_fallo() == [('p2', 'A')]
+
+    # Mientras sigue en fallo no se repite la alerta
+
+    assert detector.generacion('p2', 'A', fecha + 4 * cuarto, 0.0, irradiacion=0.8) is None
+    assert len(detector.alertas) == 1
+
+
+def test_sin_irradiacion_no_es_fallo():
+    detector = DetectorDCCero()
+    fecha = pd.Timestamp('2020-05-15 20:00')
+
+    # De noche, y con la medición del sensor caducada
+
+    detector.sensor('p1', fecha, 0.0)
+    detector.sensor('p2', fecha - pd.Timedelta('1h'), 0.8)
+    for minutos in (0, 15, 30):
+        for planta in ('p1', 'p2'):
+            assert detector.generacion(planta, 'A', fecha + pd.Timedelta(minutes=minutos), 0.0) is None
+
+    assert detector.en_fallo() == []
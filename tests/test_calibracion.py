@@ -0,0 +1,67 @@
+import numpy as np
+import pandas as pd
+
+from planta_solar.calibracion import cargar_calibracion, estimar_calibracion, factores_registro, guardar_calibracion
+from planta_solar.clima import cargar_vista, guardar_estrella
+from planta_solar.paralelo import procesar_plantas
+
+
+def test_factor_de_la_planta_escalada(flota):
+    # La DC de la planta 1 viene multiplicada por 10, como en los datos originales
+
+    flota(inversores=4, dias=3, escala_dc=(1,))
+    df, _, _ = procesar_plantas(procesos=1)
+
+    tabla = estimar_calibracion(df)
+
+    assert (tabla.loc['p1'].factor_dc == 10).all()
+    assert (tabla.loc['p2'].factor_dc == 1).all()
+    np.testing.assert_allclose(tabla.ratio_planta.groupby('planta').first(), [10 / 0.9775, 1 / 0.9775], rtol=0.01)
+
+    # Con pocas lecturas válidas cada inverter toma el factor de su planta
+
+    assert (estimar_calibracion(df, lecturas_minimas=10 ** 6).factor_dc == tabla.factor_dc).all()
+
+
+def test_correccion_al_leer(flota, tmp_path):
+    flota(inversores=4, dias=2, escala_dc=(1,))
+    df, _, _ = procesar_plantas(procesos=1)
+    rutas = {'ruta': str(tmp_path / 'datamart'), 'ruta_clima': str(tmp_path / 'datamart_clima')}
+    guardar_estrella(df, **rutas)
+
+    ruta_calibracion = str(tmp_path / 'calibracion.csv')
+    guardar_calibracion(estimar_calibracion(df), ruta_calibracion)
+    calibracion = cargar_calibracion(ruta_calibracion)
+
+    corregido = cargar_vista(calibracion=calibracion, **rutas).unir()
+    original = cargar_vista(**rutas).unir()
+
+    de_p1 = (original.planta == 'p1').to_numpy()
+    np.testing.assert_allclose(corregido.kw_dc[de_p1], original.kw_dc[de_p1] / 10, rtol=1e-6)
+    np.testing.assert_allclose(corregido.eficiencia[de_p1], original.eficiencia[de_p1] * 10, rtol=1e-6)
+    pd.testing.assert_frame_equal(corregido[~de_p1], original[~de_p1])
+    assert corregido.kw_dc.dtype == original.kw_dc.dtype
+
+    # Tras la corrección las dos plantas tienen la misma eficiencia nominal
+
+    con_dc = corregido[corregido.kw_dc > 0]
+    assert (con_dc.groupby('planta', observed=True).eficiencia.median() > 95).all()
+
+
+def test_factores_de_cada_registro(flota):
+    flota(inversores=4, dias=1)
+    df, _, _ = procesar_plantas(procesos=1)
+
+    calibracion = estimar_calibracion(df).iloc[1:]
+    calibracion['factor_dc'] = np.arange(2, 2 + len(calibracion))
+
+    categoricas = factores_registro(df, calibracion)
+    textos = factores_registro(df.astype({'planta': str, 'inverter_id': str}), calibracion)
+
+    np.testing.assert_array_equal(categoricas, textos)
+
+    # El inverter que no está en la tabla no se corrige
+
+    primero = estimar_calibracion(df).index[0]
+    assert (categoricas[((df.planta == primero[0]) & (df.inverter_id == primero[1])).to_numpy()] == 1).all()
+    assert set(categoricas) == {1.0} | set(calibracion.factor_dc.astype('float64'))
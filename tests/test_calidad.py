@@ -0,0 +1,55 @@
+import numpy as np
+import pandas as pd
+
+from planta_solar.calidad import perfilar
+from planta_solar.ingesta import leer_fuente, leer_por_lotes
+
+
+def test_por_lotes_igual_que_de_una_vez(flota):
+    flota(inversores=3, dias=3, fallos={'huecos': 0.05})
+
+    completo = perfilar(leer_fuente('p1_generacion'))
+    por_lotes = perfilar(leer_por_lotes('p1_generacion', tamano_lote=100))
+
+    assert por_lotes['registros'] == completo['registros']
+    pd.testing.assert_frame_equal(por_lotes['columnas'], completo['columnas'])
+    pd.testing.assert_series_equal(por_lotes['lecturas_dia'], completo['lecturas_dia'])
+    pd.testing.assert_series_equal(por_lotes['lecturas_clave'], completo['lecturas_clave'])
+    pd.testing.assert_frame_equal(por_lotes['ratio_dc_ac'], completo['ratio_dc_ac'])
+
+
+def test_igual_que_pandas(flota):
+    flota(inversores=3, dias=3)
+    df = leer_fuente('p2_generacion')
+
+    informe = perfilar(leer_por_lotes('p2_generacion', tamano_lote=50))
+    columnas = informe['columnas']
+
+    assert informe['registros'] == len(df)
+    for columna in ('kw_dc', 'kw_ac', 'kw_dia'):
+        np.testing.assert_allclose(columnas.loc[columna, ['minimo', 'maximo', 'media', 'desviacion']].astype('float64'),
+                                   [df[columna].min(), df[columna].max(), df[columna].mean(), df[columna].std()], rtol=1e-9)
+    assert columnas.loc['inverter_id', 'cardinalidad'] == df.inverter_id.nunique()
+    assert columnas.loc['fecha', 'minimo'] == df.fecha.min()
+
+    pd.testing.assert_series_equal(informe['lecturas_dia'], df.fecha.dt.normalize().value_counts().sort_index(),
+                                   check_names=False)
+    assert informe['lecturas_clave'].sum() == len(df)
+
+    # Percentiles del ratio a partir del histograma: error máximo de un intervalo (0.01)
+
+    validos = df[df.kw_ac > 0]
+    ratio = validos.kw_dc / validos.kw_ac
+    for columna, percentil in (('p05', 0.05), ('p50', 0.5), ('p95', 0.95)):
+        assert abs(informe['ratio_dc_ac'].loc['p2', columna] - ratio.quantile(percentil)) <= 0.01
+
+
+def test_nulos():
+    lote = pd.DataFrame({'fecha': pd.to_datetime(['2020-05-15', None, '2020-05-16']),
+                         'planta': ['p1', 'p1', None],
+                         'kw_dc': [1.0, np.nan, np.nan]})
+
+    columnas = perfilar([lote.iloc[:1], lote.iloc[1:]], clave='planta')['columnas']
+
+    assert list(columnas.nulos) == [1, 1, 2]
+    assert columnas.loc['kw_dc', 'media'] == 1.0 and np.isnan(columnas.loc['kw_dc', 'desviacion'])
@@ -0,0 +1,51 @@
+import pandas as pd
+
+from planta_solar.clima import COLUMNAS_CLIMA, Vista, cargar_vista, guardar_estrella, separar_clima
+from planta_solar.paralelo import procesar_plantas
+
+
+def por_planta(df):
+    """Orden en que sale el datamart al cargarlo: por planta y, dentro de cada planta, por fecha."""
+
+    return df.sort_values('planta', kind='stable')
+
+
+def datamart():
+    """Datamart integrado de la flota, con huecos en los sensores para que haya registros de generación sin clima."""
+
+    df, _, _ = procesar_plantas(procesos=1)
+    return df
+
+
+def test_guardar_y_unir_igual_que_el_datamart(flota, tmp_path):
+    flota(inversores=3, dias=3, fallos={'huecos': 0.05})
+    df = datamart()
+    rutas = {'ruta': str(tmp_path / 'datamart'), 'ruta_clima': str(tmp_path / 'datamart_clima')}
+
+    guardar_estrella(df, **rutas)
+    vista = cargar_vista(**rutas)
+
+    assert df[COLUMNAS_CLIMA[1:]].isna().any(axis=1).any()
+    assert not vista.hechos.columns.isin(COLUMNAS_CLIMA).any()
+    assert not vista.clima.reset_index().duplicated(['fecha', 'planta']).any()
+    pd.testing.assert_frame_equal(vista.unir(), por_planta(df))
+
+    # Con filtros y solo algunas columnas
+
+    vista = cargar_vista(columnas=['inverter_id', 'irradiacion', 'kw_dc'], desde='2020-05-16', plantas=['p2'], **rutas)
+
+    esperado = df.loc['2020-05-16':, ['planta', 'inverter_id', 'irradiacion', 'kw_dc']]
+    esperado = esperado[esperado.planta == 'p2'].drop(columns='planta')
+    pd.testing.assert_frame_equal(vista.unir(), esperado, check_categorical=False)
+    pd.testing.assert_series_equal(vista.irradiacion, esperado.irradiacion)
+
+
+def test_columnas_de_la_vista(flota):
+    flota(inversores=3, dias=1)
+    hechos, clima = separar_clima(datamart())
+
+    vista = Vista(hechos, clima)
+
+    assert vista.t_modulo.index.equals(hechos.index)
+    assert list(vista.unir(['irradiacion', 'kw_dc']).columns) == ['irradiacion', 'kw_dc']
+    assert 'irradiacion' not in Vista(hechos).unir().columns
@@ -0,0 +1,35 @@
+import pandas as pd
+
+from planta_solar.coherencia import coherencia_diaria, verificar_coherencia
+from planta_solar.ingesta import leer_fuente
+
+SIN_FALLOS = {'dc_cero': 0, 'baja_eficiencia': 0, 'huecos': 0}
+
+
+def generacion(flota, **opciones):
+    flota(inversores=5, dias=10, **opciones)
+    return pd.concat([leer_fuente('p1_generacion'), leer_fuente('p2_generacion')], ignore_index=True)
+
+
+def test_flota_sin_fallos_es_coherente(flota):
+    gener = generacion(flota, fallos=SIN_FALLOS)
+
+    assert len(coherencia_diaria(gener)) == 2 * 5 * 10
+    assert verificar_coherencia(gener).empty
+
+
+def test_los_fallos_inyectados_no_rompen_la_coherencia(flota):
+    assert verificar_coherencia(generacion(flota)).empty
+
+
+def test_detecta_un_salto_de_kw_total(flota):
+    gener = generacion(flota, fallos=SIN_FALLOS)
+    inverter = gener.inverter_id.iloc[0]
+    dia = gener.fecha.dt.normalize() == pd.Timestamp('2020-05-20')
+
+    gener.loc[(gener.inverter_id == inverter) & dia, 'kw_total'] += 500
+
+    violaciones = verificar_coherencia(gener)
+
+    assert list(violaciones.inverter_id) == [inverter, inverter]
+    assert list(violaciones.fecha) == [pd.Timestamp('2020-05-20'), pd.Timestamp('2020-05-21')]
@@ -0,0 +1,70 @@
+import warnings
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.comun import datamart_sintetico
+from planta_solar.comparacion import clasificar, comparar, mediana_filas
+from planta_solar.cubo import construir_cubo
+
+
+def test_mediana_filas_igual_que_nanmedian():
+    rng = np.random.default_rng(0)
+    valores = rng.normal(size=(50, 7))
+    valores[rng.random(valores.shape) < 0.3] = np.nan
+    valores[3] = np.nan
+
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', RuntimeWarning)
+        esperada = np.nanmedian(valores, axis=1)
+
+    np.testing.assert_allclose(mediana_filas(valores), esperada)
+
+
+def test_mediana_filas_sin_columnas_ni_filas():
+    assert np.isnan(mediana_filas(np.empty((4, 0)))).all()
+    assert len(mediana_filas(np.empty((4, 0)))) == 4
+    assert len(mediana_filas(np.empty((0, 3)))) == 0
+
+
+def test_comparar_desviacion_respecto_a_la_mediana_de_la_planta():
+    df = datamart_sintetico(plantas=1, inversores=3, dias=1)
+    df.loc[df.inverter_id == 'inv001_000', 'kw_dc'] *= 0.5
+
+    comparacion = comparar(df)
+    mediana = df.groupby([df.index, 'planta']).kw_dc.transform('median')
+    mediana = mediana.where(mediana >= 0.05 * mediana.max())
+
+    np.testing.assert_allclose(comparacion.mediana_planta, mediana)
+    np.testing.assert_allclose(comparacion.desviacion, df.kw_dc / mediana - 1)
+
+
+def test_clasificar_marca_el_inverter_que_genera_la_mitad():
+    df = datamart_sintetico(plantas=2, inversores=4, dias=2)
+    df.loc[df.inverter_id == 'inv002_001', 'kw_dc'] *= 0.5
+
+    ranking = clasificar(df)
+
+    assert ranking.index[0] == ('p2', 'inv002_001')
+    assert ranking.bajo_rendimiento.sum() == 1
+    assert ranking.desviacion_media.iloc[0] < -0.4
+
+
+def test_clasificar_igual_con_el_cubo():
+    df = datamart_sintetico(plantas=2, inversores=3, dias=1)
+
+    desde_datamart = clasificar(df)
+    desde_cubo = clasificar(construir_cubo(df))
+
+    pd.testing.assert_frame_equal(desde_datamart, desde_cubo.loc[desde_datamart.index], check_exact=False, rtol=1e-5)
+
+
+def test_clasificar_sin_datos_devuelve_un_ranking_vacio():
+    df = datamart_sintetico(plantas=1, inversores=3, dias=1)
+
+    ranking = clasificar(df.iloc[:0])
+    assert ranking.empty
+    assert list(ranking.columns) == ['fechas_comparadas', 'desviacion_media', 'desviacion_mediana', 'porcentaje_bajo', 'bajo_rendimiento']
+
+    assert clasificar(construir_cubo(df).periodo('2021-01-01')).empty
+    assert clasificar(construir_cubo(df).seleccionar('p9')).empty
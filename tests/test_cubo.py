@@ -0,0 +1,66 @@
+import json
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from benchmarks.comun import datamart_sintetico
+from planta_solar.cubo import FICHERO_INDICE, abrir_cubo, construir_cubo, guardar_cubo
+
+
+def datamart():
+    df = datamart_sintetico(plantas=2, inversores=3, dias=2)
+    df['eficiencia'] = df.kw_ac / df.kw_dc * 100
+
+    # Sin alguna lectura, para que el cubo tenga huecos
+
+    return df.drop(df.index[[5, 40, 41]])
+
+
+def pivotar(df, medida):
+    return df.set_index(['planta', 'inverter_id'], append=True)[medida].unstack(['planta', 'inverter_id'])
+
+
+def test_tabla_igual_que_unstack(tmp_path):
+    df = datamart()
+    cubo = guardar_cubo(df, str(tmp_path / 'cubo'))
+
+    for medida in ['kw_dc', 'irradiacion']:
+        esperada = pivotar(df, medida).astype('float32')
+        pd.testing.assert_frame_equal(cubo.tabla(medida), esperada, check_names=False, check_freq=False)
+
+    semana = cubo.seleccionar('p2').periodo('2020-05-16')
+    esperada = pivotar(df[df.planta == 'p2'].loc['2020-05-16'], 'kw_dc').astype('float32')
+    pd.testing.assert_frame_equal(semana.tabla('kw_dc'), esperada, check_names=False, check_freq=False)
+
+
+def test_cada_medida_es_un_bloque_contiguo(tmp_path):
+    cubo = guardar_cubo(datamart(), str(tmp_path / 'cubo'))
+
+    assert cubo.medida('kw_dc').flags.c_contiguous
+    assert cubo.valores.shape == (len(cubo.medidas), len(cubo.fechas), len(cubo.inverters))
+
+
+def test_largo_vuelve_al_datamart():
+    df = datamart()
+    largo = construir_cubo(df).largo(['kw_dc', 'kw_ac'])
+
+    esperado = df[['planta', 'inverter_id', 'kw_dc', 'kw_ac']].sort_values(['fecha', 'planta', 'inverter_id'])
+    assert len(largo) == len(df)
+    np.testing.assert_allclose(largo[['kw_dc', 'kw_ac']].to_numpy(), esperado[['kw_dc', 'kw_ac']].to_numpy(), rtol=1e-6)
+    assert (largo.inverter_id.to_numpy() == esperado.inverter_id.to_numpy()).all()
+
+
+def test_no_abre_cubos_sin_orden_de_los_ejes(tmp_path):
+    ruta = str(tmp_path / 'cubo')
+    guardar_cubo(datamart(), ruta)
+
+    with open(os.path.join(ruta, FICHERO_INDICE)) as f:
+        indice = json.load(f)
+    del indice['ejes']
+    with open(os.path.join(ruta, FICHERO_INDICE), 'w') as f:
+        json.dump(indice, f)
+
+    with pytest.raises(ValueError):
+        abrir_cubo(ruta)
@@ -0,0 +1,68 @@
+import pandas as pd
+
+from benchmarks.comun import datamart_sintetico
+from planta_solar.datamart import cargar_datamart, fusionar_datamart, guardar_datamart
+from planta_solar.tipos import compactar_tipos
+
+
+def datamart(dias=40):
+    """Datamart compacto de 2 plantas que ocupa dos meses (15 de mayo a 23 de junio con 40 días)."""
+
+    return compactar_tipos(datamart_sintetico(plantas=2, inversores=3, dias=dias))[0]
+
+
+def por_planta(df):
+    """Orden en que sale el datamart al cargarlo: por planta y, dentro de cada planta, por fecha."""
+
+    return df.sort_values('planta', kind='stable')
+
+
+def test_guardar_y_cargar(tmp_path):
+    df = datamart()
+    ruta = str(tmp_path / 'datamart')
+
+    guardar_datamart(df, ruta)
+
+    pd.testing.assert_frame_equal(cargar_datamart(ruta), por_planta(df))
+
+
+def test_columnas_fechas_y_plantas(tmp_path):
+    df = datamart()
+    ruta = str(tmp_path / 'datamart')
+    guardar_datamart(df, ruta)
+
+    cargado = cargar_datamart(ruta, columnas=['planta', 'kw_dc'], desde='2020-05-30', hasta='2020-06-02', plantas=['p2'])
+
+    esperado = df.loc['2020-05-30':'2020-06-02', ['planta', 'kw_dc']]
+    esperado = esperado[esperado.planta == 'p2']
+    pd.testing.assert_frame_equal(cargado, esperado, check_categorical=False)
+
+    # Los límites con hora se comparan con la hora exacta, como en loc
+
+    cargado = cargar_datamart(ruta, desde='2020-05-31 23:45', hasta='2020-06-01 00:15')
+    pd.testing.assert_frame_equal(cargado, por_planta(df.loc['2020-05-31 23:45':'2020-06-01 00:15']))
+
+
+def test_fusionar_reescribe_solo_lo_nuevo(tmp_path):
+    df = datamart()
+    ruta = str(tmp_path / 'datamart')
+
+    guardar_datamart(df.loc[:'2020-06-10'], ruta)
+
+    # Los registros nuevos solapan un día con los guardados y traen valores distintos para ese día
+
+    nuevo = df.loc['2020-06-10':].copy()
+    nuevo['kw_dc'] += 1
+    fusionar_datamart(nuevo, ruta)
+
+    esperado = pd.concat([df.loc[:'2020-06-09'], nuevo])
+    pd.testing.assert_frame_equal(cargar_datamart(ruta), por_planta(esperado))
+
+
+def test_fusionar_sin_datamart_previo(tmp_path):
+    df = datamart(dias=3)
+    ruta = str(tmp_path / 'datamart')
+
+    fusionar_datamart(df, ruta)
+
+    pd.testing.assert_frame_equal(cargar_datamart(ruta), por_planta(df))
@@ -0,0 +1,78 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import planta_solar.derivadas as derivadas
+from benchmarks.comun import datamart_sintetico
+from planta_solar.derivadas import CACHE, ORDEN, componentes_fecha, crear_variables, eficiencia_inverter, vaciar_cache
+
+
+@pytest.fixture(autouse=True)
+def cache_vacia():
+    vaciar_cache()
+    yield
+    vaciar_cache()
+
+
+def test_igual_que_el_calculo_original():
+    df = datamart_sintetico(plantas=2, inversores=3, dias=2)
+
+    # El cálculo de analisis_planta_solar_variables.py: concat de los componentes y la eficiencia sobre el index reiniciado
+
+    eficiencia = eficiencia_inverter(df.kw_ac, df.kw_dc).rename('eficiencia').reset_index(drop=True)
+    original = pd.concat([df.reset_index(), componentes_fecha(df), eficiencia], axis=1).set_index('fecha')[ORDEN]
+
+    pd.testing.assert_frame_equal(crear_variables(df), original, check_dtype=False)
+    assert 'eficiencia' not in df.columns
+
+
+def test_eficiencia_cero_sin_dc():
+    df = datamart_sintetico(plantas=1, inversores=2, dias=1)
+
+    eficiencia = df.derivadas.eficiencia
+
+    assert (eficiencia[df.kw_dc == 0] == 0).all()
+    np.testing.assert_allclose(eficiencia[df.kw_dc > 0], (df.kw_ac / df.kw_dc * 100)[df.kw_dc > 0])
+
+
+def test_memoriza_por_contenido():
+    df = datamart_sintetico(plantas=1, inversores=2, dias=1)
+
+    hora = df.derivadas.hora
+    assert len(CACHE) == 1
+
+    # El mismo contenido en otro dataframe reutiliza lo memorizado, y lo memorizado no se puede modificar
+
+    assert np.shares_memory(df.copy().derivadas.hora.to_numpy(), hora.to_numpy())
+    with pytest.raises(ValueError):
+        hora.to_numpy()[0] = 5
+
+    # Con otras fechas se vuelve a calcular
+
+    otro = df.set_axis(df.index + pd.Timedelta('1h'))
+    assert (otro.derivadas.hora != hora.to_numpy()).any()
+    assert len(CACHE) == 2
+
+    # Las columnas añadidas son copias que sí se pueden modificar
+
+    df.derivadas.anadir('hora')
+    df.loc[df.index[0], 'hora'] = 5
+    assert hora.iloc[0] == 0
+
+
+def test_limite_de_memoria(monkeypatch):
+    df = datamart_sintetico(plantas=1, inversores=2, dias=1)
+    monkeypatch.setattr(derivadas, 'MAXIMO_CACHE_MB', 2 * df.index.hour.nbytes / 1024 ** 2)
+
+    df.derivadas.anadir('mes', 'dia', 'hora', 'minuto')
+
+    assert [clave[0] for clave in CACHE] == ['hora', 'minuto']
+
+
+def test_variable_desconocida():
+    df = datamart_sintetico(plantas=1, inversores=2, dias=1)
+
+    with pytest.raises(KeyError, match='no es una variable derivada'):
+        df.derivadas['semana']
+    with pytest.raises(AttributeError):
+        df.derivadas.semana
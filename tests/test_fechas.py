@@ -0,0 +1,42 @@
+import numpy as np
+import pandas as pd
+
+from planta_solar.fechas import convertir_fechas, resumen_fechas
+
+FORMATO_P1 = '%d-%m-%Y %H:%M'
+
+
+def test_igual_que_to_datetime():
+    fechas = pd.date_range('2020-05-01', periods=200, freq='15min')
+    textos = pd.Series(np.repeat(fechas.strftime(FORMATO_P1), 3), index=np.arange(600) * 2, name='DATE_TIME')
+
+    convertidas, no_validas = convertir_fechas(textos, FORMATO_P1)
+
+    pd.testing.assert_series_equal(convertidas, pd.to_datetime(textos, format=FORMATO_P1))
+    assert no_validas.empty
+
+
+def test_el_dia_va_delante():
+    convertidas, _ = convertir_fechas(pd.Series(['06-05-2020 10:15']), FORMATO_P1)
+
+    assert convertidas[0] == pd.Timestamp('2020-05-06 10:15')
+
+
+def test_devuelve_aparte_las_que_no_cumplen_el_formato():
+    textos = pd.Series(['15-05-2020 00:00', '2020-05-15 00:15:00', None, '15-05-2020 00:30', '32-05-2020 00:00'])
+
+    convertidas, no_validas = convertir_fechas(textos, FORMATO_P1)
+
+    assert list(convertidas.isna()) == [False, True, True, False, True]
+    assert list(no_validas.index) == [1, 2, 4]
+    assert (no_validas.formato == FORMATO_P1).all()
+
+    resumen = resumen_fechas([no_validas.assign(fuente='p1_generacion')])
+    assert resumen.registros.sum() == 3
+
+
+def test_sin_textos():
+    convertidas, no_validas = convertir_fechas(pd.Series([], dtype=object), FORMATO_P1)
+
+    assert convertidas.empty and no_validas.empty
+    assert resumen_fechas([]).empty
@@ -0,0 +1,63 @@
+import pandas as pd
+
+from planta_solar.huecos import detectar_huecos, faltantes_por_dia
+
+DESDE, HASTA = pd.Timestamp('2020-05-15 00:00'), pd.Timestamp('2020-05-17 23:45')
+
+# Lecturas que se quitan de la malla completa: (planta, inverter, primera, última)
+
+HUECOS = [('p1', 'A', '2020-05-15 10:00', '2020-05-15 10:45'),
+          ('p1', 'A', '2020-05-15 23:30', '2020-05-16 00:30'),
+          ('p1', 'B', '2020-05-15 00:00', '2020-05-15 01:00'),
+          ('p2', 'A', '2020-05-17 12:00', '2020-05-17 12:00'),
+          ('p2', 'A', '2020-05-17 22:00', '2020-05-17 23:45')]
+
+
+def lecturas():
+    """Malla de 15 minutos de dos inverters en dos plantas sin las lecturas de HUECOS."""
+
+    malla = pd.MultiIndex.from_product([['p1', 'p2'], ['A', 'B'], pd.date_range(DESDE, HASTA, freq='15min')],
+                                       names=['planta', 'inverter_id', 'fecha']).to_frame(index=False)
+
+    falta = pd.Series(False, index=malla.index)
+    for planta, inverter, inicio, fin in HUECOS:
+        falta |= (malla.planta == planta) & (malla.inverter_id == inverter) & malla.fecha.between(inicio, fin)
+
+    return malla[~falta].reset_index(drop=True), malla[falta]
+
+
+def test_huecos_inyectados():
+    df, _ = lecturas()
+
+    huecos = detectar_huecos(df, desde=DESDE, hasta=HASTA)
+
+    esperados = pd.DataFrame(HUECOS, columns=['planta', 'inverter_id', 'inicio', 'fin']).astype({'inicio': 'datetime64[ns]', 'fin': 'datetime64[ns]'})
+    pd.testing.assert_frame_equal(huecos[['planta', 'inverter_id', 'inicio', 'fin']], esperados)
+    assert list(huecos.lecturas_faltantes) == [4, 5, 5, 1, 8]
+
+
+def test_sin_periodo_solo_huecos_intermedios():
+    df, _ = lecturas()
+
+    huecos = detectar_huecos(df)
+
+    assert list(huecos.lecturas_faltantes) == [4, 5, 1]
+
+
+def test_faltantes_por_dia_igual_que_pandas():
+    df, faltan = lecturas()
+
+    faltantes = faltantes_por_dia(detectar_huecos(df, desde=DESDE, hasta=HASTA))
+
+    referencia = faltan.groupby(['planta', faltan.fecha.dt.normalize().rename('dia')]).size().rename('lecturas_faltantes').reset_index()
+    pd.testing.assert_frame_equal(faltantes, referencia, check_dtype=False)
+
+
+def test_sin_lecturas():
+    df, _ = lecturas()
+    vacio = df.iloc[:0]
+
+    for huecos in (detectar_huecos(vacio), detectar_huecos(vacio, desde=DESDE, hasta=HASTA)):
+        assert huecos.empty
+        assert list(huecos.columns) == ['planta', 'inverter_id', 'inicio', 'fin', 'lecturas_faltantes', 'duracion']
+        assert faltantes_por_dia(huecos).empty
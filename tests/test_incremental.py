@@ -0,0 +1,113 @@
+import pandas as pd
+
+from benchmarks.flota import formato_generacion, rutas_planta
+from planta_solar.clima import cargar_vista
+from planta_solar.datamart import cargar_datamart
+from planta_solar.incremental import actualizar, cargar_marcas, fuentes_de_tipo
+from planta_solar.ingesta import FORMATO_ISO
+from planta_solar.rollup import cargar_rollup, construir_rollup, guardar_rollup
+
+CORTE = pd.Timestamp('2020-05-17 12:07')
+
+
+def rutas(carpeta):
+    return {'ruta': str(carpeta / 'datamart'), 'ruta_dia': str(carpeta / 'datamart_dia'), 'ruta_clima': str(carpeta / 'datamart_clima'),
+            'ruta_marcas': str(carpeta / 'marcas_agua.json'), 'ruta_rollup': str(carpeta / 'rollup')}
+
+
+def actualizar_en(carpeta):
+    return actualizar(fuentes_de_tipo('generacion'), fuentes_de_tipo('sensor'), **rutas(carpeta))
+
+
+def cortar(carpeta, numeros=(1, 2)):
+    """Corta los ficheros de las plantas numeros en CORTE. Devuelve su contenido original por ruta."""
+
+    ficheros = {}
+    for numero in numeros:
+        for ruta, formato in zip(rutas_planta(str(carpeta), numero), (formato_generacion(numero), FORMATO_ISO)):
+            ficheros[ruta] = pd.read_csv(ruta, dtype=str)
+            ficheros[ruta][pd.to_datetime(ficheros[ruta].DATE_TIME, format=formato) < CORTE].to_csv(ruta, index=False)
+
+    return ficheros
+
+
+def restaurar(ficheros):
+    for ruta, fichero in ficheros.items():
+        fichero.to_csv(ruta, index=False)
+
+
+def construir_rollup_en(carpeta):
+    rutas_carpeta = rutas(carpeta)
+    guardar_rollup(construir_rollup(cargar_vista(rutas_carpeta['ruta'], rutas_carpeta['ruta_clima']).unir()), rutas_carpeta['ruta_rollup'])
+
+
+def ordenado(df, claves):
+    df = df.reset_index()
+    for clave in ('planta', 'inverter_id'):
+        if clave in df:
+            df[clave] = df[clave].astype(str)
+
+    return df.sort_values(claves, ignore_index=True)
+
+
+def test_igual_que_construir_todo(flota, tmp_path):
+    flota(inversores=3, dias=5)
+    completo, incremental = rutas(tmp_path / 'completo'), rutas(tmp_path / 'incremental')
+
+    actualizar_en(tmp_path / 'completo')
+    construir_rollup_en(tmp_path / 'completo')
+
+    # Primero con los ficheros cortados a media tarde, después con los completos
+
+    ficheros = cortar(tmp_path / 'Flota')
+    actualizar_en(tmp_path / 'incremental')
+    construir_rollup_en(tmp_path / 'incremental')
+    restaurar(ficheros)
+
+    informe = actualizar_en(tmp_path / 'incremental')
+    assert informe['registros_nuevos'] > 0
+    assert actualizar_en(tmp_path / 'incremental')['registros_nuevos'] == 0
+
+    for tabla, claves in (('ruta', ['fecha', 'planta', 'inverter_id']), ('ruta_dia', ['fecha', 'planta', 'inverter_id']),
+                          ('ruta_clima', ['fecha', 'planta'])):
+        pd.testing.assert_frame_equal(ordenado(cargar_datamart(incremental[tabla]), claves),
+                                      ordenado(cargar_datamart(completo[tabla]), claves))
+
+    claves = ['fecha', 'planta', 'hora', 'inverter_id']
+    pd.testing.assert_frame_equal(ordenado(cargar_rollup(incremental['ruta_rollup']), claves),
+                                  ordenado(cargar_rollup(completo['ruta_rollup']), claves), rtol=1e-6)
+
+
+def test_planta_sin_datos_nuevos_conserva_su_marca(flota, tmp_path):
+    flota(inversores=3, dias=5)
+    incremental = rutas(tmp_path / 'incremental')
+
+    ficheros = cortar(tmp_path / 'Flota')
+    actualizar_en(tmp_path / 'incremental')
+    construir_rollup_en(tmp_path / 'incremental')
+
+    def marcas_p2():
+        return cargar_marcas(incremental['ruta_marcas'])['inverters'].loc['p2']
+
+    def lecturas_p2():
+        rollup = cargar_rollup(incremental['ruta_rollup'])
+        return rollup[rollup.planta == 'p2'].kw_dc_count.sum()
+
+    marcas, lecturas = marcas_p2(), lecturas_p2()
+
+    # Solo la planta 1 tiene lecturas nuevas
+
+    restaurar({ruta: fichero for ruta, fichero in ficheros.items() if ruta in rutas_planta(str(tmp_path / 'Flota'), 1)})
+
+    assert actualizar_en(tmp_path / 'incremental')['registros_nuevos'] > 0
+    pd.testing.assert_series_equal(marcas_p2(), marcas)
+
+    assert actualizar_en(tmp_path / 'incremental')['registros_nuevos'] == 0
+    assert lecturas_p2() == lecturas
+
+
+def test_sin_fuentes(tmp_path):
+    informe = actualizar([], [], **rutas(tmp_path))
+
+    assert informe['registros_nuevos'] == 0
+    assert informe['dias_recalculados'] == 0
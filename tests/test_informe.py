@@ -0,0 +1,47 @@
+import os
+
+import pytest
+
+from benchmarks.comun import datamart_sintetico
+from planta_solar.cubo import guardar_cubo
+from planta_solar.derivadas import crear_variables
+from planta_solar.informe import FIGURAS, generar_informe, informe_planta
+from planta_solar.rollup import construir_rollup, guardar_rollup
+
+
+@pytest.fixture
+def rutas(tmp_path):
+    """Cubo y rollup de un datamart de 2 plantas, como los guarda analisis_planta_solar_variables.py."""
+
+    df = crear_variables(datamart_sintetico(plantas=2, inversores=3, dias=3))
+
+    rutas = {'ruta_cubo': str(tmp_path / 'cubo'), 'ruta_rollup': str(tmp_path / 'rollup'),
+             'ruta_calibracion': str(tmp_path / 'calibracion.csv')}
+    guardar_cubo(df, rutas['ruta_cubo'])
+    guardar_rollup(construir_rollup(df), rutas['ruta_rollup'])
+
+    return rutas
+
+
+def test_un_fichero_por_grafico(rutas, tmp_path):
+    carpeta = tmp_path / 'Informe'
+
+    registros = generar_informe(carpeta=str(carpeta), procesos=2, **rutas)
+
+    assert len(registros) == 2 * len(FIGURAS) + 1
+    assert list(registros.planta.dropna().unique()) == ['p1', 'p2']
+    for fichero in registros.fichero:
+        assert (carpeta / fichero).stat().st_size > 0
+
+    indice = (carpeta / 'indice.html').read_text(encoding='utf-8')
+    assert all(fichero in indice for fichero in registros.fichero)
+
+
+def test_solo_las_figuras_pedidas(rutas, tmp_path):
+    carpeta = str(tmp_path / 'Informe')
+
+    registros = informe_planta('p2', carpeta, rutas['ruta_cubo'], rutas['ruta_rollup'], formato='svg', figuras=['ranking'],
+                               ruta_calibracion=rutas['ruta_calibracion'])
+
+    assert [registro['fichero'] for registro in registros] == [os.path.join('p2', 'ranking.svg')]
+    assert os.listdir(os.path.join(carpeta, 'p2')) == ['ranking.svg']
@@ -0,0 +1,55 @@
+import pandas as pd
+import pytest
+
+from planta_solar.ingesta import COLUMNAS, FUENTES, leer_fuente, leer_fuentes, leer_por_lotes
+
+
+def leer_completo(fuente):
+    """Lectura del fichero completo con pd.read_csv y las mismas transformaciones, como en analisis_planta_solar_datos.py."""
+
+    config = FUENTES[fuente]
+    df = pd.read_csv(config['ruta'], dtype={'DATE_TIME': str, 'SOURCE_KEY': str})
+    df['DATE_TIME'] = pd.to_datetime(df.DATE_TIME, format=config['formato_fecha'])
+    df['PLANT_ID'] = config['planta']
+
+    return df.rename(columns=COLUMNAS[config['tipo']])
+
+
+@pytest.mark.parametrize('tamano_lote', [1000, 7, 10 ** 6])
+def test_lotes_igual_que_leer_el_fichero_completo(flota, tamano_lote):
+    flota(inversores=3, dias=2)
+
+    for fuente in ('p1_generacion', 'p1_sensor', 'p2_generacion'):
+        lotes = list(leer_por_lotes(fuente, tamano_lote))
+
+        assert all(len(lote) <= tamano_lote for lote in lotes)
+        pd.testing.assert_frame_equal(pd.concat(lotes, ignore_index=True), leer_completo(fuente))
+
+
+def test_fecha_fuera_de_formato(flota):
+    flota(inversores=3, dias=1)
+
+    ruta = FUENTES['p2_generacion']['ruta']
+    fichero = pd.read_csv(ruta, dtype=str)
+    fichero.loc[[0, 5], 'DATE_TIME'] = ['15-05-2020 00:00', 'sin fecha']
+    fichero.to_csv(ruta, index=False)
+
+    with pytest.raises(ValueError, match='2 registros de p2_generacion'):
+        leer_fuente('p2_generacion')
+
+    # Con la lista de rechazos los registros se apartan y el resto se carga
+
+    rechazos = []
+    df = leer_fuente('p2_generacion', tamano_lote=4, rechazos=rechazos)
+
+    assert len(df) == len(fichero) - 2
+    assert df.fecha.notna().all()
+    assert list(pd.concat(rechazos).valor) == ['15-05-2020 00:00', 'sin fecha']
+    assert (pd.concat(rechazos).fuente == 'p2_generacion').all()
+
+
+def test_fuentes_de_tipos_distintos(flota):
+    flota(inversores=3, dias=1)
+
+    with pytest.raises(ValueError, match='mismo tipo'):
+        list(leer_fuentes(['p1_generacion', 'p1_sensor']))
@@ -0,0 +1,97 @@
+import json
+import os
+import time
+
+import pandas as pd
+import pytest
+
+from planta_solar.instrumentacion import (VARIABLE_PERFIL, VARIABLE_TRAZA, activar, comparar_trazas, desactivar, etapa, instrumentada,
+                                          leer_traza, resumen_traza)
+
+
+@instrumentada
+def duplicar(df):
+    return pd.concat([df, df])
+
+
+@pytest.fixture
+def traza(tmp_path, monkeypatch):
+    """Ruta de una traza activa durante la prueba. Al terminar se desactiva y se restauran las variables de entorno."""
+
+    monkeypatch.delenv(VARIABLE_TRAZA, raising=False)
+    monkeypatch.delenv(VARIABLE_PERFIL, raising=False)
+    ruta = tmp_path / 'traza.jsonl'
+
+    yield ruta
+
+    desactivar()
+
+
+def test_sin_activar_no_se_mide_nada(traza):
+    with etapa('lectura') as e:
+        assert e.salida(5) == 5
+    duplicar(pd.DataFrame({'a': [1]}))
+
+    assert not traza.exists()
+
+
+def test_un_registro_por_etapa(traza):
+    activar(str(traza))
+    df = pd.DataFrame({'a': range(10)})
+
+    with etapa('lectura') as e:
+        e.salida(df)
+        with etapa('agregacion', df):
+            duplicar(df)
+
+    registros = [json.loads(linea) for linea in traza.read_text(encoding='utf-8').splitlines()]
+
+    # Cada etapa se escribe al terminar: primero las más internas
+
+    assert [(r['etapa'], r['padre'], r['nivel']) for r in registros] == [('duplicar', 'agregacion', 2), ('agregacion', 'lectura', 1),
+                                                                         ('lectura', None, 0)]
+    assert [(r['filas_entrada'], r['filas_salida']) for r in registros] == [(10, 20), (10, None), (None, 10)]
+    assert all(r['segundos'] >= 0 and r['pico_rss_mb'] > 0 and r['error'] is None for r in registros)
+
+
+def test_etapa_con_error(traza):
+    activar(str(traza))
+
+    with pytest.raises(KeyError):
+        with etapa('fallida'):
+            raise KeyError('kw_dc')
+
+    assert leer_traza(traza).error.tolist() == ['KeyError']
+
+
+def test_perfil_de_una_etapa(traza):
+    activar(str(traza), 'duplicar')
+
+    duplicar(pd.DataFrame({'a': [1]}))
+
+    perfil = leer_traza(traza).perfil[0]
+    assert perfil.endswith('.prof') and '.duplicar.' in perfil
+    assert os.path.getsize(perfil) > 0
+
+
+def test_resumen_y_regresion(traza, tmp_path):
+    anterior, actual = tmp_path / 'anterior.jsonl', tmp_path / 'actual.jsonl'
+    df = pd.DataFrame({'a': range(1000)})
+
+    for ruta, pausa in ((anterior, 0.01), (actual, 0.05)):
+        activar(str(ruta))
+        for _ in range(2):
+            with etapa('lenta', df):
+                time.sleep(pausa)
+            with etapa('rapida', df):
+                pass
+        desactivar()
+
+    resumen = resumen_traza(actual)
+    assert resumen.loc['lenta', 'veces'] == 2 and resumen.loc['lenta', 'filas_entrada'] == 2000
+    assert resumen.loc['lenta', 'segundos'] >= 0.1
+    assert resumen.loc['lenta', 'filas_s'] == pytest.approx(2000 / resumen.loc['lenta', 'segundos'])
+
+    comparacion = comparar_trazas(anterior, actual)
+    assert comparacion.loc['lenta', 'regresion']
+    assert comparacion.loc['lenta', 'ratio_segundos'] > 2
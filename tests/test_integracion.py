@@ -0,0 +1,63 @@
+import numpy as np
+import pandas as pd
+
+from planta_solar.integracion import integrar
+
+
+def generacion(fechas, planta, inversores=2):
+    fechas = pd.DatetimeIndex(fechas)
+    return pd.DataFrame({'fecha': np.repeat(fechas, inversores), 'planta': planta,
+                         'inverter_id': np.tile([f'{planta}_{i}' for i in range(inversores)], len(fechas)),
+                         'kw_dc': np.arange(len(fechas) * inversores, dtype='float64')})
+
+
+def sensor(fechas, planta):
+    fechas = pd.DatetimeIndex(fechas)
+    return pd.DataFrame({'fecha': fechas, 'planta': planta, 'irradiacion': np.linspace(0, 1, len(fechas))})
+
+
+def test_igual_que_merge_exacto_cuando_coinciden_las_fechas():
+    fechas = pd.date_range('2020-05-15', periods=96, freq='15min')
+    gener = pd.concat([generacion(fechas, 'p1'), generacion(fechas, 'p2')], ignore_index=True)
+    temper = pd.concat([sensor(fechas, 'p1'), sensor(fechas, 'p2').assign(irradiacion=lambda df: df.irradiacion + 1)],
+                       ignore_index=True)
+
+    df, informe = integrar(gener, temper)
+
+    esperado = gener.merge(temper, on=['fecha', 'planta']).sort_values('fecha', kind='stable', ignore_index=True)
+    pd.testing.assert_frame_equal(df, esperado)
+    assert informe.empty
+
+
+def test_mediciones_que_faltan():
+    fechas = pd.date_range('2020-05-15', periods=8, freq='15min')
+    gener = generacion(fechas, 'p1')
+
+    # Falta la medición de las 00:45 y no hay ninguna después de la 01:00
+
+    temper = sensor(fechas[[0, 1, 2, 4]], 'p1')
+
+    df, informe = integrar(gener, temper)
+
+    assert df.irradiacion.isna().sum() == 2 * 2
+    assert (df.loc[df.fecha == fechas[3], 'irradiacion'] == temper.irradiacion[2]).all()
+
+    assert list(informe.fecha) == list(fechas[[3, 5, 6, 7]])
+    assert list(informe.registros) == [0, 0, 2, 2]
+    assert list(informe.aproximados) == [2, 2, 0, 0]
+
+    # Sin tolerancia todos los registros encuentran medición
+
+    df, informe = integrar(gener, temper, tolerancia=None)
+
+    assert df.irradiacion.notna().all()
+    assert informe.registros.sum() == 0 and informe.aproximados.sum() == 2 * 4
+
+
+def test_solo_con_la_medicion_de_su_planta():
+    fechas = pd.date_range('2020-05-15', periods=4, freq='15min')
+
+    df, informe = integrar(generacion(fechas, 'p1'), sensor(fechas, 'p2'))
+
+    assert df.irradiacion.isna().all()
+    assert informe.registros.sum() == len(df)
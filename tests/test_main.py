@@ -0,0 +1,65 @@
+import pandas as pd
+import pytest
+
+from planta_solar.__main__ import crear_parser, main
+from planta_solar.clima import cargar_vista
+from planta_solar.datamart import RUTA_DATAMART_DIA, cargar_datamart
+from planta_solar.incremental import RUTA_MARCAS, cargar_marcas
+
+
+@pytest.fixture
+def carpeta(flota, tmp_path, monkeypatch):
+    """Flota sintética de 2 plantas y carpeta de trabajo vacía, como la raíz del repositorio (las rutas de Datos/ son relativas)."""
+
+    flota(inversores=3, dias=3)
+    monkeypatch.chdir(tmp_path)
+
+    return tmp_path
+
+
+def test_actualizar_solo_las_plantas_pedidas(carpeta):
+    main(['actualizar', '--plantas', 'p1'])
+
+    assert set(cargar_vista(columnas=['planta']).unir().planta.astype(str)) == {'p1'}
+    assert list(cargar_marcas()['plantas'].index) == ['p1']
+
+    main(['actualizar'])
+
+    assert set(cargar_vista(columnas=['planta']).unir().planta.astype(str)) == {'p1', 'p2'}
+    assert set(cargar_marcas(RUTA_MARCAS)['inverters'].index.get_level_values('planta')) == {'p1', 'p2'}
+
+
+def test_construir_y_actualizar_dan_el_mismo_datamart(carpeta):
+    main(['construir', '--procesos', '1'])
+    construido = cargar_datamart(RUTA_DATAMART_DIA)
+
+    main(['actualizar'])
+
+    pd.testing.assert_frame_equal(cargar_datamart(RUTA_DATAMART_DIA), construido)
+
+
+@pytest.mark.parametrize('comando', [['calibrar'], ['puntuar'], ['alertas'], ['sensores'], ['ranking'], ['ranking', '--medida', 'kw_ac'],
+                                     ['alertas', '--plantas', 'p2', '--desde', '2020-05-16']])
+def test_comandos_de_lectura(carpeta, comando):
+    main(['construir', '--procesos', '1'])
+
+    main(comando + ['--salida', 'resultado.csv'])
+
+    assert (carpeta / 'resultado.csv').exists()
+
+
+def test_sin_registros_en_el_periodo(carpeta):
+    main(['construir', '--procesos', '1'])
+
+    for comando in (['alertas'], ['sensores'], ['ranking']):
+        main(comando + ['--desde', '2021-01-01', '--salida', 'vacio.csv'])
+        assert pd.read_csv(carpeta / 'vacio.csv').empty
+
+
+def test_opciones_de_cada_comando():
+    parser = crear_parser()
+
+    assert parser.parse_args(['actualizar', '--plantas', 'p1', 'p2']).plantas == ['p1', 'p2']
+
+    with pytest.raises(SystemExit):
+        parser.parse_args(['actualizar', '--desde', '2020-06-01'])
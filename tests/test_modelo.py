@@ -0,0 +1,76 @@
+import numpy as np
+import pandas as pd
+
+from planta_solar.modelo import ajustar_modelo, puntuar
+
+COEFICIENTES = {('p1', 'A'): (1300.0, -5.0), ('p1', 'B'): (1250.0, -4.0), ('p2', 'A'): (1200.0, -6.0)}
+
+
+def lecturas(n=500, ruido=0.0, semilla=0):
+    """Lecturas generadas con el modelo y COEFICIENTES conocidos, con noches (irradiación cero) y temperaturas de 20 a 60 grados."""
+
+    rng = np.random.default_rng(semilla)
+    partes = []
+
+    for (planta, inverter), (a, b) in COEFICIENTES.items():
+        irradiacion = np.where(rng.random(n) < 0.3, 0.0, rng.uniform(0, 1.1, n))
+        t_modulo = rng.uniform(20, 60, n)
+        kw_dc = a * irradiacion + b * irradiacion * (t_modulo - 25) + rng.normal(0, ruido, n) * (irradiacion > 0)
+        partes.append(pd.DataFrame({'planta': planta, 'inverter_id': inverter, 'irradiacion': irradiacion,
+                                    't_modulo': t_modulo, 'kw_dc': kw_dc}))
+
+    return pd.concat(partes, ignore_index=True)
+
+
+def test_recupera_los_coeficientes():
+    modelo = ajustar_modelo(lecturas())
+
+    assert list(modelo.index) == list(COEFICIENTES)
+    np.testing.assert_allclose(modelo[['a', 'b']].to_numpy(), list(COEFICIENTES.values()))
+    np.testing.assert_allclose(modelo.r2, 1)
+
+
+def test_igual_que_minimos_cuadrados():
+    df = lecturas(ruido=20)
+    modelo = ajustar_modelo(df)
+
+    for (planta, inverter), grupo in df.groupby(['planta', 'inverter_id']):
+        grupo = grupo[(grupo.irradiacion > 0.05) & (grupo.kw_dc > 0)]
+        x = np.c_[grupo.irradiacion, grupo.irradiacion * (grupo.t_modulo - 25)]
+        coeficientes = np.linalg.lstsq(x, grupo.kw_dc, rcond=None)[0]
+
+        np.testing.assert_allclose(modelo.loc[(planta, inverter), ['a', 'b']].astype('float64'), coeficientes)
+        assert modelo.loc[(planta, inverter), 'registros'] == len(grupo)
+
+
+def test_sin_variacion_de_temperatura():
+    df = lecturas()
+    df['t_modulo'] = 25.0
+    df['kw_dc'] = 1000 * df.irradiacion
+
+    modelo = ajustar_modelo(df, claves=('planta',))
+
+    np.testing.assert_allclose(modelo.a, 1000)
+    assert (modelo.b == 0).all()
+
+
+def test_puntuar():
+    df = lecturas(ruido=20)
+    modelo = ajustar_modelo(df)
+
+    # Una lectura de un inverter sin modelo y otra sin medición ambiental
+
+    df.loc[len(df)] = ['p2', 'C', 0.5, 30.0, 600.0]
+    df.loc[0, 't_modulo'] = np.nan
+
+    puntuacion = puntuar(df, modelo)
+
+    a, b = COEFICIENTES[('p1', 'A')]
+    assert puntuacion.index.equals(df.index)
+    assert puntuacion.iloc[[0, -1]].isna().all().all()
+    np.testing.assert_allclose(puntuacion.residuo, df.kw_dc - puntuacion.kw_dc_esperada)
+
+    de_dia = (df.irradiacion > 0.05).to_numpy()
+    assert puntuacion.ratio_rendimiento[~de_dia].isna().all()
+    assert abs(puntuacion.ratio_rendimiento[de_dia].median() - 1) < 0.01
+    assert abs(puntuacion.kw_dc_esperada[1] - (a + b * (df.t_modulo[1] - 25)) * df.irradiacion[1]) < 1
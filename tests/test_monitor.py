@@ -0,0 +1,70 @@
+import numpy as np
+import pandas as pd
+
+from planta_solar.monitor import MonitorEficiencia, monitorizar
+
+VENTANA = 20
+
+
+def lecturas(eficiencias, planta='p1', inverter='A'):
+    """Datamart de un inverter con las eficiencias dadas, una lectura cada 15 minutos."""
+
+    eficiencias = np.asarray(eficiencias, dtype='float64')
+    kw_dc = np.full(len(eficiencias), 1000.0)
+
+    return pd.DataFrame({'planta': planta, 'inverter_id': inverter, 'kw_dc': kw_dc, 'kw_ac': kw_dc * eficiencias / 100},
+                        index=pd.date_range('2020-05-15', periods=len(eficiencias), freq='15min', name='fecha'))
+
+
+def test_ventana_igual_que_pandas():
+    eficiencias = np.random.default_rng(0).normal(96, 2, 100)
+
+    resumen, _ = monitorizar(lecturas(eficiencias), MonitorEficiencia(ventana=VENTANA))
+
+    ultimas = pd.Series(eficiencias[-VENTANA:])
+    assert resumen.lecturas[0] == len(eficiencias)
+    np.testing.assert_allclose(resumen.media[0], ultimas.mean())
+    np.testing.assert_allclose(resumen.desviacion[0], ultimas.std())
+
+    # Los percentiles salen de un histograma con intervalos de 0.5 puntos, así que solo se aproximan a los exactos
+
+    for columna, probabilidad in (('p05', 0.05), ('p50', 0.5), ('p95', 0.95)):
+        assert abs(resumen[columna][0] - ultimas.quantile(probabilidad)) < 1
+
+
+def test_eventos_de_fuera_de_rango_y_deriva():
+    eficiencias = np.r_[np.full(3 * VENTANA, 97.0), np.full(2 * VENTANA, 80.0)]
+
+    resumen, eventos = monitorizar(lecturas(eficiencias), MonitorEficiencia(ventana=VENTANA))
+
+    assert list(eventos.tipo) == ['deriva', 'fuera_de_rango']
+    assert (eventos.fecha > lecturas(eficiencias).index[3 * VENTANA - 1]).all()
+    assert resumen.fuera_de_rango[0] and resumen.deriva[0]
+
+    # Mientras dura la deriva la referencia no se adapta al fallo
+
+    assert resumen.referencia[0] > 95
+
+
+def test_sin_eventos_con_eficiencia_nominal():
+    _, eventos = monitorizar(lecturas(np.full(5 * VENTANA, 96.5)), MonitorEficiencia(ventana=VENTANA))
+
+    assert eventos.empty
+
+
+def test_ignora_lecturas_sin_dc_o_sin_ac():
+    eficiencias = np.random.default_rng(1).normal(96, 2, 60)
+    df = lecturas(eficiencias)
+
+    con_huecos = df.copy()
+    con_huecos.loc[con_huecos.index[::4], 'kw_ac'] = np.nan
+    con_huecos.loc[con_huecos.index[1::4], ['kw_dc', 'kw_ac']] = 0.0
+
+    validas = np.ones(len(df), dtype=bool)
+    validas[::4] = validas[1::4] = False
+
+    resumen, _ = monitorizar(con_huecos, MonitorEficiencia(ventana=VENTANA))
+    referencia, _ = monitorizar(df[validas], MonitorEficiencia(ventana=VENTANA))
+
+    pd.testing.assert_frame_equal(resumen, referencia)
+    assert np.isfinite(resumen.media[0])
@@ -0,0 +1,39 @@
+import pandas as pd
+
+from planta_solar.paralelo import procesar_planta, procesar_plantas, unir
+
+
+def test_en_paralelo_igual_que_en_el_proceso_actual(flota):
+    flota(n_plantas=3, inversores=3, dias=2)
+
+    df, informe, rechazos = procesar_plantas(procesos=3)
+    df_serie, informe_serie, _ = procesar_plantas(procesos=1)
+
+    pd.testing.assert_frame_equal(df, df_serie)
+    pd.testing.assert_frame_equal(informe, informe_serie)
+    assert list(informe.index) == ['p1', 'p2', 'p3']
+    assert rechazos.empty
+
+
+def test_unir_igual_que_concatenar_las_plantas(flota):
+    flota(inversores=3, dias=2)
+    resultados = [procesar_planta('p1'), procesar_planta('p2')]
+
+    df, informe, _ = unir(resultados)
+
+    # Las categorías de cada planta se unifican: planta e inverter_id siguen siendo categóricas y con los mismos valores
+
+    assert df.planta.dtype == 'category' and df.inverter_id.dtype == 'category'
+    assert df.index.is_monotonic_increasing
+    assert len(df) == informe.registros.sum()
+
+    esperado = pd.concat([planta.astype({'planta': str, 'inverter_id': str}) for planta, _, _ in resultados]).sort_index(kind='stable')
+    pd.testing.assert_frame_equal(df.astype({'planta': str, 'inverter_id': str}), esperado)
+
+
+def test_sin_plantas(flota):
+    flota(inversores=3, dias=1)
+
+    df, informe, rechazos = procesar_plantas([])
+
+    assert df.empty and informe.empty and rechazos.empty
@@ -0,0 +1,48 @@
+import numpy as np
+import pandas as pd
+
+from benchmarks.comun import datamart_sintetico
+from planta_solar.derivadas import crear_variables
+from planta_solar.rollup import combinar, construir_rollup, perfil
+
+
+def datamart():
+    df = crear_variables(datamart_sintetico(plantas=2, inversores=3, dias=3, categoricas=True))
+    df.loc[df.index[::5], 'kw_dc'] = np.nan
+
+    return df
+
+
+def test_perfil_igual_que_pandas():
+    df = datamart()
+    rollup = construir_rollup(df)
+
+    pd.testing.assert_frame_equal(perfil(rollup, 'kw_dc'),
+                                  df.groupby(['hora', 'planta'], observed=True).kw_dc.mean().unstack('planta'),
+                                  check_dtype=False, check_index_type=False, check_names=False)
+
+    pd.testing.assert_series_equal(perfil(rollup, 'eficiencia', por=['inverter_id'], estadistico='max'),
+                                   df.groupby('inverter_id', observed=True).eficiencia.max(), check_dtype=False, check_names=False)
+
+    pd.testing.assert_series_equal(perfil(rollup, 'kw_ac', por=['fecha'], estadistico='sum'),
+                                   df.groupby(df.index.normalize()).kw_ac.sum(), check_dtype=False, check_names=False)
+
+    pd.testing.assert_series_equal(perfil(rollup, 'kw_dc', por=['planta'], estadistico='count'),
+                                   df.groupby('planta', observed=True).kw_dc.count(), check_dtype=False, check_names=False)
+
+
+def test_combinar_igual_que_construir_todo():
+    df = datamart()
+    corte = df.index[len(df) // 2]
+
+    combinado = combinar(construir_rollup(df[df.index < corte]), construir_rollup(df[df.index >= corte]))
+
+    pd.testing.assert_frame_equal(combinado, construir_rollup(df))
+
+
+def test_sin_registros():
+    rollup = construir_rollup(datamart().iloc[:0])
+
+    assert rollup.empty
+    assert perfil(rollup, 'kw_dc').empty
+    assert perfil(rollup, 'kw_dc', por=['inverter_id'], estadistico='min').empty
@@ -0,0 +1,73 @@
+import numpy as np
+import pandas as pd
+
+from benchmarks.bench_sensores import FALLOS, aciertos, clima_sintetico, inyectar_fallos
+from planta_solar.huecos import detectar_huecos
+from planta_solar.sensores import LECTURAS_PLANAS, SALTOS, leer_sensores, marcar, validar_sensores
+
+
+def test_detecta_los_fallos_inyectados():
+    clima = clima_sintetico(plantas=4, dias=20)
+    inyectados = inyectar_fallos(clima, proporcion=0.5)
+
+    detectados, falsos = aciertos(validar_sensores(clima), inyectados)
+
+    assert (detectados == inyectados.comprobacion.value_counts().reindex(list(FALLOS))).all()
+    assert falsos == 0
+
+
+def test_plano_y_pico_igual_que_pandas():
+    clima = clima_sintetico(plantas=3, dias=5)
+    inyectar_fallos(clima, proporcion=1)
+    marcas = marcar(clima)
+
+    for sensor, lecturas in marcas.groupby('sensor_id', observed=True):
+        valores = clima[clima.sensor_id == sensor].t_ambiente.sort_index()
+
+        racha = (valores != valores.shift()).cumsum()
+        plano = valores.groupby(racha).transform('size') >= LECTURAS_PLANAS
+        np.testing.assert_array_equal(lecturas.plano_t_ambiente.to_numpy(), plano.to_numpy())
+
+        anterior, siguiente = valores - valores.shift(), valores - valores.shift(-1)
+        pico = (np.sign(anterior) == np.sign(siguiente)) & (np.minimum(anterior.abs(), siguiente.abs()) > SALTOS['t_ambiente'])
+        np.testing.assert_array_equal(lecturas.pico_t_ambiente.to_numpy(), pico.to_numpy())
+
+
+def test_sin_lecturas_no_marca_nada():
+    clima = clima_sintetico(plantas=2, dias=1)
+
+    marcados = validar_sensores(clima.iloc[:0])
+
+    assert marcados.empty
+    assert list(marcados.columns) == ['planta', 'sensor_id', 'comprobacion', 'inicio', 'fin', 'lecturas']
+
+    clima.loc[:, 'sensor_id'] = np.nan
+    assert validar_sensores(clima).empty
+
+
+def test_lee_las_lecturas_de_los_csv_con_sus_huecos(flota):
+    inyectados = flota(inversores=2, dias=3, fallos={'huecos': 0.05})
+    sensores = leer_sensores()
+
+    assert sensores.index.is_monotonic_increasing
+    assert set(sensores.planta) == {'p1', 'p2'}
+
+    # Ninguna lectura cae en un hueco inyectado en los sensores, y cada hueco corta la racha de lecturas seguidas
+
+    for hueco in inyectados[inyectados.fallo == 'hueco_sensor'].itertuples():
+        de_la_planta = sensores[sensores.planta == hueco.planta]
+        assert not ((de_la_planta.index >= hueco.inicio) & (de_la_planta.index <= hueco.fin)).any()
+
+    huecos = detectar_huecos(sensores, clave='sensor_id')
+    assert len(huecos) > 0
+    assert (~marcar(sensores).seguida).sum() == len(huecos) + sensores.sensor_id.nunique()
+
+
+def test_lee_las_plantas_y_el_periodo_pedidos(flota):
+    flota(inversores=2, dias=3)
+
+    sensores = leer_sensores(['p2'], '2020-05-16', '2020-05-16')
+
+    assert set(sensores.planta) == {'p2'}
+    assert (sensores.index.normalize() == pd.Timestamp('2020-05-16')).all()
+    assert validar_sensores(leer_sensores([])).empty
@@ -0,0 +1,38 @@
+import numpy as np
+import pandas as pd
+
+from benchmarks.comun import datamart_sintetico
+from planta_solar.tipos import ERROR_MAXIMO, compactar_tipos
+
+
+def test_conserva_los_valores():
+    df = datamart_sintetico(plantas=2, inversores=3, dias=3)
+    df['hora'] = df.index.hour
+    df['kw_total'] += 0.37
+
+    compacto, informe = compactar_tipos(df)
+
+    assert compacto.planta.dtype == 'category' and compacto.hora.dtype == 'int8'
+    assert compacto.kw_dc.dtype == 'float32'
+
+    # kw_total son millones de kw: en float32 perdería las unidades
+
+    assert compacto.kw_total.dtype == 'float64'
+
+    for columna in df.columns:
+        if df[columna].dtype == 'float64':
+            np.testing.assert_allclose(compacto[columna].astype('float64'), df[columna], rtol=0, atol=ERROR_MAXIMO)
+        else:
+            assert (compacto[columna].astype(df[columna].dtype) == df[columna]).all()
+
+    assert informe.loc['total', 'bytes_despues'] < informe.loc['total', 'bytes_antes']
+    assert informe.loc['total', 'bytes_ahorrados'] == informe.bytes_ahorrados.drop('total').sum()
+
+
+def test_no_modifica_el_original():
+    df = datamart_sintetico(plantas=1, inversores=2, dias=1)
+    original = df.copy()
+
+    compactar_tipos(df)
+
+    pd.testing.assert_frame_equal(df, original)